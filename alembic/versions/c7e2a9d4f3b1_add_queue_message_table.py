@@ -0,0 +1,66 @@
+"""add queue message table for the postgres queue service
+
+Revision ID: c7e2a9d4f3b1
+Revises: b8c4d2e7f1a9
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7e2a9d4f3b1"
+down_revision: str | None = "b8c4d2e7f1a9"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "queue_message",
+        sa.Column("id", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False),
+        sa.Column("created_datetime", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("queue_name", sa.String(), nullable=False),
+        sa.Column("message", JSONB(), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("visible_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("receive_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("receipt_handle", sa.UUID(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_queue_message_claim", "queue_message", ["queue_name", sa.text("priority DESC"), "visible_at"], unique=False
+    )
+    op.create_index("ix_queue_message_receipt_handle", "queue_message", ["receipt_handle"], unique=True)
+    # wake idle consumers whenever a message becomes receivable now, rather than after a delay
+    op.execute(
+        """
+        CREATE FUNCTION notify_queue_message() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('queue_message', NEW.queue_name);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER queue_message_notify
+        AFTER INSERT OR UPDATE OF visible_at ON queue_message
+        FOR EACH ROW WHEN (NEW.visible_at <= now())
+        EXECUTE FUNCTION notify_queue_message()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS queue_message_notify ON queue_message")
+    op.execute("DROP FUNCTION IF EXISTS notify_queue_message()")
+    op.drop_index("ix_queue_message_receipt_handle", table_name="queue_message")
+    op.drop_index("ix_queue_message_claim", table_name="queue_message")
+    op.drop_table("queue_message")
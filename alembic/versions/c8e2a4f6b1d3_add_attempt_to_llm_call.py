@@ -0,0 +1,27 @@
+"""add attempt to llm call, so retries of a request can be told apart
+
+Revision ID: c8e2a4f6b1d3
+Revises: f1b7d3e9a2c6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c8e2a4f6b1d3"
+down_revision: str | None = "f1b7d3e9a2c6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("llm_call", sa.Column("attempt", sa.Integer(), server_default="1", nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column("llm_call", "attempt")
@@ -0,0 +1,28 @@
+"""add section to hallucination
+
+Revision ID: e4a9c2d7b5f1
+Revises: d3f8b1a6e2c4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a9c2d7b5f1"
+down_revision: str | None = "d3f8b1a6e2c4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("hallucination", sa.Column("section", sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("hallucination", "section")
@@ -0,0 +1,47 @@
+"""add llm call table for LLM telemetry
+
+Revision ID: f1b7d3e9a2c6
+Revises: e4a9c2d7b5f1
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+import sqlmodel
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b7d3e9a2c6"
+down_revision: str | None = "e4a9c2d7b5f1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_call",
+        sa.Column("id", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False),
+        sa.Column("created_datetime", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("job_type", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("job_id", sa.UUID(), nullable=True),
+        sa.Column("template_name", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("stage", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("model", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=True),
+        sa.Column("completion_tokens", sa.Integer(), nullable=True),
+        sa.Column("cached_tokens", sa.Integer(), nullable=True),
+        sa.Column("latency_seconds", sa.Float(), nullable=False),
+        sa.Column("cache_hit", sa.Boolean(), nullable=False),
+        sa.Column("error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("cost", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_llm_call_job_id", "llm_call", ["job_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_llm_call_job_id", table_name="llm_call")
+    op.drop_table("llm_call")
@@ -6,6 +6,7 @@ from sqlalchemy import delete
 from sqlmodel import col, select
 
 from backend.api.dependencies import SQLSessionDep, UserDep
+from backend.utils.publish_on_commit import publish_on_commit
 from common.database.postgres_models import (
     Chat,
     Transcription,
@@ -23,8 +24,11 @@ from common.types import (
 
 settings = get_settings()
 chat_router = APIRouter(tags=["Chat"])
-llm_queue_service = get_queue_service(
-    settings.QUEUE_SERVICE_NAME, settings.LLM_QUEUE_NAME, settings.LLM_DEADLETTER_QUEUE_NAME
+# chat messages go to their own queue when one is configured, so they are not held up by minute generation
+interactive_queue_service = get_queue_service(
+    settings.QUEUE_SERVICE_NAME,
+    settings.INTERACTIVE_QUEUE_NAME or settings.LLM_QUEUE_NAME,
+    settings.INTERACTIVE_DEADLETTER_QUEUE_NAME or settings.LLM_DEADLETTER_QUEUE_NAME,
 )
 
 logger = logging.getLogger(__name__)
@@ -72,9 +76,9 @@ async def create_chat(
     chat_id = uuid.uuid4()
     chat = Chat(user_content=request.user_content, transcription_id=transcription_id, id=chat_id)
     session.add(chat)
+    publish_on_commit(session, interactive_queue_service, WorkerMessage(id=chat_id, type=TaskType.INTERACTIVE))
     await session.commit()
     await session.refresh(chat)
-    llm_queue_service.publish_message(WorkerMessage(id=chat.id, type=TaskType.INTERACTIVE))
     return ChatCreateResponse(id=chat.id)
 
 
@@ -6,6 +6,7 @@ from sqlalchemy.orm import selectinload
 from sqlmodel import col, select
 
 from backend.api.dependencies import SQLSessionDep, UserDep
+from backend.utils.publish_on_commit import publish_on_commit
 from common.database.postgres_models import JobStatus, Minute, MinuteVersion, Transcription
 from common.services.queue_services import get_queue_service
 from common.settings import get_settings
@@ -70,9 +71,9 @@ async def create_minute(
     session.add(minute)
     minute_version = MinuteVersion(id=uuid.uuid4(), minute_id=minute.id)
     session.add(minute_version)
+    publish_on_commit(session, llm_queue_service, WorkerMessage(id=minute_version.id, type=TaskType.MINUTE))
     await session.commit()
     await session.refresh(minute_version)
-    llm_queue_service.publish_message(WorkerMessage(id=minute_version.id, type=TaskType.MINUTE))
 
 
 @minutes_router.get("/minutes/{minutes_id}")
@@ -133,16 +134,18 @@ async def create_minute_version(
     )
     minute.updated_datetime = datetime.now(tz=UTC)
     session.add(minute_version)
-    await session.commit()
-    await session.refresh(minute_version)
     if request.ai_edit_instructions:
-        llm_queue_service.publish_message(
+        publish_on_commit(
+            session,
+            llm_queue_service,
             WorkerMessage(
                 id=minute_version.id,
                 data=EditMessageData(source_id=request.ai_edit_instructions.source_id),
                 type=TaskType.EDIT,
-            )
+            ),
         )
+    await session.commit()
+    await session.refresh(minute_version)
     return MinuteVersionResponse(
         id=minute_version.id,
         minute_id=minute_id,
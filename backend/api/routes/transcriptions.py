@@ -9,6 +9,7 @@ from sqlmodel import col, func, select
 
 from backend.api.dependencies import SQLSessionDep, UserDep
 from backend.utils.get_file_s3_key import get_file_s3_key
+from backend.utils.publish_on_commit import publish_on_commit
 from common.database.postgres_models import (
     Minute,
     MinuteVersion,
@@ -159,8 +160,8 @@ async def create_transcription(
     session.add(minute)
     session.add(minute_version)
     recording.transcription_id = transcription.id
+    publish_on_commit(session, transcription_queue_service, WorkerMessage(id=minute.id, type=TaskType.TRANSCRIPTION))
     await session.commit()
-    transcription_queue_service.publish_message(WorkerMessage(id=minute.id, type=TaskType.TRANSCRIPTION))
 
     return TranscriptionCreateResponse(id=transcription.id)
 
@@ -3,11 +3,11 @@ from datetime import UTC, datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlmodel import and_, col, func, null, select, update
+from sqlmodel import and_, col, delete, exists, func, null, or_, select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from common.database.postgres_database import async_engine
-from common.database.postgres_models import JobStatus, MinuteVersion, Recording, Transcription, User
+from common.database.postgres_models import JobStatus, LlmResponse, MinuteVersion, Recording, Transcription, User
 from common.services.storage_services import get_storage_service
 from common.settings import get_settings
 
@@ -59,6 +59,24 @@ async def cleanup_old_records():
         await session.commit()
 
 
+async def delete_expired_llm_responses():
+    """Delete cached LLM responses that have expired, or are older than their user's retention period."""
+    async with AsyncSession(async_engine) as session:
+        statement = delete(LlmResponse).where(
+            or_(
+                col(LlmResponse.expires_at) < func.now(),
+                exists().where(
+                    User.id == LlmResponse.user_id,
+                    col(User.data_retention_days).is_not(null()),
+                    LlmResponse.created_datetime < func.now() - User.data_retention_days * timedelta(days=1),
+                ),
+            )
+        )
+        result = await session.exec(statement)
+        await session.commit()
+        logger.info("Deleted %d cached LLM responses.", result.rowcount)
+
+
 async def delete_orphan_records():
     logger.info("Starting recording clean up")
     async with AsyncSession(async_engine) as session:
@@ -83,6 +101,7 @@ async def delete_orphan_records():
 
 async def cleanup_jobs():
     await cleanup_old_records()
+    await delete_expired_llm_responses()
     await delete_orphan_records()
     await cleanup_failed_records()
 
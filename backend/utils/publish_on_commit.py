@@ -0,0 +1,26 @@
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.services.queue_services.base import QueueService
+from common.services.queue_services.postgres import PostgresQueueService
+from common.types import WorkerMessage
+
+
+def publish_on_commit(session: AsyncSession, queue_service: QueueService, message: WorkerMessage) -> None:
+    """
+    Publish a message to the worker once the session's transaction has committed.
+
+    With the postgres queue service the message is written in the same transaction as the rows it refers to, so it is
+    published if and only if they are saved. Other queue services publish as soon as the commit succeeds.
+
+    Args:
+        session (AsyncSession): The session holding the rows the message refers to
+        queue_service (QueueService): The queue to publish the message to
+        message (WorkerMessage): The message to publish
+    """
+    if isinstance(queue_service, PostgresQueueService):
+        queue_service.add_to_session(session, message)
+    else:
+        event.listen(
+            session.sync_session, "after_commit", lambda _session: queue_service.publish_message(message), once=True
+        )
@@ -1,10 +1,32 @@
+import asyncio
 import logging
+import multiprocessing
 import subprocess
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
 from pathlib import Path
+from typing import TypeVar
 
 import ffmpeg
 
 logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+
+@cache
+def get_audio_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool shared by all transcriptions running in this process.
+
+    Uses the spawn start method, as forking a process that is already running Ray and asyncio threads is unsafe.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+async def run_in_audio_process_pool(max_workers: int, func: Callable[..., T], *args) -> T:
+    """Run a blocking ffmpeg/ffprobe call in the audio process pool, so other jobs on the event loop keep running."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_audio_process_pool(max_workers), func, *args)
 
 
 def convert_to_mp3(input_file_path: Path) -> Path:
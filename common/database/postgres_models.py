@@ -108,6 +108,9 @@ class Hallucination(BaseTableMixin, table=True):
     hallucination_type: HallucinationType = Field(description="Type of hallucination", default=HallucinationType.OTHER)
     hallucination_text: str | None = Field(description="Text of hallucination", default=None)
     hallucination_reason: str | None = Field(description="Reason for hallucination", default=None)
+    section: str | None = Field(
+        description="Heading of the section of the minutes the hallucination is in", default=None
+    )
 
 
 # Main models with table=True for DB tables
@@ -215,3 +218,62 @@ class UserTemplate(BaseTableMixin, table=True):
         passive_deletes="all",
         sa_relationship_kwargs={"order_by": TemplateQuestion.position},
     )
+
+
+class QueueMessage(BaseTableMixin, table=True):
+    """A message on the postgres queue service. See common/services/queue_services/postgres.py"""
+
+    __tablename__ = "queue_message"
+    __table_args__ = (
+        Index("ix_queue_message_claim", "queue_name", text("priority DESC"), "visible_at"),
+        Index("ix_queue_message_receipt_handle", "receipt_handle", unique=True),
+    )
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    queue_name: str
+    message: dict = Field(sa_column=Column(JSONB, nullable=False))
+    priority: int = Field(default=0, description="Messages with a higher priority are received first")
+    visible_at: datetime = Field(
+        sa_column=Column(TIMESTAMP(timezone=True), nullable=False, server_default=now()),
+        default=None,
+        description="The message cannot be received before this time, used for delays and visibility timeouts",
+    )
+    receive_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    receipt_handle: UUID | None = Field(default=None, description="Changes every time the message is received")
+
+
+class LlmResponse(BaseTableMixin, table=True):
+    """A cached LLM response. See common/llm/response_cache.py"""
+
+    __tablename__ = "llm_response"
+    __table_args__ = (Index("ix_llm_response_key", "key", unique=True),)
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    key: str = Field(description="Hash of the model, its settings, the user and the request")
+    user_id: UUID = Field(foreign_key="user.id", ondelete="CASCADE")
+    response: str
+    expires_at: datetime = Field(sa_column=Column(TIMESTAMP(timezone=True), nullable=False), default=None)
+
+
+class LlmCall(BaseTableMixin, table=True):
+    """One request to an LLM, attributed to the job it was for. See common/llm/telemetry.py"""
+
+    __tablename__ = "llm_call"
+    created_datetime: datetime = Field(sa_column=created_datetime_column(), default=None)
+    job_type: str | None = Field(
+        default=None,
+        description="The kind of job: minute, edit or hallucination_check for a MinuteVersion, transcription for a "
+        "Transcription, or interactive for a Chat",
+    )
+    job_id: UUID | None = Field(
+        default=None, index=True, description="The id of the MinuteVersion, Transcription or Chat"
+    )
+    template_name: str | None = Field(default=None)
+    stage: str | None = Field(default=None, description="The step of the job, like citations or hallucination_check")
+    model: str
+    attempt: int = Field(default=1, description="Which try of the request this was, counting from 1 across retries")
+    prompt_tokens: int | None = Field(default=None)
+    completion_tokens: int | None = Field(default=None)
+    cached_tokens: int | None = Field(default=None, description="Prompt tokens the provider answered from its cache")
+    latency_seconds: float = Field(default=0.0)
+    cache_hit: bool = Field(default=False, description="Answered from the LLM response cache without calling the model")
+    error: str | None = Field(default=None, description="The type of error the call failed with")
+    cost: float | None = Field(default=None, description="Estimated from LLM_PRICES_PER_MILLION_TOKENS, if set")
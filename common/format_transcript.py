@@ -5,5 +5,7 @@ def transcript_as_speaker_and_utterance(transcript: list[DialogueEntry]) -> str:
     return "\n".join([f"{item['speaker']}: {item['text']}" for item in transcript])
 
 
-def transcript_as_index_speaker_and_utterance(transcript: list[DialogueEntry]) -> str:
-    return "\n".join(f"[{i}] {entry['speaker']}: {entry['text']}" for i, entry in enumerate(transcript))
+def transcript_as_index_speaker_and_utterance(transcript: list[DialogueEntry], indexes: list[int] | None = None) -> str:
+    """Number each item by its position, or by `indexes` if given, such as a condensed transcript's source indexes."""
+    indexes = indexes if indexes is not None else list(range(len(transcript)))
+    return "\n".join(f"[{i}] {entry['speaker']}: {entry['text']}" for i, entry in zip(indexes, transcript, strict=True))
@@ -1,5 +1,7 @@
 from .azure_openai import OpenAIModelAdapter
 from .base import ModelAdapter
+from .failover import FailoverModelAdapter
+from .fake import FakeModelAdapter
 from .gemini import GeminiModelAdapter
 
-__all__ = ["GeminiModelAdapter", "ModelAdapter", "OpenAIModelAdapter"]
+__all__ = ["FailoverModelAdapter", "FakeModelAdapter", "GeminiModelAdapter", "ModelAdapter", "OpenAIModelAdapter"]
@@ -5,9 +5,12 @@ from openai import AsyncAzureOpenAI
 from openai.types.chat import ChatCompletion
 from openai.types.chat.chat_completion import Choice
 
+from common.llm.telemetry import record_usage
+from common.llm.transcript_context import PromptPrefix
 from common.settings import get_settings
 
 from .base import ModelAdapter
+from .clients import get_llm_client_pool
 
 settings = get_settings()
 T = TypeVar("T")
@@ -25,33 +28,60 @@ class OpenAIModelAdapter(ModelAdapter):
         **kwargs,
     ) -> None:
         self._model = model
-        self.async_azure_client = AsyncAzureOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=api_key,
-            api_version=api_version,
-            azure_deployment=azure_deployment,
-        )
+        self.azure_endpoint = azure_endpoint
+        self.api_key = api_key
+        self.api_version = api_version
+        self.azure_deployment = azure_deployment
         self._kwargs = kwargs
 
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
-        response = await self.async_azure_client.beta.chat.completions.parse(
-            model=self._model, messages=messages, response_format=response_format, **self._kwargs
+    @property
+    def async_azure_client(self) -> AsyncAzureOpenAI:
+        return get_llm_client_pool().get_openai_client(
+            self.azure_endpoint, self.api_key, self.api_version, self.azure_deployment
         )
-        choice = self.handle_response(response)
 
+    @staticmethod
+    def with_prefix(messages: list[dict[str, str]], prefix: PromptPrefix | None) -> list[dict[str, str]]:
+        # Azure OpenAI caches prompt prefixes of over 1024 tokens automatically, so the shared prefix must come first
+        return [*prefix.messages, *messages] if prefix else messages
+
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], prefix: PromptPrefix | None = None
+    ) -> T:
+        response = await self.async_azure_client.beta.chat.completions.parse(
+            model=self._model,
+            messages=self.with_prefix(messages, prefix),
+            response_format=response_format,
+            **self._kwargs,
+        )
+        self.record_usage(response)
+        choice = response.choices[0]
+        self.choice_incomplete(choice, response)
         return choice.message.parsed
 
-    async def chat(self, messages: list[dict[str, str]]) -> str:
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:
         response = await self.async_azure_client.chat.completions.create(
             model=self._model,
-            messages=messages,
+            messages=self.with_prefix(messages, prefix),
             temperature=0.0,
             max_tokens=16384,
         )
+        self.record_usage(response)
         choice = response.choices[0]
         self.choice_incomplete(choice, response)
         return choice.message.content
 
+    def record_usage(self, response: ChatCompletion) -> None:
+        if response.usage is None:
+            return
+        details = response.usage.prompt_tokens_details
+        record_usage(
+            f"openai/{self._model}",
+            response.usage.prompt_tokens,
+            response.usage.completion_tokens,
+            details.cached_tokens if details is not None else None,
+        )
+
     @staticmethod
     def choice_incomplete(choice: Choice, response: ChatCompletion) -> bool:
         if choice.finish_reason == "length":
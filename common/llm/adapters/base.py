@@ -2,6 +2,7 @@ from typing import Any, Protocol, TypeVar
 
 from pydantic import BaseModel
 
+from common.llm.transcript_context import PromptPrefix
 from common.settings import get_settings
 
 settings = get_settings()
@@ -9,5 +10,7 @@ T = TypeVar("T", bound=BaseModel)
 
 
 class ModelAdapter(Protocol):
-    async def chat(self, messages: list[dict[str, str]]) -> Any: ...
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T: ...
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> Any: ...
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], prefix: PromptPrefix | None = None
+    ) -> T: ...
@@ -0,0 +1,85 @@
+import asyncio
+import weakref
+
+import httpx
+from google import genai
+from google.genai.types import HttpOptions
+from openai import AsyncAzureOpenAI
+
+# enough connections for every LLM call a worker process makes at once
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+# idle connections are closed before the providers' load balancers drop them, so a reused connection is never stale
+KEEPALIVE_EXPIRY_SECONDS = 60
+# a minute generation over a long transcript can take several minutes, but an unreachable endpoint should fail fast
+TIMEOUT = httpx.Timeout(600, connect=10)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=TIMEOUT,
+    )
+
+
+class LlmClientPool:
+    """Provider clients shared by every ChatBot in a process, keyed by endpoint.
+
+    Creating a client per ChatBot meant a new connection pool, TLS handshake and credential lookup for every LLM call.
+    The underlying httpx clients are bound to the event loop they were first used on, so there is one pool per event
+    loop, which for a Ray actor means one per process.
+    """
+
+    def __init__(self) -> None:
+        self.openai_clients: dict[tuple, AsyncAzureOpenAI] = {}
+        self.gemini_clients: dict[tuple, genai.Client] = {}
+
+    def get_openai_client(
+        self, azure_endpoint: str, api_key: str, api_version: str, azure_deployment: str
+    ) -> AsyncAzureOpenAI:
+        key = (azure_endpoint, api_key, api_version, azure_deployment)
+        if key not in self.openai_clients:
+            self.openai_clients[key] = AsyncAzureOpenAI(
+                azure_endpoint=azure_endpoint,
+                api_key=api_key,
+                api_version=api_version,
+                azure_deployment=azure_deployment,
+                http_client=create_http_client(),
+            )
+        return self.openai_clients[key]
+
+    def get_gemini_client(self, location: str, http_options: HttpOptions | None = None) -> genai.Client:
+        key = (location, http_options.model_dump_json() if http_options else None)
+        if key not in self.gemini_clients:
+            # Note, env vars GOOGLE_CLOUD_PROJECT and GOOGLE_APPLICATION_CREDENTIALS are automatically used by the
+            # client. GOOGLE_CLOUD_LOCATION 'should' also be according to docs, but this doesn't appear to be true...
+            self.gemini_clients[key] = genai.Client(
+                http_options=(http_options or HttpOptions()).model_copy(
+                    update={"httpx_async_client": create_http_client()}
+                ),
+                vertexai=True,
+                location=location,
+            )
+        return self.gemini_clients[key]
+
+    async def close(self) -> None:
+        for openai_client in self.openai_clients.values():
+            await openai_client.close()
+        for gemini_client in self.gemini_clients.values():
+            await gemini_client.aio.aclose()
+        self.openai_clients.clear()
+        self.gemini_clients.clear()
+
+
+_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LlmClientPool] = weakref.WeakKeyDictionary()
+
+
+def get_llm_client_pool() -> LlmClientPool:
+    loop = asyncio.get_running_loop()
+    if loop not in _pools:
+        _pools[loop] = LlmClientPool()
+    return _pools[loop]
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from common.llm.adapters.base import ModelAdapter
+from common.llm.circuit_breaker import CircuitBreaker, CircuitOpenError
+from common.llm.rate_limiter import RateLimiter, is_rate_limit_error
+from common.llm.telemetry import record_llm_call
+from common.llm.tokens import estimate_tokens
+from common.llm.transcript_context import PromptPrefix
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+
+Route = tuple[ModelAdapter, CircuitBreaker, RateLimiter | None]
+
+
+class FailoverModelAdapter:
+    """Sends each request to the first model whose circuit breaker allows it, failing over to the next on an error.
+
+    Each model has its own rate limiter, which the request waits for only once it is routed to that model, so requests
+    served by one model never use up another's limits. Rate limit errors are raised straight away rather than failed
+    over, once the model's rate limiter has been told to back off. If every breaker is open, CircuitOpenError is raised
+    without sending anything.
+    """
+
+    def __init__(self, routes: list[Route]) -> None:
+        self.routes = routes
+
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> Any:
+        return await self._route(lambda adapter: adapter.chat(messages, prefix=prefix), messages, prefix)
+
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], prefix: PromptPrefix | None = None
+    ) -> T:
+        return await self._route(
+            lambda adapter: adapter.structured_chat(messages, response_format, prefix=prefix), messages, prefix
+        )
+
+    async def _route(
+        self,
+        request: Callable[[ModelAdapter], Awaitable[R]],
+        messages: list[dict[str, str]],
+        prefix: PromptPrefix | None,
+    ) -> R:
+        last_error: Exception | None = None
+        for route in self.routes:
+            # asked only when the route is about to be tried, as a half open breaker counts this as its probe
+            if not route[1].allow_request():
+                continue
+            try:
+                return await self._attempt(route, request, messages, prefix)
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    raise
+                last_error = e
+
+        if last_error is not None:
+            raise last_error
+        msg = f"Every model is failing: {', '.join(breaker.name for _, breaker, _ in self.routes)}"
+        raise CircuitOpenError(msg)
+
+    async def _attempt(
+        self,
+        route: Route,
+        request: Callable[[ModelAdapter], Awaitable[R]],
+        messages: list[dict[str, str]],
+        prefix: PromptPrefix | None,
+    ) -> R:
+        adapter, breaker, rate_limiter = route
+        try:
+            if rate_limiter is not None:
+                await rate_limiter.acquire(estimate_tokens([*prefix.messages, *messages] if prefix else messages))
+            started_at = time.monotonic()
+            # recorded per model, after waiting for its rate limiter, so the latency and any error are that model's
+            with record_llm_call(breaker.name):
+                response = await request(adapter)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            if is_rate_limit_error(e):
+                # says nothing about whether the model is healthy, so a probe is freed for the next request
+                breaker.release_probe()
+                if rate_limiter is not None:
+                    rate_limiter.record_rate_limited()
+                raise
+            breaker.record_failure()
+            logger.warning("Request to %s failed: %s", breaker.name, e)
+            raise
+        if rate_limiter is not None:
+            rate_limiter.record_success()
+        breaker.record_success(time.monotonic() - started_at)
+        return response
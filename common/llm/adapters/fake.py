@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import types
+from enum import Enum
+from typing import Any, Literal, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter
+
+from common.llm.telemetry import record_usage
+from common.llm.tokens import estimate_tokens
+from common.llm.transcript_context import PromptPrefix
+
+from .base import ModelAdapter
+
+T = TypeVar("T")
+
+WORDS = (
+    "the committee agreed budget review action report team project update risk plan council member proposal "
+    "funding schedule delivery policy decision meeting data service training support cost timeline"
+).split()
+# log normal latencies have a long tail like real LLM latencies, with this spread around the mean
+LOGNORMAL_SIGMA = 0.5
+
+
+class FakeRateLimitError(Exception):
+    """A 429 as the real providers raise it, so `is_rate_limit_error` recognises it."""
+
+    code = 429
+
+
+class FakeModelAdapter(ModelAdapter):
+    """A local stand-in for an LLM, for running the pipelines offline and load testing the workers.
+
+    Responses are deterministic: the same request always gets the same response, with structured responses valid for
+    any response format. Each request takes a simulated time to first token, drawn from a fixed, exponential or log
+    normal distribution around `latency_seconds`, plus the time to generate its output at `tokens_per_second`. A
+    `rate_limit_rate` or `timeout_rate` fraction of requests fail with a 429 or TimeoutError, drawn from a random
+    sequence seeded by `seed` so that a retry of the same request can succeed.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        latency_seconds: float = 0.0,
+        latency_distribution: Literal["fixed", "exponential", "lognormal"] = "fixed",
+        tokens_per_second: float | None = None,
+        completion_tokens: int = 200,
+        rate_limit_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self._model = model
+        self.latency_seconds = latency_seconds
+        self.latency_distribution = latency_distribution
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        # faults and latencies vary from one request to the next, reproducibly if seeded
+        self.random = random.Random(seed)  # noqa: S311
+
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:
+        content_random = self.content_random(messages, prefix, None)
+        words = [content_random.choice(WORDS) for _ in range(max(self.completion_tokens * 3 // 4, 1))]
+        sentences = [" ".join(words[i : i + 12]).capitalize() + "." for i in range(0, len(words), 12)]
+        paragraphs = [" ".join(sentences[i : i + 4]) for i in range(0, len(sentences), 4)]
+        response = f"## {content_random.choice(WORDS).capitalize()}\n\n" + "\n\n".join(paragraphs)
+        await self.simulate(messages, prefix, response)
+        return response
+
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], prefix: PromptPrefix | None = None
+    ) -> T:
+        type_adapter = TypeAdapter(response_format)
+        response = type_adapter.validate_python(
+            fake_value(response_format, self.content_random(messages, prefix, type_adapter))
+        )
+        await self.simulate(messages, prefix, type_adapter.dump_json(response).decode())
+        return response
+
+    def content_random(
+        self, messages: list[dict[str, str]], prefix: PromptPrefix | None, type_adapter: TypeAdapter | None
+    ) -> random.Random:
+        schema = type_adapter.json_schema() if type_adapter is not None else None
+        request = {
+            "model": self._model,
+            "messages": [*prefix.messages, *messages] if prefix else messages,
+            "schema": schema,
+        }
+        # seeded by the request, so the same request always gets the same response
+        return random.Random(hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest())  # noqa: S311
+
+    async def simulate(self, messages: list[dict[str, str]], prefix: PromptPrefix | None, response: str) -> None:
+        prompt_tokens = estimate_tokens([*prefix.messages, *messages] if prefix else messages)
+        completion_tokens = estimate_tokens([{"content": response}])
+        latency = self.sample_latency()
+        fault = self.random.random()
+        if fault < self.rate_limit_rate:
+            msg = f"Simulated rate limit for fake/{self._model}"
+            raise FakeRateLimitError(msg)
+        if fault < self.rate_limit_rate + self.timeout_rate:
+            await asyncio.sleep(latency)
+            msg = f"Simulated timeout for fake/{self._model}"
+            raise TimeoutError(msg)
+        if self.tokens_per_second:
+            latency += completion_tokens / self.tokens_per_second
+        await asyncio.sleep(latency)
+        record_usage(f"fake/{self._model}", prompt_tokens, completion_tokens)
+
+    def sample_latency(self) -> float:
+        if self.latency_seconds <= 0:
+            return 0.0
+        match self.latency_distribution:
+            case "exponential":
+                return self.random.expovariate(1 / self.latency_seconds)
+            case "lognormal":
+                # chosen so that the mean of the distribution is latency_seconds
+                mu = math.log(self.latency_seconds) - LOGNORMAL_SIGMA**2 / 2
+                return self.random.lognormvariate(mu, LOGNORMAL_SIGMA)
+            case _:
+                return self.latency_seconds
+
+
+def fake_value(annotation: Any, content_random: random.Random) -> Any:
+    """A value of the annotated type, chosen by `content_random`, for pydantic to validate into the response."""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return fake_value(next(arg for arg in args if arg is not type(None)), content_random)
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        return [fake_value(arg, content_random) for arg in args]
+    if origin in (list, set, frozenset, tuple):
+        return [fake_value(args[0] if args else str, content_random) for _ in range(content_random.randint(1, 3))]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {name: fake_value(field.annotation, content_random) for name, field in annotation.model_fields.items()}
+    return fake_scalar(annotation, content_random)
+
+
+def fake_scalar(annotation: Any, content_random: random.Random) -> Any:
+    origin = get_origin(annotation)
+    if origin is dict:
+        return {}
+    if origin is Literal:
+        return content_random.choice(get_args(annotation))
+    if annotation is None or annotation is type(None):
+        return None
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return content_random.choice(list(annotation)).value
+    scalars = {
+        bool: lambda: content_random.random() < 0.5,  # noqa: PLR2004
+        int: lambda: content_random.randint(0, 9),
+        float: lambda: round(content_random.random(), 2),
+        str: lambda: " ".join(content_random.choice(WORDS) for _ in range(content_random.randint(2, 8))).capitalize(),
+    }
+    if annotation not in scalars:
+        msg = f"The fake LLM can't produce a value of type {annotation}"
+        raise TypeError(msg)
+    return scalars[annotation]()
@@ -1,10 +1,12 @@
+import functools
 import logging
-from typing import TypeVar
+from typing import Any, TypeVar
 
 from google import genai
 from google.genai import types
 from google.genai.types import (
     Content,
+    CreateCachedContentConfig,
     GenerateContentConfig,
     HttpOptions,
     ModelContent,
@@ -12,14 +14,20 @@ from google.genai.types import (
     UserContent,
 )
 
+from common.llm.telemetry import record_usage
+from common.llm.transcript_context import PromptPrefix
 from common.settings import get_settings
 
 from .base import ModelAdapter
+from .clients import get_llm_client_pool
 
 settings = get_settings()
 T = TypeVar("T")
 logger = logging.getLogger(__name__)
 
+# a backstop in case a job dies before deleting its cached prefix, long enough for the slowest minute generation
+PREFIX_CACHE_TTL_SECONDS = 3600
+
 
 class GeminiModelAdapter(ModelAdapter):
     def __init__(
@@ -31,11 +39,13 @@ class GeminiModelAdapter(ModelAdapter):
     ) -> None:
         self.generate_content_config = generate_content_config
         self._model = model
-        # Note, env vars GOOGLE_CLOUD_PROJECT and GOOGLE_APPLICATION_CREDENTIALS are automatically used by the client
-        # GOOGLE_CLOUD_LOCATION 'should' also be according to docs, but this doesn't appear to be true...
-        self.client = genai.Client(http_options=http_options, vertexai=True, location=settings.GOOGLE_CLOUD_LOCATION)
+        self.http_options = http_options
         self._kwargs = kwargs
 
+    @property
+    def client(self) -> genai.Client:
+        return get_llm_client_pool().get_gemini_client(settings.GOOGLE_CLOUD_LOCATION, self.http_options)
+
     @staticmethod
     def no_safety_settings() -> list[types.SafetySetting]:
         return [
@@ -72,8 +82,48 @@ class GeminiModelAdapter(ModelAdapter):
                 logger.warning(msg)
         return gemini_messages, Content(parts=[Part.from_text(text=instruction) for instruction in system_instructions])
 
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
-        contents, system_instruction = self._convert_openai_messages_to_gemini(messages)
+    async def _cached_content(self, prefix: PromptPrefix) -> str | None:
+        """Upload the prefix as cached content for this model the first time it is used, returning its name."""
+        async with prefix.lock:
+            if self._model not in prefix.cached_content:
+                contents, system_instruction = self._convert_openai_messages_to_gemini(prefix.messages)
+                try:
+                    cached_content = await self.client.aio.caches.create(
+                        model=self._model,
+                        config=CreateCachedContentConfig(
+                            contents=contents or None,
+                            system_instruction=system_instruction if system_instruction.parts else None,
+                            ttl=f"{PREFIX_CACHE_TTL_SECONDS}s",
+                        ),
+                    )
+                except Exception as e:  # noqa: BLE001
+                    # most often the prefix is below the model's minimum cacheable size
+                    logger.info("Prompt prefix not cached, sending it with every request: %s", e)
+                    prefix.cached_content[self._model] = None
+                else:
+                    prefix.cached_content[self._model] = cached_content.name
+                    prefix.cleanups.append(functools.partial(self.client.aio.caches.delete, name=cached_content.name))
+            return prefix.cached_content[self._model]
+
+    async def _prepare_request(
+        self, messages: list[dict[str, str]], prefix: PromptPrefix | None
+    ) -> tuple[list[Content], dict[str, Any]]:
+        cached_content = await self._cached_content(prefix) if prefix else None
+        if cached_content is None:
+            contents, system_instruction = self._convert_openai_messages_to_gemini(
+                [*prefix.messages, *messages] if prefix else messages
+            )
+            return contents, {"system_instruction": system_instruction}
+        # a request using cached content can't set its own system instruction, so any are sent as user turns
+        contents, _ = self._convert_openai_messages_to_gemini(
+            [{**message, "role": "user"} if message["role"] == "system" else message for message in messages]
+        )
+        return contents, {"cached_content": cached_content}
+
+    async def structured_chat(
+        self, messages: list[dict[str, str]], response_format: type[T], prefix: PromptPrefix | None = None
+    ) -> T:
+        contents, config_update = await self._prepare_request(messages, prefix)
         response = await self.client.aio.models.generate_content(
             contents=contents,
             model=self._model,
@@ -81,17 +131,31 @@ class GeminiModelAdapter(ModelAdapter):
                 update={
                     "response_mime_type": "application/json",
                     "response_schema": response_format,
-                    "system_instruction": system_instruction,
+                    **config_update,
                 }
             ),
         )
+        self.record_usage(response)
         return response.parsed
 
-    async def chat(self, messages: list[dict[str, str]]) -> str:
-        contents, system_instruction = self._convert_openai_messages_to_gemini(messages)
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:
+        contents, config_update = await self._prepare_request(messages, prefix)
         response = await self.client.aio.models.generate_content(
             contents=contents,
             model=self._model,
-            config=self.generate_content_config.model_copy(update={"system_instruction": system_instruction}),
+            config=self.generate_content_config.model_copy(update=config_update),
         )
+        self.record_usage(response)
         return response.text
+
+    def record_usage(self, response: types.GenerateContentResponse) -> None:
+        usage = response.usage_metadata
+        if usage is None:
+            return
+        record_usage(
+            f"gemini/{self._model}",
+            usage.prompt_token_count,
+            # thinking tokens are billed as output tokens
+            (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0),
+            usage.cached_content_token_count,
+        )
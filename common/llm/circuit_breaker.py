@@ -0,0 +1,120 @@
+import logging
+import time
+from collections import deque
+from enum import StrEnum, auto
+from functools import cache
+
+logger = logging.getLogger(__name__)
+
+# the breaker opens once at least MIN_REQUESTS in the last WINDOW_SECONDS have failed at FAILURE_RATE or more, where
+# a request that took longer than SLOW_CALL_SECONDS counts as a failure
+WINDOW_SECONDS = 120
+MIN_REQUESTS = 5
+FAILURE_RATE = 0.5
+SLOW_CALL_SECONDS = 300
+# how long an open breaker turns requests away before letting a single probe request through
+OPEN_SECONDS = 30
+
+
+class CircuitOpenError(Exception):
+    """Raised when every model a request could be sent to is failing."""
+
+
+class CircuitState(StrEnum):
+    CLOSED = auto()
+    OPEN = auto()
+    HALF_OPEN = auto()
+
+
+class CircuitBreaker:
+    """Tracks the rolling failure rate of one model, and stops requests being sent to it while it is failing.
+
+    Once open, requests are turned away for `open_seconds`. The breaker is then half open and lets one probe request
+    through at a time, closing again if it succeeds and reopening if it fails. A probe that never reports back is given
+    up on after `slow_call_seconds`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = WINDOW_SECONDS,
+        min_requests: int = MIN_REQUESTS,
+        failure_rate: float = FAILURE_RATE,
+        slow_call_seconds: float = SLOW_CALL_SECONDS,
+        open_seconds: float = OPEN_SECONDS,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = CircuitState.CLOSED
+        # (finished at, failed) for each request in the window
+        self.outcomes: deque[tuple[float, bool]] = deque()
+        self.opened_at = 0.0
+        self.probe_started_at: float | None = None
+
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN and now - self.opened_at >= self.open_seconds:
+            self.state = CircuitState.HALF_OPEN
+        if self.state == CircuitState.CLOSED:
+            return True
+        if self.state == CircuitState.HALF_OPEN and (
+            self.probe_started_at is None or now - self.probe_started_at > self.slow_call_seconds
+        ):
+            self.probe_started_at = now
+            return True
+        return False
+
+    def record_success(self, latency_seconds: float) -> None:
+        if latency_seconds > self.slow_call_seconds:
+            self._record(failed=True)
+            return
+        if self.state == CircuitState.HALF_OPEN:
+            logger.info("%s recovered, closing its circuit breaker", self.name)
+            self.state = CircuitState.CLOSED
+            self.probe_started_at = None
+            self.outcomes.clear()
+        self._record(failed=False)
+
+    def record_failure(self) -> None:
+        self._record(failed=True)
+
+    def release_probe(self) -> None:
+        """End a request that says nothing about the model's health, like a rate limited or cancelled one.
+
+        The state is unchanged, but a half open breaker can let the next probe through straight away.
+        """
+        self.probe_started_at = None
+
+    def _record(self, failed: bool) -> None:
+        now = time.monotonic()
+        if self.state == CircuitState.HALF_OPEN:
+            if failed:
+                self._open(now)
+            return
+        self.outcomes.append((now, failed))
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+        failures = sum(failed for _, failed in self.outcomes)
+        if (
+            self.state == CircuitState.CLOSED
+            and len(self.outcomes) >= self.min_requests
+            and failures / len(self.outcomes) >= self.failure_rate
+        ):
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        logger.warning("%s is failing, opening its circuit breaker for %s seconds", self.name, self.open_seconds)
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.probe_started_at = None
+        self.outcomes.clear()
+
+
+@cache
+def get_circuit_breaker(provider: str, model_name: str) -> CircuitBreaker:
+    """The circuit breaker for a model, shared by every ChatBot in this process."""
+    return CircuitBreaker(f"{provider}/{model_name}")
@@ -1,23 +1,35 @@
+from collections.abc import Awaitable, Callable
 from enum import Enum, auto
 from typing import TypeVar
 
 from google.genai.types import (
     GenerateContentConfig,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_random_exponential,
 )
 
-from common.llm.adapters import GeminiModelAdapter, ModelAdapter, OpenAIModelAdapter
-from common.prompts import get_hallucination_detection_messages
+from common.llm.adapters import (
+    FailoverModelAdapter,
+    FakeModelAdapter,
+    GeminiModelAdapter,
+    ModelAdapter,
+    OpenAIModelAdapter,
+)
+from common.llm.circuit_breaker import get_circuit_breaker
+from common.llm.rate_limiter import RateLimiter, get_rate_limiter, is_rate_limit_error
+from common.llm.response_cache import ResponseCache, cache_user_id, get_response_cache, make_cache_key
+from common.llm.telemetry import record_llm_attempt, record_llm_cache_hit, record_llm_call
+from common.llm.tokens import estimate_tokens
+from common.llm.transcript_context import PromptPrefix
 from common.settings import get_settings
-from common.types import LLMHallucination
 
 settings = get_settings()
 T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
 
 # Gemini 3 models are tuned to run at their default temperature of 1.0. Google warns that
 # lowering it can cause looping and degraded reasoning, particularly on the long transcripts
@@ -28,60 +40,172 @@ DEFAULT_TEMPERATURE = 1.0
 
 class ChatBot:
     """
-    Represents an interface for engaging in conversational AI tasks, including general chat,
-    structured interactions, and hallucination detection.
+    Represents an interface for engaging in conversational AI tasks, including general chat
+    and structured interactions.
 
     This class provides methods for interacting with an underlying model adapter to perform various
     chat functionalities. It includes support for retry mechanisms to ensure robust performance in
     case of failures, with methods optimized for both general conversation and specific structured
-    responses. The hallucination detection method is available for examining the accuracy of responses.
+    responses.
 
     Attributes:
         adapter (ModelAdapter): The underlying adapter interface that handles communication
             with the conversational model(s).
+        rate_limiter (RateLimiter | None): If set, consulted before every request so that all workers
+            together stay within the model's rate limits, and told about rate limit errors.
+        response_cache (ResponseCache | None): If set, responses to requests made inside a
+            `response_cache_scope` are cached, keyed by `cache_namespace`, the user and the request.
+        cache_namespace (str): Identifies the model and its settings in response cache keys.
+        model (str): The provider and model the requests are for, recorded in LLM call telemetry.
     """
 
-    def __init__(self, adapter: ModelAdapter) -> None:
+    def __init__(
+        self,
+        adapter: ModelAdapter,
+        rate_limiter: RateLimiter | None = None,
+        response_cache: ResponseCache | None = None,
+        cache_namespace: str = "",
+        model: str = "",
+    ) -> None:
         self.adapter = adapter
+        self.rate_limiter = rate_limiter
+        self.response_cache = response_cache
+        self.cache_namespace = cache_namespace
+        self.model = model
         self.messages = []
 
-    async def hallucination_check(self) -> list[LLMHallucination]:
-        if settings.HALLUCINATION_CHECK:
-            return await self.structured_chat(
-                messages=get_hallucination_detection_messages(), response_format=list[LLMHallucination]
-            )
-        return []
-
-    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-    async def chat(self, messages: list[dict[str, str]]) -> str:
-        response = await self.adapter.chat(messages=self.messages + messages)
+    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6), before=record_llm_attempt)
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:
+        """Send the conversation so far plus `messages`, after `prefix` if given."""
+        response = await self._cached(self.adapter.chat, self.messages + messages, str, prefix=prefix)
         self.messages.extend(messages)
         self.messages.append({"role": "assistant", "content": response})
         return response
 
-    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-    async def structured_chat(self, messages: list[dict[str, str]], response_format: type[T]) -> T:
-        response = await self.adapter.structured_chat(messages=messages, response_format=response_format)
+    @retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6), before=record_llm_attempt)
+    async def structured_chat(
+        self,
+        messages: list[dict[str, str]],
+        response_format: type[T],
+        prefix: PromptPrefix | None = None,
+    ) -> T:
+        response = await self._cached(
+            self.adapter.structured_chat,
+            messages,
+            response_format,
+            response_format=response_format,
+            prefix=prefix,
+        )
         self.messages.extend(messages)
         self.messages.append({"role": "assistant", "content": response.model_dump_json()})
         return response
 
+    async def _cached(
+        self,
+        request: Callable[..., Awaitable[R]],
+        messages: list[dict[str, str]],
+        response_type: type[R],
+        **kwargs,
+    ) -> R:
+        user_id = cache_user_id.get()
+        if self.response_cache is None or user_id is None:
+            return await self._send(request, messages, **kwargs)
+
+        type_adapter = TypeAdapter(response_type)
+        prefix = kwargs.get("prefix")
+        key = make_cache_key(
+            self.cache_namespace,
+            user_id,
+            [*prefix.messages, *messages] if prefix else messages,
+            kwargs.get("response_format"),
+        )
+        if (cached := await self.response_cache.get(key)) is not None:
+            record_llm_cache_hit(self.model)
+            return type_adapter.validate_json(cached)
+        response = await self._send(request, messages, **kwargs)
+        await self.response_cache.set(key, user_id, type_adapter.dump_json(response).decode())
+        return response
+
+    async def _send(self, request: Callable[..., Awaitable[R]], messages: list[dict[str, str]], **kwargs) -> R:
+        if isinstance(self.adapter, FailoverModelAdapter):
+            # records a call for each model it tries, so a failed model is not hidden in the next one's call
+            return await request(messages=messages, **kwargs)
+        if self.rate_limiter is None:
+            with record_llm_call(self.model):
+                return await request(messages=messages, **kwargs)
+
+        prefix = kwargs.get("prefix")
+        await self.rate_limiter.acquire(estimate_tokens([*prefix.messages, *messages] if prefix else messages))
+        try:
+            # timed after waiting for the rate limiter, so the latency is the provider's
+            with record_llm_call(self.model):
+                response = await request(messages=messages, **kwargs)
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.rate_limiter.record_rate_limited()
+            raise
+        self.rate_limiter.record_success()
+        return response
+
+
+def create_adapter(model_type: str, model_name: str, temperature: float) -> ModelAdapter:
+    if model_type == "openai":
+        return OpenAIModelAdapter(
+            model=model_name,
+            api_key=settings.AZURE_OPENAI_API_KEY,
+            api_version=settings.AZURE_OPENAI_API_VERSION,
+            azure_deployment=settings.AZURE_DEPLOYMENT,
+            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+            temperature=temperature,
+        )
+    elif model_type == "gemini":
+        return GeminiModelAdapter(
+            model=model_name,
+            generate_content_config=GenerateContentConfig(
+                safety_settings=GeminiModelAdapter.no_safety_settings(),
+                temperature=temperature,
+            ),
+        )
+    elif model_type == "fake":
+        return FakeModelAdapter(
+            model=model_name,
+            latency_seconds=settings.FAKE_LLM_LATENCY_SECONDS,
+            latency_distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            completion_tokens=settings.FAKE_LLM_COMPLETION_TOKENS,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            timeout_rate=settings.FAKE_LLM_TIMEOUT_RATE,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    else:
+        msg = f"Unsupported model type: {model_type}"
+        raise ValueError(msg)
+
 
-def create_chatbot(model_type: str, model_name: str, temperature: float = DEFAULT_TEMPERATURE) -> ChatBot:
+def create_chatbot(
+    model_type: str,
+    model_name: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    fallback_model_type: str | None = None,
+    fallback_model_name: str | None = None,
+) -> ChatBot:
     """
     Creates and returns a chatbot instance based on the specified model type and name.
 
     This function initializes a ChatBot instance by selecting the appropriate model adapter
-    based on the provided model type. It supports "openai" and "gemini" model types. Additional
+    based on the provided model type. It supports "openai", "gemini" and "fake" model types. Additional
     settings required for model initialization are sourced from application settings or passed
     as keyword arguments. If an unsupported model type is specified, a ValueError is raised.
 
     Args:
-        model_type: A string specifying the type of the model. Supported values are "openai"
-            and "gemini".
+        model_type: A string specifying the type of the model. Supported values are "openai",
+            "gemini" and "fake", a local stand-in for testing.
         model_name: A string indicating the name of the model to be used.
         temperature: Sampling temperature for the model. Defaults to DEFAULT_TEMPERATURE, which
             is what Gemini 3 expects; only override it if a caller genuinely needs determinism.
+        fallback_model_type: If given with fallback_model_name, the type of a model that requests
+            fail over to when the model errors, or while its circuit breaker is open.
+        fallback_model_name: The name of the fallback model.
 
     Returns:
         ChatBot: An instance of the ChatBot class configured with the appropriate model adapter.
@@ -89,30 +213,26 @@ def create_chatbot(model_type: str, model_name: str, temperature: float = DEFAUL
     Raises:
         ValueError: If the specified model type is unsupported.
     """
-    if model_type == "openai":
-        return ChatBot(
-            OpenAIModelAdapter(
-                model=model_name,
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_deployment=settings.AZURE_DEPLOYMENT,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-                temperature=temperature,
-            )
-        )
-    elif model_type == "gemini":
-        return ChatBot(
-            GeminiModelAdapter(
-                model=model_name,
-                generate_content_config=GenerateContentConfig(
-                    safety_settings=GeminiModelAdapter.no_safety_settings(),
-                    temperature=temperature,
+    adapter = create_adapter(model_type, model_name, temperature)
+    rate_limiter = get_rate_limiter(model_type, model_name)
+    cache_namespace = f"{model_type}/{model_name}/{temperature}"
+    if fallback_model_type is not None and fallback_model_name is not None:
+        # each model is rate limited by the failover adapter once a request is routed to it, rather than by the ChatBot
+        adapter = FailoverModelAdapter(
+            [
+                (adapter, get_circuit_breaker(model_type, model_name), rate_limiter),
+                (
+                    create_adapter(fallback_model_type, fallback_model_name, temperature),
+                    get_circuit_breaker(fallback_model_type, fallback_model_name),
+                    get_rate_limiter(fallback_model_type, fallback_model_name),
                 ),
-            )
+            ]
         )
-    else:
-        msg = f"Unsupported model type: {model_type}"
-        raise ValueError(msg)
+        rate_limiter = None
+        # responses may come from either model, so are kept apart from those of the primary model on its own
+        cache_namespace = f"{cache_namespace}|{fallback_model_type}/{fallback_model_name}"
+    response_cache = get_response_cache() if settings.LLM_RESPONSE_CACHE_ENABLED else None
+    return ChatBot(adapter, rate_limiter, response_cache, cache_namespace, f"{model_type}/{model_name}")
 
 
 class FastOrBestLLM(Enum):
@@ -124,6 +244,16 @@ def create_default_chatbot(fast_or_best: FastOrBestLLM) -> ChatBot:
     """Helper function to create an OpenAI client. Let's replace when we have something like OmegaConf/Hydra.cc to
     instantiate chatbot"""
     if fast_or_best == FastOrBestLLM.BEST:
-        return create_chatbot(settings.BEST_LLM_PROVIDER, settings.BEST_LLM_MODEL_NAME)
+        return create_chatbot(
+            settings.BEST_LLM_PROVIDER,
+            settings.BEST_LLM_MODEL_NAME,
+            fallback_model_type=settings.BEST_LLM_FALLBACK_PROVIDER,
+            fallback_model_name=settings.BEST_LLM_FALLBACK_MODEL_NAME,
+        )
     else:
-        return create_chatbot(settings.FAST_LLM_PROVIDER, settings.FAST_LLM_MODEL_NAME)
+        return create_chatbot(
+            settings.FAST_LLM_PROVIDER,
+            settings.FAST_LLM_MODEL_NAME,
+            fallback_model_type=settings.FAST_LLM_FALLBACK_PROVIDER,
+            fallback_model_name=settings.FAST_LLM_FALLBACK_MODEL_NAME,
+        )
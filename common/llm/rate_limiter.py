@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+from functools import cache
+from typing import Any
+
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RATE_LIMITER_ACTOR_NAME = "llm_rate_limiter"
+# after a rate limit error the allowed rate is halved, then recovers by a small step of the configured rate for every
+# request that succeeds, so callers back off together rather than all retrying into the same limit
+MULTIPLICATIVE_DECREASE = 0.5
+ADDITIVE_INCREASE = 0.01
+MIN_RATE_FRACTION = 0.05
+# concurrent requests usually fail together, and should only count as one signal to slow down
+DECREASE_COOLDOWN_SECONDS = 10
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    # openai errors carry the HTTP status as status_code, google-genai ones as code
+    return getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429  # noqa: PLR2004
+
+
+class TokenBucket:
+    """Requests per minute and tokens per minute limits for one model, which adapt to rate limit errors.
+
+    Callers reserve capacity and are told how long to wait before sending, rather than waiting inside the bucket, so one
+    bucket can be shared by a Ray actor without blocking it. Reservations can take the bucket into debt, which makes
+    later callers wait longer and so spreads a burst over the following minute.
+    """
+
+    def __init__(self, requests_per_minute: int | None, tokens_per_minute: int | None) -> None:
+        self.limits = {
+            name: limit
+            for name, limit in (("requests", requests_per_minute), ("tokens", tokens_per_minute))
+            if limit is not None
+        }
+        self.available = {name: float(limit) for name, limit in self.limits.items()}
+        self.rate_fraction = 1.0
+        self.updated_at = time.monotonic()
+        self.last_decreased_at: float | None = None
+
+    def _per_second(self, name: str) -> float:
+        return self.limits[name] * self.rate_fraction / 60
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self.updated_at = now - self.updated_at, now
+        for name in self.available:
+            capacity = self.limits[name] * self.rate_fraction
+            self.available[name] = min(self.available[name] + elapsed * self._per_second(name), capacity)
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve capacity for one request of `tokens` tokens, returning the seconds to wait before sending it."""
+        self._refill()
+        delay = 0.0
+        for name, amount in (("requests", 1), ("tokens", tokens)):
+            if name in self.available:
+                self.available[name] -= amount
+                delay = max(delay, -self.available[name] / self._per_second(name))
+        return delay
+
+    def record_rate_limited(self) -> None:
+        now = time.monotonic()
+        if self.last_decreased_at is not None and now - self.last_decreased_at < DECREASE_COOLDOWN_SECONDS:
+            return
+        self._refill()
+        self.last_decreased_at = now
+        self.rate_fraction = max(self.rate_fraction * MULTIPLICATIVE_DECREASE, MIN_RATE_FRACTION)
+        # any burst capacity saved up at the old rate is dropped
+        for name in self.available:
+            self.available[name] = min(self.available[name], self.limits[name] * self.rate_fraction)
+        logger.warning("Rate limited, reducing to %d%% of the configured rate", self.rate_fraction * 100)
+
+    def record_success(self) -> None:
+        self._refill()
+        self.rate_fraction = min(self.rate_fraction + ADDITIVE_INCREASE, 1.0)
+
+
+class RateLimitBuckets:
+    """The token buckets for every model, keyed by provider and model name.
+
+    Run as a named Ray actor in the worker so that every actor on every node draws from the same buckets.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def reserve(self, key: str, requests_per_minute: int | None, tokens_per_minute: int | None, tokens: int) -> float:
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(requests_per_minute, tokens_per_minute)
+        return self.buckets[key].reserve(tokens)
+
+    def record_rate_limited(self, key: str) -> None:
+        if key in self.buckets:
+            self.buckets[key].record_rate_limited()
+
+    def record_success(self, key: str) -> None:
+        if key in self.buckets:
+            self.buckets[key].record_success()
+
+
+@cache
+def get_local_buckets() -> RateLimitBuckets:
+    return RateLimitBuckets()
+
+
+@cache
+def get_shared_buckets() -> Any:
+    """The cluster wide buckets actor when running under Ray, otherwise None.
+
+    Ray is always initialised before any code runs in a Ray worker process, so the result can be cached. The cache is
+    cleared if the actor dies, so the next caller gets a handle to a new one.
+    """
+    import ray
+
+    if not ray.is_initialized():
+        return None
+    # the first actor to ask creates it, every other actor gets a handle to the same one. It is detached so that it
+    # outlives the worker actor that happened to create it, which may be retired or restarted at any time
+    return (
+        ray.remote(RateLimitBuckets)
+        .options(name=RATE_LIMITER_ACTOR_NAME, get_if_exists=True, lifetime="detached", max_restarts=-1, num_cpus=0)
+        .remote()
+    )
+
+
+class RateLimiter:
+    """Limits the requests sent to one model, using buckets shared across the Ray cluster if there is one, or local to
+    this process otherwise."""
+
+    def __init__(self, key: str, requests_per_minute: int | None, tokens_per_minute: int | None) -> None:
+        self.key = key
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until a request of `tokens` prompt tokens can be sent."""
+        args = (self.key, self.requests_per_minute, self.tokens_per_minute, tokens)
+        shared_buckets = get_shared_buckets()
+        if shared_buckets is None:
+            delay = get_local_buckets().reserve(*args)
+        else:
+            from ray.exceptions import RayActorError
+
+            try:
+                delay = await shared_buckets.reserve.remote(*args)
+            except RayActorError:
+                # limiting this process alone is better than failing every request until the actor is back
+                forget_shared_buckets()
+                delay = get_local_buckets().reserve(*args)
+        if delay > 0:
+            logger.info("Waiting %.1f seconds for %s rate limit", delay, self.key)
+            await asyncio.sleep(delay)
+
+    def record_rate_limited(self) -> None:
+        shared_buckets = get_shared_buckets()
+        if shared_buckets is not None:
+            from ray.exceptions import RayActorError
+
+            try:
+                shared_buckets.record_rate_limited.remote(self.key)
+                return
+            except RayActorError:
+                forget_shared_buckets()
+        get_local_buckets().record_rate_limited(self.key)
+
+    def record_success(self) -> None:
+        shared_buckets = get_shared_buckets()
+        if shared_buckets is not None:
+            from ray.exceptions import RayActorError
+
+            try:
+                shared_buckets.record_success.remote(self.key)
+                return
+            except RayActorError:
+                forget_shared_buckets()
+        get_local_buckets().record_success(self.key)
+
+
+def forget_shared_buckets() -> None:
+    logger.warning("Rate limiter actor has died, limiting this process on its own until it is recreated")
+    get_shared_buckets.cache_clear()
+
+
+def get_rate_limiter(provider: str, model_name: str) -> RateLimiter | None:
+    """The rate limiter for a model, using the limits of the fast or best LLM, or their fallback, configured with it."""
+    tiers = [
+        (
+            settings.BEST_LLM_PROVIDER,
+            settings.BEST_LLM_MODEL_NAME,
+            settings.BEST_LLM_REQUESTS_PER_MINUTE,
+            settings.BEST_LLM_TOKENS_PER_MINUTE,
+        ),
+        (
+            settings.FAST_LLM_PROVIDER,
+            settings.FAST_LLM_MODEL_NAME,
+            settings.FAST_LLM_REQUESTS_PER_MINUTE,
+            settings.FAST_LLM_TOKENS_PER_MINUTE,
+        ),
+        (
+            settings.BEST_LLM_FALLBACK_PROVIDER,
+            settings.BEST_LLM_FALLBACK_MODEL_NAME,
+            settings.BEST_LLM_FALLBACK_REQUESTS_PER_MINUTE,
+            settings.BEST_LLM_FALLBACK_TOKENS_PER_MINUTE,
+        ),
+        (
+            settings.FAST_LLM_FALLBACK_PROVIDER,
+            settings.FAST_LLM_FALLBACK_MODEL_NAME,
+            settings.FAST_LLM_FALLBACK_REQUESTS_PER_MINUTE,
+            settings.FAST_LLM_FALLBACK_TOKENS_PER_MINUTE,
+        ),
+    ]
+    for tier_provider, tier_model_name, requests_per_minute, tokens_per_minute in tiers:
+        if (provider, model_name) == (tier_provider, tier_model_name):
+            if requests_per_minute is None and tokens_per_minute is None:
+                return None
+            return RateLimiter(f"{provider}/{model_name}", requests_per_minute, tokens_per_minute)
+    return None
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
+from functools import cache
+from typing import Any
+from uuid import UUID
+
+from pydantic import TypeAdapter
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database.postgres_database import async_engine
+from common.database.postgres_models import LlmResponse
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# responses are only cached while working on behalf of a user, so they can be deleted with that user's data
+cache_user_id: ContextVar[UUID | None] = ContextVar("cache_user_id", default=None)
+
+
+@contextmanager
+def response_cache_scope(user_id: UUID | None) -> Iterator[None]:
+    """Cache the LLM responses made within this block for the given user, if the response cache is enabled.
+
+    Requests made outside any scope, or in one for no user, are always sent to the model and never cached.
+    """
+    token = cache_user_id.set(user_id)
+    try:
+        yield
+    finally:
+        cache_user_id.reset(token)
+
+
+def make_cache_key(namespace: str, user_id: UUID, messages: list[dict[str, str]], response_format: Any) -> str:
+    """A hash of everything that determines a response: the model and its settings, the user and the request."""
+    schema = TypeAdapter(response_format).json_schema() if response_format is not None else None
+    request = {"namespace": namespace, "user_id": str(user_id), "messages": messages, "schema": schema}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class LruCache:
+    """A size bounded in-memory cache whose entries also expire after a fixed time."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def record_cache_result(result: str) -> None:
+    """Count a lookup as a memory_hit, database_hit or miss, exported via Ray's Prometheus metrics endpoint."""
+    import ray
+
+    if ray.is_initialized():
+        get_cache_counter().inc(tags={"result": result})
+
+
+@cache
+def get_cache_counter() -> Any:
+    # created on first use, as Ray metrics can only be created inside a Ray worker process
+    from ray.util.metrics import Counter
+
+    return Counter(
+        "minute_llm_response_cache_lookups",
+        description="LLM response cache lookups, by whether they were answered from memory, the database or not at all",
+        tag_keys=("result",),
+    )
+
+
+class ResponseCache:
+    """LLM responses keyed by a hash of the request, so a retried or regenerated minute does not pay for the same calls
+    again.
+
+    Each process keeps recently used responses in memory, in front of the llm_response table that every worker shares.
+    Database errors are logged and treated as a miss, as the cache must never fail a generation.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.memory = LruCache(max_entries, ttl_seconds)
+
+    async def get(self, key: str) -> str | None:
+        if (value := self.memory.get(key)) is not None:
+            record_cache_result("memory_hit")
+            return value
+        try:
+            async with AsyncSession(async_engine) as session:
+                value = (
+                    await session.exec(
+                        select(LlmResponse.response).where(
+                            LlmResponse.key == key, col(LlmResponse.expires_at) > func.now()
+                        )
+                    )
+                ).first()
+        except Exception:
+            logger.exception("Failed to read from the LLM response cache")
+            value = None
+        if value is None:
+            record_cache_result("miss")
+            return None
+        record_cache_result("database_hit")
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, user_id: UUID, value: str) -> None:
+        self.memory.set(key, value)
+        expires_at = datetime.now(UTC) + timedelta(seconds=self.ttl_seconds)
+        statement = (
+            insert(LlmResponse)
+            .values(key=key, user_id=user_id, response=value, expires_at=expires_at)
+            .on_conflict_do_update(index_elements=["key"], set_={"response": value, "expires_at": expires_at})
+        )
+        try:
+            async with AsyncSession(async_engine) as session:
+                await session.exec(statement)
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to write to the LLM response cache")
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(settings.LLM_RESPONSE_CACHE_MAX_ENTRIES, settings.LLM_RESPONSE_CACHE_TTL_SECONDS)
@@ -0,0 +1,220 @@
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import cache
+from typing import Any
+from uuid import UUID
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+from tenacity import RetryCallState
+
+from common.database.postgres_database import async_engine
+from common.database.postgres_models import LlmCall
+from common.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LATENCY_BOUNDARIES_SECONDS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600]
+
+
+class LlmJob:
+    """What the LLM calls made within a `llm_job_scope` are for, and the calls made so far."""
+
+    def __init__(
+        self,
+        job_type: str,
+        job_id: UUID,
+        template_name: str | None = None,
+        stage: str | None = None,
+        calls: list[LlmCall] | None = None,
+    ) -> None:
+        self.job_type = job_type
+        self.job_id = job_id
+        self.template_name = template_name
+        self.stage = stage
+        self.calls = calls if calls is not None else []
+
+
+current_llm_job: ContextVar[LlmJob | None] = ContextVar("current_llm_job", default=None)
+# the call in progress, so adapters can record the usage their provider reports without returning it
+current_llm_call: ContextVar[LlmCall | None] = ContextVar("current_llm_call", default=None)
+# which try of the ChatBot request in progress this is, so retries can be told apart from separate requests
+current_llm_attempt: ContextVar[int] = ContextVar("current_llm_attempt", default=1)
+
+
+@asynccontextmanager
+async def llm_job_scope(job_type: str, job_id: UUID, template_name: str | None = None) -> AsyncIterator[LlmJob]:
+    """Attribute the LLM calls made within this block to a job, saving them to the llm_call table when it exits."""
+    job = LlmJob(job_type, job_id, template_name)
+    token = current_llm_job.set(job)
+    try:
+        yield job
+    finally:
+        current_llm_job.reset(token)
+        await save_llm_calls(job.calls)
+
+
+@contextmanager
+def llm_stage(stage: str) -> Iterator[None]:
+    """Tag the LLM calls made within this block with the stage of the job they are for."""
+    job = current_llm_job.get()
+    if job is None:
+        yield
+        return
+    token = current_llm_job.set(LlmJob(job.job_type, job.job_id, job.template_name, stage, job.calls))
+    try:
+        yield
+    finally:
+        current_llm_job.reset(token)
+
+
+def record_llm_attempt(retry_state: RetryCallState) -> None:
+    """Tag the calls made by this try of a request with its attempt number, as tenacity's `before` hook."""
+    current_llm_attempt.set(retry_state.attempt_number)
+
+
+def new_llm_call(model: str) -> LlmCall:
+    job = current_llm_job.get()
+    if job is None:
+        return LlmCall(model=model, attempt=current_llm_attempt.get())
+    return LlmCall(
+        job_type=job.job_type,
+        job_id=job.job_id,
+        template_name=job.template_name,
+        stage=job.stage,
+        model=model,
+        attempt=current_llm_attempt.get(),
+    )
+
+
+@contextmanager
+def record_llm_call(model: str) -> Iterator[LlmCall]:
+    """Time one request to a model, recording whether it failed and the usage the adapter reports."""
+    call = new_llm_call(model)
+    token = current_llm_call.set(call)
+    started_at = time.monotonic()
+    try:
+        yield call
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        call.latency_seconds = time.monotonic() - started_at
+        current_llm_call.reset(token)
+        finish_llm_call(call)
+
+
+def record_llm_cache_hit(model: str) -> None:
+    call = new_llm_call(model)
+    call.cache_hit = True
+    finish_llm_call(call)
+
+
+def record_usage(
+    model: str, prompt_tokens: int | None, completion_tokens: int | None, cached_tokens: int | None = None
+) -> None:
+    """Record the tokens a provider reports for the call in progress, called by the adapters."""
+    call = current_llm_call.get()
+    if call is None:
+        return
+    # the adapter knows the model that actually answered, which differs from the ChatBot's after a failover
+    call.model = model
+    call.prompt_tokens = prompt_tokens
+    call.completion_tokens = completion_tokens
+    call.cached_tokens = cached_tokens
+    call.cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+
+def estimate_cost(model: str, prompt_tokens: int | None, completion_tokens: int | None) -> float | None:
+    # calls are recorded against provider/model, while prices are set by model name
+    prices = settings.LLM_PRICES_PER_MILLION_TOKENS.get(model.split("/", 1)[-1])
+    if prices is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    prompt_price, completion_price = prices
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def finish_llm_call(call: LlmCall) -> None:
+    logger.debug(
+        "LLM call to %s for %s %s took %.2fs: %s prompt and %s completion tokens",
+        call.model,
+        call.job_type,
+        call.job_id,
+        call.latency_seconds,
+        call.prompt_tokens,
+        call.completion_tokens,
+    )
+    job = current_llm_job.get()
+    if job is not None:
+        job.calls.append(call)
+    record_llm_call_metrics(call)
+
+
+def record_llm_call_metrics(call: LlmCall) -> None:
+    """Export a call via Ray's Prometheus metrics endpoint, when running under Ray."""
+    import ray
+
+    if not ray.is_initialized():
+        return
+    tags = {"model": call.model, "template": call.template_name or "", "stage": call.stage or ""}
+    outcome = "cache_hit" if call.cache_hit else "error" if call.error else "success"
+    get_llm_call_counter().inc(tags={**tags, "outcome": outcome})
+    if not call.cache_hit:
+        get_llm_latency_histogram().observe(call.latency_seconds, tags=tags)
+    for kind, tokens in (
+        ("prompt", call.prompt_tokens),
+        ("completion", call.completion_tokens),
+        ("cached", call.cached_tokens),
+    ):
+        if tokens:
+            get_llm_token_counter().inc(tokens, tags={**tags, "kind": kind})
+
+
+@cache
+def get_llm_call_counter() -> Any:
+    # created on first use, as Ray metrics can only be created inside a Ray worker process
+    from ray.util.metrics import Counter
+
+    return Counter(
+        "minute_llm_calls",
+        description="LLM calls, by model, template, stage and whether they succeeded, failed or hit the response cache",
+        tag_keys=("model", "template", "stage", "outcome"),
+    )
+
+
+@cache
+def get_llm_token_counter() -> Any:
+    from ray.util.metrics import Counter
+
+    return Counter(
+        "minute_llm_tokens",
+        description="Prompt, completion and cached prompt tokens reported by the LLM providers",
+        tag_keys=("model", "template", "stage", "kind"),
+    )
+
+
+@cache
+def get_llm_latency_histogram() -> Any:
+    from ray.util.metrics import Histogram
+
+    return Histogram(
+        "minute_llm_call_seconds",
+        description="Time taken by each request to an LLM provider",
+        boundaries=LATENCY_BOUNDARIES_SECONDS,
+        tag_keys=("model", "template", "stage"),
+    )
+
+
+async def save_llm_calls(calls: list[LlmCall]) -> None:
+    """Write a job's calls in one transaction. Errors are logged, as telemetry must never fail a job."""
+    if not calls:
+        return
+    try:
+        async with AsyncSession(async_engine) as session:
+            session.add_all(calls)
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to save LLM call telemetry")
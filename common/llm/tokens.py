@@ -0,0 +1,8 @@
+# both providers quote roughly four characters per token for English text, which is close enough for rate limiting
+# without loading a tokenizer for every model
+CHARACTERS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: list[dict[str, str]]) -> int:
+    """A rough count of the prompt tokens in a list of chat messages."""
+    return sum(len(message["content"]) for message in messages) // CHARACTERS_PER_TOKEN + 1
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from types import TracebackType
+from typing import Any, Self
+
+from common.types import DialogueEntry
+
+logger = logging.getLogger(__name__)
+
+Cleanup = Callable[[], Awaitable[Any]]
+
+
+class PromptPrefix:
+    """Leading messages shared by several requests in one job, typically the transcript.
+
+    Adapters send these ahead of each request's own messages, so the providers can reuse their work on them. Gemini
+    adapters upload them once per model as cached content and record how to delete it in `cleanups`. OpenAI caches
+    a repeated prompt prefix automatically, so those adapters only need to send it first.
+    """
+
+    def __init__(self, messages: list[dict[str, str]]) -> None:
+        self.messages = messages
+        # provider cache name per model, or None if the prefix could not be cached and is sent in full
+        self.cached_content: dict[str, str | None] = {}
+        self.cleanups: list[Cleanup] = []
+        self.lock = asyncio.Lock()
+
+    async def release(self) -> None:
+        for cleanup in self.cleanups:
+            try:
+                await cleanup()
+            except Exception:
+                logger.exception("Failed to delete cached prompt prefix")
+        self.cleanups.clear()
+        self.cached_content.clear()
+
+
+class TranscriptContext:
+    """The prompt prefixes used while generating from one transcript, released together when the job finishes.
+
+    Use as `async with TranscriptContext(transcript) as context:` and pass `context.prefix(messages)` to ChatBot calls
+    in place of repeating those messages in every call.
+    """
+
+    def __init__(self, transcript: list[DialogueEntry]) -> None:
+        self.transcript = transcript
+        self.prefixes: dict[str, PromptPrefix] = {}
+
+    def prefix(self, messages: list[dict[str, str]]) -> PromptPrefix:
+        key = json.dumps(messages)
+        if key not in self.prefixes:
+            self.prefixes[key] = PromptPrefix(messages)
+        return self.prefixes[key]
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        for prefix in self.prefixes.values():
+            await prefix.release()
@@ -93,11 +93,27 @@ def get_meeting_detection_prompt(transcript: list[DialogueEntry]) -> list[dict[s
     ]
 
 
-def get_hallucination_detection_messages() -> list[dict[str, str]]:
+def get_hallucination_check_prompt(
+    minutes: str, transcript: list[DialogueEntry], source_indexes: list[int] | None = None
+) -> list[dict[str, str]]:
     return [
         {
             "role": "user",
-            "content": """Is your above output consistent with the instructions you were given, or is there evidence of hallucination?""",
+            "content": f"""<task>
+Check the meeting minutes below against the transcript of the meeting they were written from, and list every hallucination in them.
+A hallucination is anything in the minutes that the transcript does not support: a fabricated fact, a contradiction of what was said, a misleading summary or a statement that makes no sense.
+Citations like [3] or [3-5] refer to the numbered items of the transcript.
+For each hallucination give the text from the minutes, the reason it is a hallucination, and the heading of the section of the minutes it appears in, exactly as written, or nothing if it appears before the first heading.
+If there are no hallucinations, return an empty list.
+</task>
+
+<transcript>
+{transcript_as_index_speaker_and_utterance(transcript, source_indexes)}
+</transcript>
+
+<minutes>
+{minutes}
+</minutes>""",
         }
     ]
 
@@ -120,12 +136,12 @@ def get_section_for_agenda_prompt(section: str) -> dict[str, str]:
     return {"role": "user", "content": f"The item of the meeting that you will be contributing to is: {section}"}
 
 
-def get_citations_prompt(initial_draft: str, transcript: list[DialogueEntry]):
+def get_citations_prompt(numbered_sentences: str, transcript: list[DialogueEntry]):
     return [
         {
             "role": "user",
             "content": f"""<task>
-Add citations to the provided meeting summary which reference items in the transcript.
+Find the items in the transcript that support each sentence of the provided meeting summary.
 </task>
 
 <transcript>
@@ -133,21 +149,19 @@ Add citations to the provided meeting summary which reference items in the trans
 </transcript>
 
 <meeting_summary>
-{initial_draft}
+{numbered_sentences}
 </meeting_summary>
 
 <formatting_instructions>
-Each citation should be of the form [n] where n is the index of the transcript item. Each citation should be one number surrounded by square brackets. For example, you must do [80][81] not [80, 81].
+Each sentence of the meeting summary is on its own line, after its id in square brackets.
+For each sentence that should be cited, give its id and the indexes of the transcript items that support it.
 </formatting_instructions>
 
 <requirements>
-Each statement should have a maximum of 5 citations.
-Do not add citations to lists of attendees.
+Each sentence should have a maximum of 5 citations.
+Do not cite headings or lists of attendees.
+Leave out sentences that have no supporting transcript items.
 </requirements>
-
-<output>
-Output the meeting summary unchanged except for the addition of citations.
-</output>
 """,
         }
     ]
@@ -157,6 +171,18 @@ def string_to_system_message(string: str) -> dict[str, str]:
     return {"role": "system", "content": string}
 
 
+def get_condense_transcript_chunk_prompt(indexed_transcript_chunk: str) -> list[dict[str, str]]:
+    return [
+        {
+            "role": "system",
+            "content": """You are condensing one part of a long meeting transcript so that minutes can be written from it.
+Rewrite the discussion as a list of concise points in the order they were said. Keep everything that could belong in the minutes: who said what, names, figures, dates, arguments, decisions and actions. Leave out small talk, repetition and procedural content.
+For each point, give the index of the transcript item it mostly comes from. Only use indexes that appear in the transcript.""",
+        },
+        {"role": "user", "content": f"<transcript>\n{indexed_transcript_chunk}\n</transcript>"},
+    ]
+
+
 def get_meeting_title_prompt(transcript: list[DialogueEntry]) -> list[dict[str, str]]:
     prompt = f"""<task>
 Generate a short title for the meeting
@@ -6,5 +6,9 @@ class InteractionFailedError(Exception):
     """Exception raised when a transcription fails."""
 
 
+class HallucinationCheckFailedError(Exception):
+    """Exception raised when checking minutes for hallucinations fails."""
+
+
 class MissingAuthTokenError(Exception):
     """Exception raised when an auth token is not provided where required."""
@@ -11,17 +11,21 @@ from common.database.postgres_database import SessionLocal
 from common.database.postgres_models import DialogueEntry, Hallucination, JobStatus, Minute, MinuteVersion, UserTemplate
 from common.format_transcript import transcript_as_speaker_and_utterance
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.response_cache import response_cache_scope
+from common.llm.telemetry import llm_job_scope
 from common.prompts import (
     get_ai_edit_initial_messages,
     get_basic_minutes_prompt,
 )
+from common.services.exceptions import HallucinationCheckFailedError
 from common.services.template_manager import TemplateManager
 from common.settings import get_settings
+from common.templates.hallucinations import check_minutes_for_hallucinations
+from common.templates.map_reduce import condense_long_transcript, remap_citations
 from common.templates.user_template import generate_user_template
 from common.types import (
     LLMHallucination,
     MeetingType,
-    MinuteAndHallucinations,
 )
 
 settings = get_settings()
@@ -43,6 +47,7 @@ class MinuteHandlerService:
             hallucination_text=llm_hallucination.hallucination_text,
             hallucination_reason=llm_hallucination.hallucination_reason,
             hallucination_type=llm_hallucination.hallucination_type,
+            section=llm_hallucination.section,
             minute_version_id=minute_version_id,
         )
 
@@ -122,6 +127,11 @@ class MinuteHandlerService:
             session.expunge(minute)
             return minute.minute_versions[0]
 
+    @staticmethod
+    def telemetry_template_name(minute: Minute) -> str:
+        # user templates are named by users, so they are only counted together
+        return "user_template" if minute.user_template_id is not None else minute.template_name
+
     @classmethod
     async def process_minute_generation_message(cls, minute_version_id: UUID) -> None:
         try:
@@ -132,13 +142,10 @@ class MinuteHandlerService:
         try:
             meeting_type = cls.predict_meeting(minute_version.minute.transcription.dialogue_entries)
             logger.info("%s: Predicted minute version %s", minute_version.minute_id, meeting_type)
-            html_content, hallucinations = await cls.generate_minutes(meeting_type, minute_version.minute)
-            cls.update_minute_version(
-                minute_version.id,
-                html_content=html_content,
-                hallucinations=hallucinations,
-                status=JobStatus.COMPLETED,
-            )
+            async with llm_job_scope("minute", minute_version.id, cls.telemetry_template_name(minute_version.minute)):
+                with response_cache_scope(minute_version.minute.transcription.user_id):
+                    html_content = await cls.generate_minutes(meeting_type, minute_version.minute)
+            cls.update_minute_version(minute_version.id, html_content=html_content, status=JobStatus.COMPLETED)
         except Exception as e:
             logger.exception("%s: Minute generation failed", minute_version.minute_id)
             cls.record_minute_version_failure(minute_version.id, error=str(e))
@@ -160,16 +167,18 @@ class MinuteHandlerService:
             raise MinuteGenerationFailedError(msg)
 
         try:
-            edited_string, hallucinations = await cls.edit_minutes_with_ai(
-                minutes=source_minute_version.html_content,
-                edit_instructions=target_minute_version.ai_edit_instructions,
-                transcript=source_minute_version.minute.transcription.dialogue_entries,
-            )
+            async with llm_job_scope(
+                "edit", target_minute_version.id, cls.telemetry_template_name(target_minute_version.minute)
+            ):
+                edited_string = await cls.edit_minutes_with_ai(
+                    minutes=source_minute_version.html_content,
+                    edit_instructions=target_minute_version.ai_edit_instructions,
+                    transcript=source_minute_version.minute.transcription.dialogue_entries,
+                )
             cls.update_minute_version(
                 minute_version_id=target_minute_version.id,
                 status=JobStatus.COMPLETED,
                 html_content=edited_string,
-                hallucinations=hallucinations,
             )
 
         except Exception as e:
@@ -178,7 +187,38 @@ class MinuteHandlerService:
             raise MinuteGenerationFailedError from e
 
     @classmethod
-    async def generate_minute_from_user_template(cls, minute: Minute):
+    async def process_hallucination_check_message(cls, minute_version_id: UUID) -> None:
+        """Check a completed minute version against its transcript, once the user already has the minutes."""
+        try:
+            minute_version = await cls.get_minute_version(minute_version_id)
+        except Exception as e:
+            raise HallucinationCheckFailedError from e
+        if minute_version.status != JobStatus.COMPLETED:
+            logger.info(
+                "%s: Not checking MinuteVersion %s for hallucinations as it is %s",
+                minute_version.minute_id,
+                minute_version.id,
+                minute_version.status,
+            )
+            return
+
+        transcription = minute_version.minute.transcription
+        try:
+            async with llm_job_scope(
+                "hallucination_check", minute_version.id, cls.telemetry_template_name(minute_version.minute)
+            ):
+                with response_cache_scope(transcription.user_id):
+                    hallucinations = await check_minutes_for_hallucinations(
+                        minute_version.html_content, transcription.dialogue_entries
+                    )
+            logger.info("%s: Found %d hallucinations", minute_version.minute_id, len(hallucinations))
+            cls.update_minute_version(minute_version.id, hallucinations=hallucinations)
+        except Exception as e:
+            logger.exception("%s: Hallucination check failed", minute_version.minute_id)
+            raise HallucinationCheckFailedError from e
+
+    @classmethod
+    async def generate_minute_from_user_template(cls, minute: Minute) -> str:
         with SessionLocal() as session:
             template = session.get(
                 UserTemplate, minute.user_template_id, options=[selectinload(UserTemplate.questions)]
@@ -187,57 +227,68 @@ class MinuteHandlerService:
             msg = f"No template with id {minute.user_template_id}"
             raise RuntimeError(msg)
         logger.info("%s: Found template id=%s, name=%s", minute.id, template.id, template.name)
-        minutes, hallucinations = await generate_user_template(template=template, transcription=minute.transcription)
-        return minutes, hallucinations
+        return await generate_user_template(template=template, transcription=minute.transcription)
 
     @classmethod
     async def generate_minutes(
         cls,
         meeting_type: MeetingType,
         minute: Minute,
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         match meeting_type:
             case MeetingType.too_short:
-                result, hallucinations = cls.handle_bad_transcript(minute.transcription.dialogue_entries)
+                result = cls.handle_bad_transcript(minute.transcription.dialogue_entries)
             case MeetingType.short:
-                result, hallucinations = await cls.generate_basic_minutes(minute.transcription.dialogue_entries)
+                result = await cls.generate_basic_minutes(minute.transcription.dialogue_entries)
             case _:
-                result, hallucinations = await cls.generate_full_minutes(minute)
+                result = await cls.generate_full_minutes(minute)
         result = mistune.html(result)
-        return cast(str, result), hallucinations
+        return cast(str, result)
 
     @classmethod
-    async def generate_full_minutes(cls, minute: Minute) -> MinuteAndHallucinations:
+    async def generate_full_minutes(cls, minute: Minute) -> str:
+        condensed = await condense_long_transcript(minute.transcription.dialogue_entries)
+        if condensed is None:
+            return await cls.generate_full_minutes_from_transcript(minute)
+
+        condensed_transcript, source_indexes = condensed
+        logger.info(
+            "%s: Condensed transcript from %d to %d items",
+            minute.id,
+            len(minute.transcription.dialogue_entries),
+            len(condensed_transcript),
+        )
+        # the minute is detached from its session, so this only changes the transcript the templates are given
+        minute.transcription.dialogue_entries = condensed_transcript
+        result = await cls.generate_full_minutes_from_transcript(minute)
+        return remap_citations(result, source_indexes)
+
+    @classmethod
+    async def generate_full_minutes_from_transcript(cls, minute: Minute) -> str:
         if minute.user_template_id is not None:
             logger.info(
                 "%s: Generating minute from user template user_template_id=%s", minute.id, minute.user_template_id
             )
-            result, hallucinations = await cls.generate_minute_from_user_template(minute)
+            result = await cls.generate_minute_from_user_template(minute)
         else:
             logger.info("%s: Generating minute from default template: %s", minute.id, minute.template_name)
             template = TemplateManager.get_template(minute.template_name)
-            result, hallucinations = await template.generate(minute)
+            result = await template.generate(minute)
         logger.info("%s: Successfully generated minute", minute.id)
-        result = convert_american_to_british_spelling(result)
-        return result, hallucinations
+        return convert_american_to_british_spelling(result)
 
     @classmethod
-    def handle_bad_transcript(cls, transcript: list[DialogueEntry]) -> MinuteAndHallucinations:
-        return (
-            f"""Short meeting detected. Minutes not available.
-         Please try again with a longer meeting. Transcript is: {transcript_as_speaker_and_utterance(transcript)}""",
-            [],
-        )
+    def handle_bad_transcript(cls, transcript: list[DialogueEntry]) -> str:
+        return f"""Short meeting detected. Minutes not available.
+         Please try again with a longer meeting. Transcript is: {transcript_as_speaker_and_utterance(transcript)}"""
 
     @classmethod
     async def generate_basic_minutes(
         cls,
         transcript: list[DialogueEntry],
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-        choice = await chatbot.chat(messages=get_basic_minutes_prompt(transcript))
-        hallucinations = await chatbot.hallucination_check()
-        return choice, hallucinations
+        return await chatbot.chat(messages=get_basic_minutes_prompt(transcript))
 
     @classmethod
     def predict_meeting(cls, dialogue_entries: list[DialogueEntry]) -> MeetingType:
@@ -256,12 +307,9 @@ class MinuteHandlerService:
         minutes: str,
         edit_instructions: str,
         transcript: list[DialogueEntry],
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         chatbot = create_default_chatbot(FastOrBestLLM.FAST)
         edited_minutes = await chatbot.chat(
             messages=get_ai_edit_initial_messages(minutes, edit_instructions, transcript)
         )
-        edited_minutes = edited_minutes.removeprefix("```html").removesuffix("```")
-        hallucinations = await chatbot.hallucination_check()
-
-        return edited_minutes, hallucinations
+        return edited_minutes.removeprefix("```html").removesuffix("```")
@@ -1,10 +1,23 @@
 from common.services.queue_services.azure_service_bus import AzureServiceBusQueueService
-from common.services.queue_services.base import QueueService
+from common.services.queue_services.azure_service_bus_async import AsyncAzureServiceBusQueueService
+from common.services.queue_services.base import AsyncQueueService, QueueService
+from common.services.queue_services.local import AsyncLocalQueueService, LocalQueueService
+from common.services.queue_services.postgres import AsyncPostgresQueueService, PostgresQueueService
 from common.services.queue_services.sqs import SQSQueueService
+from common.services.queue_services.sqs_async import AsyncSQSQueueService
 
 queue_services: dict[str, type[QueueService]] = {
     SQSQueueService.name: SQSQueueService,
     AzureServiceBusQueueService.name: AzureServiceBusQueueService,
+    LocalQueueService.name: LocalQueueService,
+    PostgresQueueService.name: PostgresQueueService,
+}
+
+async_queue_services: dict[str, type[AsyncQueueService]] = {
+    AsyncSQSQueueService.name: AsyncSQSQueueService,
+    AsyncAzureServiceBusQueueService.name: AsyncAzureServiceBusQueueService,
+    AsyncLocalQueueService.name: AsyncLocalQueueService,
+    AsyncPostgresQueueService.name: AsyncPostgresQueueService,
 }
 
 
@@ -14,3 +27,11 @@ def get_queue_service(queue_service_name: str, queue_name: str, deadletter_queue
         msg = f"Invalid storage service name: {queue_service_name}"
         raise ValueError(msg)
     return service(queue_name, deadletter_queue_name)
+
+
+def get_async_queue_service(queue_service_name: str, queue_name: str, deadletter_queue_name: str) -> AsyncQueueService:
+    service = async_queue_services.get(queue_service_name)
+    if not service:
+        msg = f"Invalid queue service name: {queue_service_name}"
+        raise ValueError(msg)
+    return service(queue_name, deadletter_queue_name)
@@ -1,8 +1,11 @@
 import logging
+import threading
+from collections.abc import Iterator
 from contextlib import contextmanager
+from functools import cache
 from typing import Any
 
-from azure.servicebus import ServiceBusClient, ServiceBusMessage
+from azure.servicebus import ServiceBusClient, ServiceBusMessage, ServiceBusReceiver, ServiceBusSender
 
 from common.services.queue_services.base import QueueService
 from common.settings import get_settings
@@ -12,10 +15,55 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
-@contextmanager
-def get_sb_client():
-    with ServiceBusClient.from_connection_string(settings.AZURE_SB_CONNECTION_STRING) as sb_client:
-        yield sb_client
+class ServiceBusPool:
+    """Service Bus connection, receivers and senders shared by every queue service in a process.
+
+    Opening a connection and attaching a link costs several network round trips, so they are created on first use and
+    kept open. The SDK reconnects a dropped connection on the next call.
+    """
+
+    def __init__(self, connection_string: str) -> None:
+        self.client = ServiceBusClient.from_connection_string(connection_string)
+        self.receivers: dict[str, ServiceBusReceiver] = {}
+        self.senders: dict[str, ServiceBusSender] = {}
+        # senders and receivers are not thread safe, and the backend publishes from its thread pool. Receivers have
+        # their own locks, so a publish never waits behind a long poll on the same queue
+        self.sender_locks: dict[str, threading.Lock] = {}
+        self.receiver_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get_receiver(self, queue_name: str) -> ServiceBusReceiver:
+        with self._lock:
+            if queue_name not in self.receivers:
+                self.receivers[queue_name] = self.client.get_queue_receiver(queue_name)
+            return self.receivers[queue_name]
+
+    def get_sender(self, queue_name: str) -> ServiceBusSender:
+        with self._lock:
+            if queue_name not in self.senders:
+                self.senders[queue_name] = self.client.get_queue_sender(queue_name)
+            return self.senders[queue_name]
+
+    def get_sender_lock(self, queue_name: str) -> threading.Lock:
+        with self._lock:
+            return self.sender_locks.setdefault(queue_name, threading.Lock())
+
+    def get_receiver_lock(self, queue_name: str) -> threading.Lock:
+        with self._lock:
+            return self.receiver_locks.setdefault(queue_name, threading.Lock())
+
+    def close(self) -> None:
+        with self._lock:
+            for handler in [*self.receivers.values(), *self.senders.values()]:
+                handler.close()
+            self.receivers.clear()
+            self.senders.clear()
+            self.client.close()
+
+
+@cache
+def get_sb_pool() -> ServiceBusPool:
+    return ServiceBusPool(settings.AZURE_SB_CONNECTION_STRING)
 
 
 class AzureServiceBusQueueService(QueueService):
@@ -34,12 +82,17 @@ class AzureServiceBusQueueService(QueueService):
         """Required so that Ray can deserialize the queue service by instantiated a new one."""
         return AzureServiceBusQueueService, (self.queue_name,)
 
+    @contextmanager
+    def receiver(self) -> Iterator[ServiceBusReceiver]:
+        """The queue's pooled receiver, held by this thread until the block exits."""
+        # messages must be settled through the receiver that received them, which is always this one
+        pool = get_sb_pool()
+        with pool.get_receiver_lock(self.queue_name):
+            yield pool.get_receiver(self.queue_name)
+
     def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
         out = []
-        with (
-            get_sb_client() as client,
-            client.get_queue_receiver(self.queue_name) as receiver,
-        ):
+        with self.receiver() as receiver:
             messages = receiver.receive_messages(max_message_count=max_messages, max_wait_time=self.polling_interval)
 
             for message in messages:
@@ -52,34 +105,36 @@ class AzureServiceBusQueueService(QueueService):
         return out
 
     def publish_message(self, message: WorkerMessage):
-        with get_sb_client() as client, client.get_queue_sender(self.queue_name) as sender:
-            sender.send_messages([ServiceBusMessage(message.model_dump_json())])
+        pool = get_sb_pool()
+        with pool.get_sender_lock(self.queue_name):
+            pool.get_sender(self.queue_name).send_messages([ServiceBusMessage(message.model_dump_json())])
+
+    def publish_messages(self, messages: list[WorkerMessage]):
+        pool = get_sb_pool()
+        with pool.get_sender_lock(self.queue_name):
+            pool.get_sender(self.queue_name).send_messages(
+                [ServiceBusMessage(message.model_dump_json()) for message in messages]
+            )
 
     def complete_message(self, receipt_handle: Any):
-        with (
-            get_sb_client() as client,
-            client.get_queue_receiver(self.queue_name) as receiver,
-        ):
+        with self.receiver() as receiver:
             receiver.complete_message(receipt_handle)
 
+    def complete_messages(self, receipt_handles: list[Any]):
+        # Service Bus has no batch settlement, but the messages are settled over the same open link
+        with self.receiver() as receiver:
+            for receipt_handle in receipt_handles:
+                receiver.complete_message(receipt_handle)
+
     def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):  # noqa: ARG002
-        with (
-            get_sb_client() as client,
-            client.get_queue_receiver(self.queue_name) as receiver,
-        ):
+        with self.receiver() as receiver:
             receiver.dead_letter_message(receipt_handle)
 
     def abandon_message(self, receipt_handle: Any):
-        with (
-            get_sb_client() as client,
-            client.get_queue_receiver(self.queue_name) as receiver,
-        ):
+        with self.receiver() as receiver:
             receiver.abandon_message(receipt_handle)
 
     def purge_messages(self):
-        with (
-            get_sb_client() as client,
-            client.get_queue_receiver(self.queue_name) as receiver,
-        ):
+        with self.receiver() as receiver:
             for msg in receiver:
                 receiver.abandon_message(msg)
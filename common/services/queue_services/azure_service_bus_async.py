@@ -0,0 +1,141 @@
+import asyncio
+import datetime
+import logging
+import weakref
+from typing import Any
+
+from azure.servicebus import ServiceBusMessage
+from azure.servicebus.aio import ServiceBusClient, ServiceBusReceiver, ServiceBusSender
+from azure.servicebus.aio.management import ServiceBusAdministrationClient
+
+from common.services.queue_services.base import AsyncQueueService
+from common.settings import get_settings
+from common.types import WorkerMessage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class AsyncServiceBusPool:
+    """Awaitable counterpart of ServiceBusPool.
+
+    The aio client is bound to the event loop it was created on, so there is one pool per event loop, which for a Ray
+    actor means one per process.
+    """
+
+    def __init__(self, connection_string: str) -> None:
+        self.client = ServiceBusClient.from_connection_string(connection_string)
+        self.receivers: dict[str, ServiceBusReceiver] = {}
+        self.senders: dict[str, ServiceBusSender] = {}
+
+    def get_receiver(self, queue_name: str) -> ServiceBusReceiver:
+        if queue_name not in self.receivers:
+            self.receivers[queue_name] = self.client.get_queue_receiver(queue_name)
+        return self.receivers[queue_name]
+
+    def get_sender(self, queue_name: str) -> ServiceBusSender:
+        if queue_name not in self.senders:
+            self.senders[queue_name] = self.client.get_queue_sender(queue_name)
+        return self.senders[queue_name]
+
+    async def close(self) -> None:
+        for handler in [*self.receivers.values(), *self.senders.values()]:
+            await handler.close()
+        self.receivers.clear()
+        self.senders.clear()
+        await self.client.close()
+
+
+_pools: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncServiceBusPool] = weakref.WeakKeyDictionary()
+
+
+def get_async_sb_pool() -> AsyncServiceBusPool:
+    loop = asyncio.get_running_loop()
+    if loop not in _pools:
+        _pools[loop] = AsyncServiceBusPool(settings.AZURE_SB_CONNECTION_STRING)
+    return _pools[loop]
+
+
+class AsyncAzureServiceBusQueueService(AsyncQueueService):
+    name = "azure_service_bus"
+
+    def __init__(
+        self,
+        queue_name: str,
+        deadletter_queue_name: str | None = None,  # noqa: ARG002
+        polling_interval: int = 20,
+    ):
+        self.polling_interval = polling_interval
+        self.queue_name = queue_name
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return AsyncAzureServiceBusQueueService, (self.queue_name,)
+
+    @property
+    def receiver(self) -> ServiceBusReceiver:
+        # messages must be settled through the receiver that received them, which is always this one
+        return get_async_sb_pool().get_receiver(self.queue_name)
+
+    async def close(self) -> None:
+        pool = _pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.close()
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        out = []
+        messages = await self.receiver.receive_messages(
+            max_message_count=max_messages, max_wait_time=self.polling_interval
+        )
+
+        for message in messages:
+            try:
+                worker_message = WorkerMessage.model_validate_json(str(message))
+                out.append((worker_message, message))
+            except Exception:
+                logger.exception("failed to process message")
+        return out
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        scheduled_enqueue_time_utc = (
+            datetime.datetime.now(datetime.UTC) + datetime.timedelta(seconds=delay_seconds) if delay_seconds else None
+        )
+        sender = get_async_sb_pool().get_sender(self.queue_name)
+        await sender.send_messages(
+            [ServiceBusMessage(message.model_dump_json(), scheduled_enqueue_time_utc=scheduled_enqueue_time_utc)]
+        )
+
+    async def publish_messages(self, messages: list[WorkerMessage]):
+        sender = get_async_sb_pool().get_sender(self.queue_name)
+        await sender.send_messages([ServiceBusMessage(message.model_dump_json()) for message in messages])
+
+    async def complete_message(self, receipt_handle: Any):
+        await self.receiver.complete_message(receipt_handle)
+
+    async def complete_messages(self, receipt_handles: list[Any]):
+        # Service Bus has no batch settlement, but the messages are settled over the same open link
+        for receipt_handle in receipt_handles:
+            await self.receiver.complete_message(receipt_handle)
+
+    async def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):  # noqa: ARG002
+        await self.receiver.dead_letter_message(receipt_handle)
+
+    async def abandon_message(self, receipt_handle: Any):
+        await self.receiver.abandon_message(receipt_handle)
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):  # noqa: ARG002
+        # Service Bus renews a lock by the lock duration configured on the queue
+        for receipt_handle in receipt_handles:
+            await self.receiver.renew_message_lock(receipt_handle)
+
+    async def approximate_message_count(self) -> int:
+        async with ServiceBusAdministrationClient.from_connection_string(
+            settings.AZURE_SB_CONNECTION_STRING
+        ) as admin_client:
+            properties = await admin_client.get_queue_runtime_properties(self.queue_name)
+        return properties.active_message_count
+
+    async def purge_messages(self):
+        receiver = self.receiver
+        async for msg in receiver:
+            await receiver.abandon_message(msg)
@@ -2,6 +2,9 @@ from typing import Any, Protocol
 
 from common.types import WorkerMessage
 
+# the longest delay SQS allows on a single message, and so the longest a message can be delayed on any queue service
+MAX_DELAY_SECONDS = 900
+
 
 class QueueService(Protocol):
     name: str
@@ -12,10 +15,52 @@ class QueueService(Protocol):
 
     def publish_message(self, message: WorkerMessage): ...
 
+    def publish_messages(self, messages: list[WorkerMessage]): ...
+
     def complete_message(self, receipt_handle: Any): ...
 
+    def complete_messages(self, receipt_handles: list[Any]): ...
+
     def deadletter_message(self, message: WorkerMessage, receipt_handle: Any): ...
 
     def abandon_message(self, receipt_handle: Any): ...
 
     def purge_messages(self): ...
+
+
+class AsyncQueueService(Protocol):
+    """Awaitable counterpart of QueueService, used by the worker actors.
+
+    Every method yields to the event loop while waiting on the broker, so an actor that is long-polling for new
+    messages can keep making progress on the tasks it already has in flight.
+    """
+
+    name: str
+
+    def __init__(self, queue_name: str, deadletter_queue_name: str, **kwargs): ...
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]: ...
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        """Publish a message, optionally hidden from receivers until `delay_seconds` have passed."""
+        ...
+
+    async def publish_messages(self, messages: list[WorkerMessage]): ...
+
+    async def complete_message(self, receipt_handle: Any): ...
+
+    async def complete_messages(self, receipt_handles: list[Any]): ...
+
+    async def deadletter_message(self, message: WorkerMessage, receipt_handle: Any): ...
+
+    async def abandon_message(self, receipt_handle: Any): ...
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):
+        """Keep received messages hidden from other receivers for another `visibility_timeout` seconds."""
+        ...
+
+    async def approximate_message_count(self) -> int:
+        """Approximate number of messages waiting to be received, excluding in flight and delayed messages."""
+        ...
+
+    async def purge_messages(self): ...
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from common.services.queue_services.base import AsyncQueueService, QueueService
+from common.settings import get_settings
+from common.types import WorkerMessage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# matches the redrive policy on the SQS queues in terraform/sqs.tf
+MAX_RECEIVE_COUNT = 4
+# how often an empty queue is checked again while long polling
+POLL_STEP_SECONDS = 0.2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_message (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue_name TEXT NOT NULL,
+    body TEXT NOT NULL,
+    visible_at REAL NOT NULL,
+    receive_count INTEGER NOT NULL DEFAULT 0,
+    receipt_handle TEXT UNIQUE
+);
+CREATE INDEX IF NOT EXISTS ix_queue_message_queue_name_visible_at ON queue_message (queue_name, visible_at);
+"""
+
+
+class LocalQueueService(QueueService):
+    """Queue stored in a SQLite database, so the app and worker can run on a single node without a message broker.
+
+    Messages behave as they do on SQS: a received message is hidden for the visibility timeout and redelivered if it
+    is not completed in time, every receive issues a new receipt handle, and a message received more than
+    MAX_RECEIVE_COUNT times is moved to the dead letter queue. Each call uses its own connection and claims messages
+    inside an immediate transaction, so any number of consumers in any number of processes can share the database.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        queue_name: str,
+        deadletter_queue_name: str,
+        polling_interval: int = 20,
+        db_path: str | None = None,
+    ):
+        self.queue_name = queue_name
+        self.deadletter_queue_name = deadletter_queue_name
+        self.polling_interval = polling_interval
+        self.db_path = db_path or settings.LOCAL_QUEUE_DB_PATH
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return LocalQueueService, (self.queue_name, self.deadletter_queue_name, self.polling_interval, self.db_path)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            yield connection
+        finally:
+            connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._connect() as connection:
+            # take the write lock up front, so two consumers can never claim the same message
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def claim_messages(self, max_messages: int) -> list[tuple[WorkerMessage, Any]]:
+        """Claim up to max_messages visible messages without waiting."""
+        now = time.time()
+        out = []
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT id, body, receive_count FROM queue_message WHERE queue_name = ? AND visible_at <= ? "
+                "ORDER BY visible_at, id LIMIT ?",
+                (self.queue_name, now, max_messages),
+            ).fetchall()
+            for message_id, body, receive_count in rows:
+                if receive_count >= MAX_RECEIVE_COUNT:
+                    logger.warning("Message %s exceeded the maximum receive count, dead lettering", message_id)
+                    self._move_to_deadletter(connection, message_id)
+                    continue
+                receipt_handle = str(uuid.uuid4())
+                connection.execute(
+                    "UPDATE queue_message SET visible_at = ?, receive_count = receive_count + 1, receipt_handle = ? "
+                    "WHERE id = ?",
+                    (now + settings.QUEUE_VISIBILITY_TIMEOUT, receipt_handle, message_id),
+                )
+                try:
+                    out.append((WorkerMessage.model_validate_json(body), receipt_handle))
+                except Exception:
+                    logger.exception("failed to process message")
+        return out
+
+    def _move_to_deadletter(self, connection: sqlite3.Connection, message_id: int) -> None:
+        connection.execute(
+            "UPDATE queue_message SET queue_name = ?, visible_at = ?, receive_count = 0, receipt_handle = NULL "
+            "WHERE id = ?",
+            (self.deadletter_queue_name, time.time(), message_id),
+        )
+
+    def _update_by_receipt_handle(self, sql: str, params: tuple, receipt_handles: list[Any], operation: str) -> None:
+        with self._transaction() as connection:
+            for receipt_handle in receipt_handles:
+                if connection.execute(sql, (*params, receipt_handle)).rowcount == 0:
+                    logger.warning("Invalid receipt handle when %s message", operation)
+
+    def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        deadline = time.monotonic() + self.polling_interval
+        while not (messages := self.claim_messages(max_messages)) and time.monotonic() < deadline:
+            time.sleep(POLL_STEP_SECONDS)
+        return messages
+
+    def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        self.publish_messages([message], delay_seconds)
+
+    def publish_messages(self, messages: list[WorkerMessage], delay_seconds: int = 0):
+        visible_at = time.time() + delay_seconds
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT INTO queue_message (queue_name, body, visible_at) VALUES (?, ?, ?)",
+                [(self.queue_name, message.model_dump_json(), visible_at) for message in messages],
+            )
+
+    def complete_message(self, receipt_handle: Any):
+        self.complete_messages([receipt_handle])
+
+    def complete_messages(self, receipt_handles: list[Any]):
+        self._update_by_receipt_handle(
+            "DELETE FROM queue_message WHERE receipt_handle = ?", (), receipt_handles, "completing"
+        )
+
+    def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):  # noqa: ARG002
+        self._update_by_receipt_handle(
+            "UPDATE queue_message SET queue_name = ?, visible_at = ?, receive_count = 0, receipt_handle = NULL "
+            "WHERE receipt_handle = ?",
+            (self.deadletter_queue_name, time.time()),
+            [receipt_handle],
+            "deadlettering",
+        )
+
+    def abandon_message(self, receipt_handle: Any):
+        self._update_by_receipt_handle(
+            "UPDATE queue_message SET visible_at = ?, receipt_handle = NULL WHERE receipt_handle = ?",
+            (time.time(),),
+            [receipt_handle],
+            "abandoning",
+        )
+
+    def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):
+        self._update_by_receipt_handle(
+            "UPDATE queue_message SET visible_at = ? WHERE receipt_handle = ?",
+            (time.time() + visibility_timeout,),
+            receipt_handles,
+            "extending visibility of",
+        )
+
+    def approximate_message_count(self) -> int:
+        with self._connect() as connection:
+            (count,) = connection.execute(
+                "SELECT COUNT(*) FROM queue_message WHERE queue_name = ? AND visible_at <= ?",
+                (self.queue_name, time.time()),
+            ).fetchone()
+        return count
+
+    def purge_messages(self):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM queue_message WHERE queue_name = ?", (self.queue_name,))
+
+
+class AsyncLocalQueueService(AsyncQueueService):
+    """Awaitable wrapper around LocalQueueService, which runs each SQLite call in a thread."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        queue_name: str,
+        deadletter_queue_name: str,
+        polling_interval: int = 20,
+        db_path: str | None = None,
+    ):
+        self.queue = LocalQueueService(queue_name, deadletter_queue_name, polling_interval, db_path)
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return AsyncLocalQueueService, (
+            self.queue.queue_name,
+            self.queue.deadletter_queue_name,
+            self.queue.polling_interval,
+            self.queue.db_path,
+        )
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        # poll from the event loop rather than a thread, so a long poll can be cancelled
+        deadline = time.monotonic() + self.queue.polling_interval
+        while not (messages := await asyncio.to_thread(self.queue.claim_messages, max_messages)):
+            if time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(POLL_STEP_SECONDS)
+        return messages
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        await asyncio.to_thread(self.queue.publish_message, message, delay_seconds)
+
+    async def publish_messages(self, messages: list[WorkerMessage]):
+        await asyncio.to_thread(self.queue.publish_messages, messages)
+
+    async def complete_message(self, receipt_handle: Any):
+        await asyncio.to_thread(self.queue.complete_message, receipt_handle)
+
+    async def complete_messages(self, receipt_handles: list[Any]):
+        await asyncio.to_thread(self.queue.complete_messages, receipt_handles)
+
+    async def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):
+        await asyncio.to_thread(self.queue.deadletter_message, message, receipt_handle)
+
+    async def abandon_message(self, receipt_handle: Any):
+        await asyncio.to_thread(self.queue.abandon_message, receipt_handle)
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):
+        await asyncio.to_thread(self.queue.extend_messages_visibility, receipt_handles, visibility_timeout)
+
+    async def approximate_message_count(self) -> int:
+        return await asyncio.to_thread(self.queue.approximate_message_count)
+
+    async def purge_messages(self):
+        await asyncio.to_thread(self.queue.purge_messages)
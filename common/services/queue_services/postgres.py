@@ -0,0 +1,306 @@
+import asyncio
+import contextlib
+import logging
+import time
+import uuid
+from datetime import timedelta
+from typing import Any
+
+import asyncpg
+from sqlalchemy import Delete, Insert, Select, Update, delete, func, insert, update
+from sqlalchemy.engine import Row
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from common.database.postgres_database import ASYNC_DATABASE_URL, async_engine, engine
+from common.database.postgres_models import QueueMessage
+from common.services.queue_services.base import AsyncQueueService, QueueService
+from common.settings import get_settings
+from common.types import TaskType, WorkerMessage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# matches the redrive policy on the SQS queues in terraform/sqs.tf
+MAX_RECEIVE_COUNT = 4
+# the channel the queue_message_notify trigger notifies when a message becomes receivable
+NOTIFY_CHANNEL = "queue_message"
+# delayed messages become receivable without a notification, so an idle consumer still checks this often
+POLL_STEP_SECONDS = 5
+# higher priorities are received first. Work is picked up closest to the user first, and background checks that nobody
+# is waiting on only once everything else has been
+TASK_PRIORITIES = {
+    TaskType.HALLUCINATION_CHECK: 0,
+    TaskType.TRANSCRIPTION: 1,
+    TaskType.MINUTE: 2,
+    TaskType.EDIT: 3,
+    TaskType.INTERACTIVE: 4,
+}
+
+
+def message_row(queue_name: str, message: WorkerMessage, delay_seconds: int = 0) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "queue_name": queue_name,
+        "message": message.model_dump(mode="json"),
+        "priority": TASK_PRIORITIES[message.type],
+        "visible_at": func.now() + timedelta(seconds=delay_seconds),
+    }
+
+
+class PostgresQueueStatements:
+    """The statements behind the sync and async postgres queue services."""
+
+    def __init__(self, queue_name: str, deadletter_queue_name: str) -> None:
+        self.queue_name = queue_name
+        self.deadletter_queue_name = deadletter_queue_name
+
+    def publish(self, messages: list[WorkerMessage], delay_seconds: int = 0) -> Insert:
+        return insert(QueueMessage).values(
+            [message_row(self.queue_name, message, delay_seconds) for message in messages]
+        )
+
+    def claim(self, max_messages: int) -> Update:
+        # SKIP LOCKED lets any number of consumers claim concurrently without waiting on, or double claiming, a row
+        claimable = (
+            select(QueueMessage.id)
+            .where(QueueMessage.queue_name == self.queue_name, QueueMessage.visible_at <= func.now())
+            .order_by(col(QueueMessage.priority).desc(), col(QueueMessage.visible_at))
+            .limit(max_messages)
+            .with_for_update(skip_locked=True)
+        )
+        return (
+            update(QueueMessage)
+            .where(col(QueueMessage.id).in_(claimable.scalar_subquery()))
+            .values(
+                receipt_handle=func.gen_random_uuid(),
+                receive_count=QueueMessage.receive_count + 1,
+                visible_at=func.now() + timedelta(seconds=settings.QUEUE_VISIBILITY_TIMEOUT),
+            )
+            .returning(
+                QueueMessage.id,
+                QueueMessage.message,
+                QueueMessage.priority,
+                QueueMessage.receive_count,
+                QueueMessage.receipt_handle,
+            )
+        )
+
+    def deadletter_exhausted(self, rows: list[Row]) -> Update | None:
+        exhausted = [row.id for row in rows if row.receive_count > MAX_RECEIVE_COUNT]
+        if not exhausted:
+            return None
+        logger.warning("Messages %s exceeded the maximum receive count, dead lettering", exhausted)
+        return self._deadletter(col(QueueMessage.id).in_(exhausted))
+
+    @staticmethod
+    def parse_claimed(rows: list[Row]) -> list[tuple[WorkerMessage, Any]]:
+        out = []
+        # an update returns its rows in no particular order, so a batch is put back in order of priority
+        for row in sorted(rows, key=lambda row: row.priority, reverse=True):
+            if row.receive_count > MAX_RECEIVE_COUNT:
+                continue
+            try:
+                out.append((WorkerMessage.model_validate(row.message), row.receipt_handle))
+            except Exception:
+                logger.exception("failed to process message")
+        return out
+
+    def complete(self, receipt_handles: list[Any]) -> Delete:
+        return delete(QueueMessage).where(col(QueueMessage.receipt_handle).in_(receipt_handles))
+
+    def deadletter(self, receipt_handle: Any) -> Update:
+        return self._deadletter(QueueMessage.receipt_handle == receipt_handle)
+
+    def _deadletter(self, where: Any) -> Update:
+        return (
+            update(QueueMessage)
+            .where(where)
+            .values(queue_name=self.deadletter_queue_name, receive_count=0, receipt_handle=None, visible_at=func.now())
+        )
+
+    def abandon(self, receipt_handle: Any) -> Update:
+        return (
+            update(QueueMessage)
+            .where(QueueMessage.receipt_handle == receipt_handle)
+            .values(receipt_handle=None, visible_at=func.now())
+        )
+
+    def extend_visibility(self, receipt_handles: list[Any], visibility_timeout: int) -> Update:
+        return (
+            update(QueueMessage)
+            .where(col(QueueMessage.receipt_handle).in_(receipt_handles))
+            .values(visible_at=func.now() + timedelta(seconds=visibility_timeout))
+        )
+
+    def count_visible(self) -> Select:
+        return (
+            select(func.count())
+            .select_from(QueueMessage)
+            .where(QueueMessage.queue_name == self.queue_name, QueueMessage.visible_at <= func.now())
+        )
+
+    def purge(self) -> Delete:
+        return delete(QueueMessage).where(QueueMessage.queue_name == self.queue_name)
+
+
+class PostgresQueueService(QueueService):
+    """Queue stored in the application's Postgres database.
+
+    Messages can be added to an existing session with `add_to_session`, so they are published atomically with the
+    rows they refer to. Otherwise messages behave as they do on SQS, with visibility timeouts, delays and dead
+    lettering after MAX_RECEIVE_COUNT receives, and are received in order of priority.
+    """
+
+    name = "postgres"
+
+    def __init__(self, queue_name: str, deadletter_queue_name: str, polling_interval: int = 20):
+        self.queue_name = queue_name
+        self.deadletter_queue_name = deadletter_queue_name
+        self.polling_interval = polling_interval
+        self.statements = PostgresQueueStatements(queue_name, deadletter_queue_name)
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return PostgresQueueService, (self.queue_name, self.deadletter_queue_name, self.polling_interval)
+
+    def add_to_session(self, session: Session | AsyncSession, message: WorkerMessage) -> None:
+        """Publish a message when the session's transaction commits."""
+        session.add(
+            QueueMessage(
+                queue_name=self.queue_name,
+                message=message.model_dump(mode="json"),
+                priority=TASK_PRIORITIES[message.type],
+            )
+        )
+
+    def claim_messages(self, max_messages: int) -> list[tuple[WorkerMessage, Any]]:
+        with engine.begin() as connection:
+            rows = connection.execute(self.statements.claim(max_messages)).all()
+            if (statement := self.statements.deadletter_exhausted(rows)) is not None:
+                connection.execute(statement)
+        return self.statements.parse_claimed(rows)
+
+    def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        deadline = time.monotonic() + self.polling_interval
+        while not (messages := self.claim_messages(max_messages)) and time.monotonic() < deadline:
+            time.sleep(POLL_STEP_SECONDS)
+        return messages
+
+    def _execute(self, statement: Any) -> None:
+        with engine.begin() as connection:
+            connection.execute(statement)
+
+    def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        self._execute(self.statements.publish([message], delay_seconds))
+
+    def publish_messages(self, messages: list[WorkerMessage]):
+        self._execute(self.statements.publish(messages))
+
+    def complete_message(self, receipt_handle: Any):
+        self._execute(self.statements.complete([receipt_handle]))
+
+    def complete_messages(self, receipt_handles: list[Any]):
+        self._execute(self.statements.complete(receipt_handles))
+
+    def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):  # noqa: ARG002
+        self._execute(self.statements.deadletter(receipt_handle))
+
+    def abandon_message(self, receipt_handle: Any):
+        self._execute(self.statements.abandon(receipt_handle))
+
+    def purge_messages(self):
+        self._execute(self.statements.purge())
+
+
+class AsyncPostgresQueueService(AsyncQueueService):
+    """Awaitable counterpart of PostgresQueueService.
+
+    Idle consumers LISTEN for the notification sent when a message becomes receivable, so a message published to an
+    empty queue is picked up straight away rather than on the next poll.
+    """
+
+    name = "postgres"
+
+    def __init__(self, queue_name: str, deadletter_queue_name: str, polling_interval: int = 20):
+        self.queue_name = queue_name
+        self.deadletter_queue_name = deadletter_queue_name
+        self.polling_interval = polling_interval
+        self.statements = PostgresQueueStatements(queue_name, deadletter_queue_name)
+        # the listener connection is bound to the event loop it is created on, so it is opened lazily on first use
+        self._listener: asyncpg.Connection | None = None
+        self._listener_lock = asyncio.Lock()
+        self._notified = asyncio.Event()
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return AsyncPostgresQueueService, (self.queue_name, self.deadletter_queue_name, self.polling_interval)
+
+    async def _listen(self) -> None:
+        async with self._listener_lock:
+            if self._listener is None or self._listener.is_closed():
+                self._listener = await asyncpg.connect(ASYNC_DATABASE_URL.replace("postgresql+asyncpg", "postgresql"))
+                await self._listener.add_listener(NOTIFY_CHANNEL, self._on_notify)
+
+    def _on_notify(self, _connection: asyncpg.Connection, _pid: int, _channel: str, payload: str) -> None:
+        if payload == self.queue_name:
+            self._notified.set()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+        self._listener = None
+
+    async def claim_messages(self, max_messages: int) -> list[tuple[WorkerMessage, Any]]:
+        async with async_engine.begin() as connection:
+            rows = (await connection.execute(self.statements.claim(max_messages))).all()
+            if (statement := self.statements.deadletter_exhausted(rows)) is not None:
+                await connection.execute(statement)
+        return self.statements.parse_claimed(rows)
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        await self._listen()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.polling_interval
+        while True:
+            # cleared before claiming, so a message published while claiming still wakes us
+            self._notified.clear()
+            if messages := await self.claim_messages(max_messages):
+                return messages
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return []
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._notified.wait(), min(remaining, POLL_STEP_SECONDS))
+
+    async def _execute(self, statement: Any) -> None:
+        async with async_engine.begin() as connection:
+            await connection.execute(statement)
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        await self._execute(self.statements.publish([message], delay_seconds))
+
+    async def publish_messages(self, messages: list[WorkerMessage]):
+        await self._execute(self.statements.publish(messages))
+
+    async def complete_message(self, receipt_handle: Any):
+        await self._execute(self.statements.complete([receipt_handle]))
+
+    async def complete_messages(self, receipt_handles: list[Any]):
+        await self._execute(self.statements.complete(receipt_handles))
+
+    async def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):  # noqa: ARG002
+        await self._execute(self.statements.deadletter(receipt_handle))
+
+    async def abandon_message(self, receipt_handle: Any):
+        await self._execute(self.statements.abandon(receipt_handle))
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):
+        await self._execute(self.statements.extend_visibility(receipt_handles, visibility_timeout))
+
+    async def approximate_message_count(self) -> int:
+        async with async_engine.connect() as connection:
+            return (await connection.execute(self.statements.count_visible())).scalar_one()
+
+    async def purge_messages(self):
+        await self._execute(self.statements.purge())
@@ -1,4 +1,6 @@
 import logging
+from collections.abc import Iterable, Iterator
+from itertools import batched
 from typing import Any
 
 import boto3
@@ -11,17 +13,34 @@ settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
-def get_sqs_client():
+def get_sqs_client_kwargs() -> dict[str, str]:
     if settings.USE_MINISTACK and settings.ENVIRONMENT == "local":
-        return boto3.client(
-            "sqs",
-            aws_access_key_id="YOUR_ACCESS_KEY_ID",
-            aws_secret_access_key="YOUR_SECRET_ACCESS_KEY",  # noqa: S106
-            region_name="eu-west-2",
-            endpoint_url=settings.MINISTACK_URL,
-        )
+        return {
+            "aws_access_key_id": "YOUR_ACCESS_KEY_ID",
+            "aws_secret_access_key": "YOUR_SECRET_ACCESS_KEY",
+            "region_name": "eu-west-2",
+            "endpoint_url": settings.MINISTACK_URL,
+        }
+    return {}
+
+
+def get_sqs_client():
+    return boto3.client("sqs", **get_sqs_client_kwargs())
+
+
+# SQS accepts at most 10 entries in a single batch request
+MAX_BATCH_SIZE = 10
 
-    return boto3.client("sqs")
+
+def batch_entries(items: Iterable[Any], key: str) -> Iterator[list[dict[str, Any]]]:
+    """Split items into batch request entries of at most MAX_BATCH_SIZE, each with an Id unique within its batch."""
+    for batch in batched(items, MAX_BATCH_SIZE):
+        yield [{"Id": str(i), key: item} for i, item in enumerate(batch)]
+
+
+def log_batch_failures(operation: str, response: dict[str, Any]) -> None:
+    for failure in response.get("Failed", []):
+        logger.warning("%s failed for batch entry %s: %s", operation, failure["Id"], failure["Code"])
 
 
 class SQSQueueService(QueueService):
@@ -49,6 +68,7 @@ class SQSQueueService(QueueService):
             QueueUrl=self.queue_url,
             MaxNumberOfMessages=max_messages,
             WaitTimeSeconds=self.polling_interval,  # Long polling
+            VisibilityTimeout=1800,
         )
 
         messages = response.get("Messages", [])
@@ -57,9 +77,6 @@ class SQSQueueService(QueueService):
             receipt_handle = message["ReceiptHandle"]
             try:
                 worker_message = WorkerMessage.model_validate_json(message["Body"])
-                self.sqs.change_message_visibility(
-                    QueueUrl=self.queue_url, ReceiptHandle=receipt_handle, VisibilityTimeout=1800
-                )
                 out.append((worker_message, receipt_handle))
             except Exception:
                 logger.exception("failed to process message")
@@ -68,12 +85,22 @@ class SQSQueueService(QueueService):
     def publish_message(self, message: WorkerMessage):
         self.sqs.send_message(QueueUrl=self.queue_url, MessageBody=message.model_dump_json())
 
+    def publish_messages(self, messages: list[WorkerMessage]):
+        for entries in batch_entries((message.model_dump_json() for message in messages), "MessageBody"):
+            log_batch_failures("send_message", self.sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries))
+
     def complete_message(self, receipt_handle: Any):
         try:
             self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
         except self.sqs.exceptions.ReceiptHandleIsInvalid:
             logger.warning("ReceiptHandleIsInvalid raised when completing message")
 
+    def complete_messages(self, receipt_handles: list[Any]):
+        for entries in batch_entries(receipt_handles, "ReceiptHandle"):
+            log_batch_failures(
+                "delete_message", self.sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            )
+
     def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):
         try:
             self.sqs.send_message(QueueUrl=self.dead_letter_queue_url, MessageBody=message.model_dump_json())
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import Any
+
+import aioboto3
+
+from common.services.queue_services.base import MAX_DELAY_SECONDS, AsyncQueueService
+from common.services.queue_services.sqs import batch_entries, get_sqs_client_kwargs, log_batch_failures
+from common.settings import get_settings
+from common.types import WorkerMessage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class AsyncSQSQueueService(AsyncQueueService):
+    name = "sqs"
+
+    def __init__(
+        self,
+        queue_name: str,
+        deadletter_queue_name: str,
+        polling_interval: int = 20,
+    ):
+        self.queue_name = queue_name
+        self.deadletter_queue_name = deadletter_queue_name
+        self.polling_interval = polling_interval
+        # the aioboto3 client is bound to the event loop it is created on, so it is opened lazily on first use
+        self._exit_stack: AsyncExitStack | None = None
+        self._sqs: Any = None
+        self._client_lock = asyncio.Lock()
+        self.queue_url: str | None = None
+        self.dead_letter_queue_url: str | None = None
+
+    def __reduce__(self):
+        """Required so that Ray can deserialize the queue service by instantiated a new one."""
+        return AsyncSQSQueueService, (self.queue_name, self.deadletter_queue_name, self.polling_interval)
+
+    async def _get_client(self) -> Any:
+        async with self._client_lock:
+            if self._sqs is None:
+                exit_stack = AsyncExitStack()
+                sqs = await exit_stack.enter_async_context(aioboto3.Session().client("sqs", **get_sqs_client_kwargs()))
+                self.queue_url = (await sqs.get_queue_url(QueueName=self.queue_name))["QueueUrl"]
+                self.dead_letter_queue_url = (await sqs.get_queue_url(QueueName=self.deadletter_queue_name))["QueueUrl"]
+                self._exit_stack = exit_stack
+                self._sqs = sqs
+        return self._sqs
+
+    async def close(self) -> None:
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self._sqs = None
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        sqs = await self._get_client()
+        response = await sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=max_messages,
+            WaitTimeSeconds=self.polling_interval,  # Long polling
+            VisibilityTimeout=settings.QUEUE_VISIBILITY_TIMEOUT,
+        )
+
+        messages = response.get("Messages", [])
+        out = []
+        for message in messages:
+            receipt_handle = message["ReceiptHandle"]
+            try:
+                worker_message = WorkerMessage.model_validate_json(message["Body"])
+                out.append((worker_message, receipt_handle))
+            except Exception:
+                logger.exception("failed to process message")
+        return out
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0):
+        sqs = await self._get_client()
+        await sqs.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=message.model_dump_json(),
+            DelaySeconds=min(delay_seconds, MAX_DELAY_SECONDS),
+        )
+
+    async def publish_messages(self, messages: list[WorkerMessage]):
+        sqs = await self._get_client()
+        for entries in batch_entries((message.model_dump_json() for message in messages), "MessageBody"):
+            log_batch_failures("send_message", await sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries))
+
+    async def complete_message(self, receipt_handle: Any):
+        sqs = await self._get_client()
+        try:
+            await sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
+        except sqs.exceptions.ReceiptHandleIsInvalid:
+            logger.warning("ReceiptHandleIsInvalid raised when completing message")
+
+    async def complete_messages(self, receipt_handles: list[Any]):
+        sqs = await self._get_client()
+        for entries in batch_entries(receipt_handles, "ReceiptHandle"):
+            log_batch_failures(
+                "delete_message", await sqs.delete_message_batch(QueueUrl=self.queue_url, Entries=entries)
+            )
+
+    async def deadletter_message(self, message: WorkerMessage, receipt_handle: Any):
+        sqs = await self._get_client()
+        try:
+            await sqs.send_message(QueueUrl=self.dead_letter_queue_url, MessageBody=message.model_dump_json())
+            await sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt_handle)
+        except sqs.exceptions.ReceiptHandleIsInvalid:
+            logger.warning("ReceiptHandleIsInvalid raised when deadlettering message. Message=%s", message.model_dump())
+
+    async def abandon_message(self, receipt_handle: Any):
+        sqs = await self._get_client()
+        try:
+            await sqs.change_message_visibility(
+                QueueUrl=self.queue_url, ReceiptHandle=receipt_handle, VisibilityTimeout=0
+            )
+        except sqs.exceptions.ReceiptHandleIsInvalid:
+            logger.warning("ReceiptHandleIsInvalid raised when abandoning message")
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int):
+        sqs = await self._get_client()
+        for entries in batch_entries(receipt_handles, "ReceiptHandle"):
+            for entry in entries:
+                entry["VisibilityTimeout"] = visibility_timeout
+            log_batch_failures(
+                "change_message_visibility",
+                await sqs.change_message_visibility_batch(QueueUrl=self.queue_url, Entries=entries),
+            )
+
+    async def approximate_message_count(self) -> int:
+        sqs = await self._get_client()
+        response = await sqs.get_queue_attributes(
+            QueueUrl=self.queue_url, AttributeNames=["ApproximateNumberOfMessages"]
+        )
+        return int(response["Attributes"]["ApproximateNumberOfMessages"])
+
+    async def purge_messages(self):
+        sqs = await self._get_client()
+        await sqs.purge_queue(QueueUrl=self.queue_url)
@@ -9,6 +9,8 @@ from common.database.postgres_database import SessionLocal
 from common.database.postgres_models import Chat, JobStatus, Minute, Transcription
 from common.generate_meeting_title import generate_meeting_title
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.response_cache import response_cache_scope
+from common.llm.telemetry import llm_job_scope
 from common.prompts import get_chat_with_transcript_system_message
 from common.services.exceptions import InteractionFailedError, TranscriptionFailedError
 from common.services.transcription_services.transcription_manager import TranscriptionServiceManager
@@ -77,7 +79,8 @@ class TranscriptionHandlerService:
                             }
                         )
 
-                chat_response = await chatbot.chat(messages=chat_history)
+                async with llm_job_scope("interactive", chat_id):
+                    chat_response = await chatbot.chat(messages=chat_history)
                 chat_response = combine_consecutive_citations(chat_response)
                 chat.assistant_content = chat_response
                 chat.status = JobStatus.COMPLETED
@@ -163,8 +166,10 @@ class TranscriptionHandlerService:
                 transcription_job = await transcription_manager.perform_transcription_steps(transcription=transcription)
 
             if transcription_job.transcript:
-                dialogue_entries = await cls.identify_speakers(transcription_job.transcript)
-                meeting_title = await generate_meeting_title(transcript=dialogue_entries)
+                async with llm_job_scope("transcription", transcription.id):
+                    with response_cache_scope(transcription.user_id):
+                        dialogue_entries = await cls.identify_speakers(transcription_job.transcript)
+                        meeting_title = await generate_meeting_title(transcript=dialogue_entries)
                 cls.update_transcription(
                     transcription.id, status=JobStatus.COMPLETED, transcript=dialogue_entries, title=meeting_title
                 )
@@ -46,13 +46,13 @@ class AWSTranscribeAdapter(TranscriptionAdapter):
 
     @classmethod
     async def check(
-        cls, data: TranscriptionJobMessageData, retry_count: int = 5, retry_delay: int = 5
+        cls, data: TranscriptionJobMessageData, retry_count: int = 1, retry_delay: int = 5
     ) -> TranscriptionJobMessageData:
-        # Poll for completion
-        for _ in range(retry_count):
+        # Probe the job once by default, pending jobs are re-checked later via a delayed queue message
+        for attempt in range(retry_count):
             s3 = boto3.client("s3", region_name=settings.AWS_REGION)
             transcribe = boto3.client("transcribe", region_name=settings.AWS_REGION)
-            status = transcribe.get_transcription_job(TranscriptionJobName=data.job_name)
+            status = await asyncio.to_thread(transcribe.get_transcription_job, TranscriptionJobName=data.job_name)
             job_status = status["TranscriptionJob"]["TranscriptionJobStatus"]
 
             if job_status == "COMPLETED":
@@ -78,7 +78,7 @@ class AWSTranscribeAdapter(TranscriptionAdapter):
                 failure_reason = status["TranscriptionJob"].get("FailureReason", "Unknown error")
                 msg = f"Transcription job failed: {failure_reason}"
                 raise ValueError(msg)
-            else:
+            elif attempt < retry_count - 1:
                 await asyncio.sleep(retry_delay)
 
         return data
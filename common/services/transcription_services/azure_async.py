@@ -174,10 +174,10 @@ class AzureBatchTranscriptionAdapter(TranscriptionAdapter):
         stop=stop_after_attempt(5),
     )
     async def check(
-        cls, data: TranscriptionJobMessageData, retry_count: int = 5, retry_delay: int = 5
+        cls, data: TranscriptionJobMessageData, retry_count: int = 1, retry_delay: int = 5
     ) -> TranscriptionJobMessageData:
-        # Poll for completion
-        for _ in range(retry_count):
+        # Probe the job once by default, pending jobs are re-checked later via a delayed queue message
+        for attempt in range(retry_count):
             async with httpx.AsyncClient(timeout=timeout_settings) as client:
                 job_response = await client.get(data.job_name, headers=headers, params=params)
                 if job_response.status_code != 200:  # noqa: PLR2004
@@ -194,7 +194,7 @@ class AzureBatchTranscriptionAdapter(TranscriptionAdapter):
                     case None:
                         msg = f"no status in response {job_response.json()}"
                         raise ValueError(msg)
-                    case _:
+                    case _ if attempt < retry_count - 1:
                         await asyncio.sleep(retry_delay)
         return data
 
@@ -0,0 +1,18 @@
+from common.services.queue_services.base import MAX_DELAY_SECONDS
+from common.types import TranscriptionJobMessageData
+
+MIN_POLL_DELAY_SECONDS = 15
+# batch transcription services typically finish in a small fraction of the recording's length, so the first check
+# is scheduled after this fraction of the duration and each check after that waits twice as long as the previous one
+EXPECTED_PROCESSING_RATIO = 0.05
+
+
+def get_poll_delay_seconds(data: TranscriptionJobMessageData) -> int:
+    """Seconds to wait before checking on a pending asynchronous transcription job again.
+
+    The delay starts proportional to the length of the recording and doubles with every check that finds the job
+    still pending, capped at the longest delay the queue services support.
+    """
+    base_delay = max((data.audio_duration_seconds or 0) * EXPECTED_PROCESSING_RATIO, MIN_POLL_DELAY_SECONDS)
+    delay = base_delay * 2 ** min(data.poll_count, 16)
+    return int(min(delay, MAX_DELAY_SECONDS))
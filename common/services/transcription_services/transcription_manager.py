@@ -5,7 +5,7 @@ from pathlib import Path
 
 import sentry_sdk
 
-from common.audio.ffmpeg import convert_to_mp3, get_duration, get_num_audio_channels
+from common.audio.ffmpeg import convert_to_mp3, get_duration, get_num_audio_channels, run_in_audio_process_pool
 from common.convert_american_to_british_spelling import convert_american_to_british_spelling
 from common.database.postgres_database import SessionLocal
 from common.database.postgres_models import Recording, Transcription
@@ -97,6 +97,7 @@ class TranscriptionServiceManager:
                     msg = "adapter not recognised"
                     raise RuntimeError(msg)
 
+        transcription_job = transcription_job.model_copy(update={"audio_duration_seconds": duration_seconds})
         if not transcription_job.transcript:
             transcription_job = await self.check_transcription(adapter.name, transcription_job)
         return transcription_job
@@ -105,16 +106,17 @@ class TranscriptionServiceManager:
     async def get_recording_to_process(
         cls, recording: Recording, temp_file_path: Path, file_extension: str
     ) -> tuple[Recording, Path, float]:
-        num_channels = get_num_audio_channels(temp_file_path)
+        pool_size = settings.MAX_TRANSCRIPTION_TASKS_PER_PROCESS
+        num_channels = await run_in_audio_process_pool(pool_size, get_num_audio_channels, temp_file_path)
         if file_extension in SUPPORTED_FORMATS and num_channels == 1:
-            duration = get_duration(temp_file_path)
+            duration = await run_in_audio_process_pool(pool_size, get_duration, temp_file_path)
             return recording, temp_file_path, duration
 
         with sentry_sdk.start_transaction(op="process", name="convert_mp3") as transaction:
             transaction.set_data("file_extension", file_extension)
-            new_file_path = convert_to_mp3(temp_file_path)
+            new_file_path = await run_in_audio_process_pool(pool_size, convert_to_mp3, temp_file_path)
 
-        duration = get_duration(new_file_path)
+        duration = await run_in_audio_process_pool(pool_size, get_duration, new_file_path)
 
         new_recording_id = uuid.uuid4()
         new_s3_key = str(Path(recording.s3_file_key).with_name(f"{new_recording_id}.mp3"))
@@ -1,5 +1,8 @@
 import logging
+import tempfile
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal
 
 import dotenv
 from i_dot_ai_utilities.logging.structured_logger import StructuredLogger
@@ -60,12 +63,47 @@ class Settings(BaseSettings):
     LLM_DEADLETTER_QUEUE_NAME: str = Field(
         description="deadletter queue name to use for SQS. Ignored if using Azure Service Bus "
     )
+    INTERACTIVE_QUEUE_NAME: str | None = Field(
+        description="queue name for interactive chat messages, so they never wait behind minute generation. If not "
+        "set, they share the LLM queue",
+        default=None,
+    )
+    INTERACTIVE_DEADLETTER_QUEUE_NAME: str | None = Field(
+        description="deadletter queue name for interactive chat messages. Ignored if using Azure Service Bus",
+        default=None,
+    )
 
     AZURE_SPEECH_KEY: str = Field(description="Azure STT speech key for API")
     AZURE_SPEECH_REGION: str = Field(description="Region for Azure STT")
 
-    MAX_TRANSCRIPTION_PROCESSES: int = Field(description="the number of transcription workers per node", default=1)
-    MAX_LLM_PROCESSES: int = Field(description="the number of LLM workers per node", default=1)
+    MAX_TRANSCRIPTION_PROCESSES: int = Field(
+        description="the maximum number of transcription workers per node, scaled up to when the queue backs up",
+        default=1,
+    )
+    MIN_TRANSCRIPTION_PROCESSES: int = Field(
+        description="the number of transcription workers per node kept running while the queue is idle", default=1
+    )
+    MAX_TRANSCRIPTION_TASKS_PER_PROCESS: int = Field(
+        description="the maximum number of transcription messages each transcription worker processes concurrently",
+        default=1,
+    )
+    MAX_LLM_PROCESSES: int = Field(
+        description="the maximum number of LLM workers per node, scaled up to when the queue backs up", default=1
+    )
+    MIN_LLM_PROCESSES: int = Field(
+        description="the number of LLM workers per node kept running while the queue is idle", default=1
+    )
+    AUTOSCALE_INTERVAL_SECONDS: int = Field(
+        description="how often the worker samples queue depth to decide whether to add or retire workers", default=30
+    )
+    MAX_LLM_TASKS_PER_PROCESS: int = Field(
+        description="the maximum number of LLM messages each LLM worker processes concurrently", default=10
+    )
+    MAX_INTERACTIVE_TASKS_PER_PROCESS: int = Field(
+        description="the number of additional slots each LLM worker reserves for interactive chat messages. Only used "
+        "if INTERACTIVE_QUEUE_NAME is set",
+        default=2,
+    )
 
     # if using Azure OpenAI
     AZURE_DEPLOYMENT: str | None = Field(description="Azure deployment for openAI", default=None)
@@ -92,8 +130,9 @@ class Settings(BaseSettings):
     )
 
     FAST_LLM_PROVIDER: str = Field(
-        description="Fast LLM provider to use. Currently 'openai' or 'gemini' are supported. Note that this should be "
-        "used for low complexity LLM tasks, like AI edits",
+        description="Fast LLM provider to use. Currently 'openai' or 'gemini' are supported, or 'fake' for a local "
+        "stand-in configured by the FAKE_LLM_ settings. Note that this should be used for low complexity LLM tasks, "
+        "like AI edits",
         default="gemini",
     )
     FAST_LLM_MODEL_NAME: str = Field(
@@ -101,8 +140,9 @@ class Settings(BaseSettings):
         default="gemini-3.5-flash",
     )
     BEST_LLM_PROVIDER: str = Field(
-        description="Best LLM provider to use. Currently 'openai' or 'gemini' are supported. Note that this should be "
-        "used for higher complexity LLM tasks, like initial minute generation.",
+        description="Best LLM provider to use. Currently 'openai' or 'gemini' are supported, or 'fake' for a local "
+        "stand-in configured by the FAKE_LLM_ settings. Note that this should be used for higher complexity LLM tasks, "
+        "like initial minute generation.",
         default="gemini",
     )
     BEST_LLM_MODEL_NAME: str = Field(
@@ -110,6 +150,96 @@ class Settings(BaseSettings):
         "initial minute generation.",
         default="gemini-3.5-flash",
     )
+    FAST_LLM_FALLBACK_PROVIDER: str | None = Field(
+        description="Provider the fast LLM fails over to while it is erroring, for example 'openai' for the configured "
+        "Azure OpenAI deployment. No failover if not set",
+        default=None,
+    )
+    FAST_LLM_FALLBACK_MODEL_NAME: str | None = Field(
+        description="Model name the fast LLM fails over to while it is erroring", default=None
+    )
+    BEST_LLM_FALLBACK_PROVIDER: str | None = Field(
+        description="Provider the best LLM fails over to while it is erroring. No failover if not set", default=None
+    )
+    BEST_LLM_FALLBACK_MODEL_NAME: str | None = Field(
+        description="Model name the best LLM fails over to while it is erroring", default=None
+    )
+    FAKE_LLM_LATENCY_SECONDS: float = Field(
+        description="Mean seconds the fake LLM takes before it starts responding", default=0.0
+    )
+    FAKE_LLM_LATENCY_DISTRIBUTION: Literal["fixed", "exponential", "lognormal"] = Field(
+        description="Distribution of the fake LLM's time to respond around FAKE_LLM_LATENCY_SECONDS", default="fixed"
+    )
+    FAKE_LLM_TOKENS_PER_SECOND: float | None = Field(
+        description="Rate the fake LLM generates output tokens at, adding to its latency. Instant if not set",
+        default=None,
+    )
+    FAKE_LLM_COMPLETION_TOKENS: int = Field(
+        description="Approximate length in tokens of the fake LLM's chat responses", default=200
+    )
+    FAKE_LLM_RATE_LIMIT_RATE: float = Field(
+        description="Fraction of fake LLM requests that fail with a 429 rate limit error", default=0.0
+    )
+    FAKE_LLM_TIMEOUT_RATE: float = Field(
+        description="Fraction of fake LLM requests that fail with a timeout after their latency", default=0.0
+    )
+    FAKE_LLM_SEED: int | None = Field(
+        description="Seed for the fake LLM's latencies and errors, to make a load test reproducible", default=None
+    )
+    LLM_PRICES_PER_MILLION_TOKENS: dict[str, tuple[float, float]] = Field(
+        description="Price of a million prompt and completion tokens for each model name, used to estimate the cost "
+        'of each LLM call, for example {"gemini-3.5-flash": [0.3, 2.5]}. Calls to other models have no cost recorded',
+        default_factory=dict,
+    )
+    LLM_RESPONSE_CACHE_ENABLED: bool = Field(
+        description="Cache LLM responses made while generating minutes and processing transcriptions, so retries and "
+        "regenerations do not repeat the same calls",
+        default=False,
+    )
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = Field(
+        description="Seconds a cached LLM response is kept. Keep this shorter than the shortest data retention period",
+        default=24 * 60 * 60,
+    )
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = Field(
+        description="The number of recently used LLM responses each worker process also keeps in memory", default=500
+    )
+    FAST_LLM_REQUESTS_PER_MINUTE: int | None = Field(
+        description="Requests per minute allowed to the fast LLM across every worker, or unlimited if not set. When "
+        "both tiers use the same model they share the best LLM's limits.",
+        default=None,
+    )
+    FAST_LLM_TOKENS_PER_MINUTE: int | None = Field(
+        description="Prompt tokens per minute allowed to the fast LLM across every worker, or unlimited if not set",
+        default=None,
+    )
+    BEST_LLM_REQUESTS_PER_MINUTE: int | None = Field(
+        description="Requests per minute allowed to the best LLM across every worker, or unlimited if not set",
+        default=None,
+    )
+    BEST_LLM_TOKENS_PER_MINUTE: int | None = Field(
+        description="Prompt tokens per minute allowed to the best LLM across every worker, or unlimited if not set",
+        default=None,
+    )
+    FAST_LLM_FALLBACK_REQUESTS_PER_MINUTE: int | None = Field(
+        description="Requests per minute allowed to the fast LLM's fallback across every worker, or unlimited if "
+        "not set",
+        default=None,
+    )
+    FAST_LLM_FALLBACK_TOKENS_PER_MINUTE: int | None = Field(
+        description="Prompt tokens per minute allowed to the fast LLM's fallback across every worker, or unlimited if "
+        "not set",
+        default=None,
+    )
+    BEST_LLM_FALLBACK_REQUESTS_PER_MINUTE: int | None = Field(
+        description="Requests per minute allowed to the best LLM's fallback across every worker, or unlimited if "
+        "not set",
+        default=None,
+    )
+    BEST_LLM_FALLBACK_TOKENS_PER_MINUTE: int | None = Field(
+        description="Prompt tokens per minute allowed to the best LLM's fallback across every worker, or unlimited if "
+        "not set",
+        default=None,
+    )
 
     STORAGE_SERVICE_NAME: str = Field(
         description="Storage service type to use for file uploads. Currently supported are: s3, azure-blob",
@@ -130,9 +260,26 @@ class Settings(BaseSettings):
     )
 
     QUEUE_SERVICE_NAME: str = Field(
-        description="Queue service type to communicate with worker. Currently supported are: sqs, azure-service-bus",
+        description="Queue service type to communicate with worker. Currently supported are: sqs, azure-service-bus, "
+        "local, postgres",
         default="sqs",
     )
+    QUEUE_VISIBILITY_TIMEOUT: int = Field(
+        description="Seconds a received message stays hidden from other workers. The worker renews this for as long as "
+        "the message is being processed, so it only bounds how quickly a message from a crashed worker is retried. "
+        "For azure-service-bus, the queue's lock duration should be at least this long.",
+        default=300,
+    )
+    WORKER_DRAIN_SECONDS: float = Field(
+        description="Seconds a stopping worker gives messages already in flight to finish before cancelling them and "
+        "returning them to the queue. Keep this inside the stop grace period of the worker container.",
+        default=7,
+    )
+    # if using local
+    LOCAL_QUEUE_DB_PATH: str = Field(
+        description="Path of the SQLite database backing the local queue. The app and worker must share this file",
+        default=str(Path(tempfile.gettempdir()) / "minute_local_queue.sqlite3"),
+    )
     # if using azure-service-bus
     AZURE_SB_CONNECTION_STRING: str | None = Field(description="Azure service bus connection string", default=None)
 
@@ -150,10 +297,36 @@ class Settings(BaseSettings):
     POSTHOG_HOST: str = Field(description="PostHog service host URL", default="https://eu.i.posthog.com")
 
     HALLUCINATION_CHECK: bool = Field(
-        description="Should the LLM check for hallucinations? Note that the results of"
-        " this are currently not surfaced in the UI",
+        description="Should the LLM check for hallucinations? Each minute version is checked once, against its "
+        "transcript, after it is completed. Note that the results of this are currently not surfaced in the UI",
         default=False,
     )
+    PARALLEL_SECTION_GENERATION: bool = Field(
+        description="Generate the sections of section based templates, like Cabinet, at the same time rather than one "
+        "after another. Each section is then written without seeing the sections before it",
+        default=False,
+    )
+    MAX_SINGLE_PASS_TRANSCRIPT_TOKENS: int = Field(
+        description="Estimated transcript tokens above which the transcript is condensed chunk by chunk before minutes "
+        "are generated from it, rather than being sent whole",
+        default=100_000,
+    )
+    TRANSCRIPT_CHUNK_TOKENS: int = Field(
+        description="Estimated tokens in each chunk of a transcript being condensed", default=20_000
+    )
+    TRANSCRIPT_CHUNK_OVERLAP_TOKENS: int = Field(
+        description="Estimated tokens of the previous chunk repeated at the start of each chunk, for context",
+        default=1_000,
+    )
+    FORM_QUESTIONS_PER_BATCH: int = Field(
+        description="The number of consecutive questions of a form template answered together in one LLM call. The "
+        "batches of a form are answered at the same time",
+        default=10,
+    )
+    MAX_CONCURRENT_SECTIONS: int = Field(
+        description="The maximum number of sections of one minute generated at once in parallel section generation",
+        default=4,
+    )
 
     MIN_WORD_COUNT_FOR_SUMMARY: int = Field(
         default=200, description="Transcript must have at least this many words to be passed to summary stage"
@@ -1,22 +1,89 @@
 import re
+from collections import defaultdict
 
 from common.database.postgres_models import DialogueEntry
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.telemetry import llm_stage
 from common.prompts import get_citations_prompt
+from common.types import CitationMap
+
+MAX_CITATIONS_PER_SENTENCE = 5
+
+# a sentence runs to the first run of closing punctuation followed by a space, or to the end of the line
+sentence_pattern = re.compile(r"\S.*?(?:[.!?]+(?=\s)|$)")
+closing_punctuation_pattern = re.compile(r"[.!?:;]*$")
+
+
+def split_sentences(draft: str) -> list[tuple[int, int, int]]:
+    """Find the sentences of a markdown draft that could be cited, leaving out headings and blank lines.
+
+    Returns:
+        The (line number, start, end) position of each sentence, in order.
+    """
+    sentences = []
+    for line_number, line in enumerate(draft.split("\n")):
+        if line.lstrip().startswith("#"):
+            continue
+        sentences.extend((line_number, match.start(), match.end()) for match in sentence_pattern.finditer(line))
+    return sentences
+
+
+def insert_citations(draft: str, citations: dict[int, list[int]]) -> str:
+    """Add citations to the end of sentences, before any closing punctuation, without changing any other text.
+
+    Args:
+        draft: the markdown draft.
+        citations: the transcript indexes supporting each sentence, by the sentence's position in `split_sentences`.
+    """
+    lines = draft.split("\n")
+    insertions = defaultdict(list)
+    for sentence_id, (line_number, start, end) in enumerate(split_sentences(draft)):
+        if not citations.get(sentence_id):
+            continue
+        sentence = lines[line_number][start:end]
+        position = start + closing_punctuation_pattern.search(sentence).start()
+        markers = "".join(f"[{index}]" for index in citations[sentence_id])
+        insertions[line_number].append((position, f" {markers}"))
+
+    # insert from the end of each line, so earlier positions are unaffected
+    for line_number, line_insertions in insertions.items():
+        line = lines[line_number]
+        for position, markers in sorted(line_insertions, reverse=True):
+            line = line[:position].rstrip() + markers + line[position:]
+        lines[line_number] = line
+    return "\n".join(lines)
 
 
 async def add_citations_to_minute(
     transcript: list[DialogueEntry],
     initial_draft: str,
 ) -> str:
-    chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-    messages = get_citations_prompt(initial_draft, transcript)
+    """Add citations to a draft, asking the model only which transcript items support which sentence.
+
+    The model never rewrites the draft, so it can't change it, and only writes as much as there are citations.
+    """
+    sentences = split_sentences(initial_draft)
+    if not sentences or not transcript:
+        return initial_draft
+    lines = initial_draft.split("\n")
+    numbered_sentences = "\n".join(
+        f"[{sentence_id}] {lines[line_number][start:end]}"
+        for sentence_id, (line_number, start, end) in enumerate(sentences)
+    )
 
-    minute = await chatbot.chat(messages)
+    chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+    with llm_stage("citations"):
+        citation_map = await chatbot.structured_chat(
+            get_citations_prompt(numbered_sentences, transcript), response_format=CitationMap
+        )
 
-    minute = combine_consecutive_citations(minute)
+    citations = {}
+    for sentence in citation_map.citations:
+        indexes = sorted({index for index in sentence.transcript_indexes if 0 <= index < len(transcript)})
+        if 0 <= sentence.sentence_id < len(sentences) and indexes:
+            citations[sentence.sentence_id] = indexes[:MAX_CITATIONS_PER_SENTENCE]
 
-    return minute or ""
+    return combine_consecutive_citations(insert_citations(initial_draft, citations))
 
 
 MAX_CITATION_DISTANCE = 2
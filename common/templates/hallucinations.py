@@ -0,0 +1,54 @@
+import re
+
+import markdownify
+
+from common.database.postgres_models import DialogueEntry
+from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.telemetry import llm_stage
+from common.prompts import get_hallucination_check_prompt
+from common.templates.map_reduce import condense_long_transcript
+from common.types import HallucinationCheck, LLMHallucination
+
+heading_pattern = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+async def check_minutes_for_hallucinations(
+    html_content: str, transcript: list[DialogueEntry]
+) -> list[LLMHallucination]:
+    """Check finished minutes against their transcript in a single pass, anchoring each hallucination to a section.
+
+    A transcript too long for a single pass is condensed first, as it was to generate the minutes, and numbered by the
+    original items the condensed ones came from so that the minutes' citations still refer to the right items.
+    """
+    minutes = markdownify.markdownify(html_content, heading_style=markdownify.ATX)
+    source_indexes = None
+    if (condensed := await condense_long_transcript(transcript)) is not None:
+        transcript, source_indexes = condensed
+    chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+    with llm_stage("hallucination_check"):
+        check = await chatbot.structured_chat(
+            get_hallucination_check_prompt(minutes, transcript, source_indexes), response_format=HallucinationCheck
+        )
+    return [anchor_to_section(hallucination, minutes) for hallucination in check.hallucinations]
+
+
+def anchor_to_section(hallucination: LLMHallucination, minutes: str) -> LLMHallucination:
+    """Make the section of a hallucination one of the headings in the minutes.
+
+    A section the model gave is kept if it matches a heading, ignoring case. Otherwise the section is the one the
+    hallucination's text is found in, or None if it can't be found.
+    """
+    headings = [(match.start(), match.group(1)) for match in heading_pattern.finditer(minutes)]
+    if hallucination.section is not None:
+        for _, heading in headings:
+            if heading.casefold() == hallucination.section.strip().strip("#").strip().casefold():
+                return hallucination.model_copy(update={"section": heading})
+
+    section = None
+    position = minutes.find(hallucination.hallucination_text) if hallucination.hallucination_text else -1
+    if position >= 0:
+        for start, heading in headings:
+            if start > position:
+                break
+            section = heading
+    return hallucination.model_copy(update={"section": section})
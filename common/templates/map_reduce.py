@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import re
+
+from common.database.postgres_models import DialogueEntry
+from common.format_transcript import transcript_as_speaker_and_utterance
+from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.telemetry import llm_stage
+from common.llm.tokens import estimate_tokens
+from common.prompts import get_condense_transcript_chunk_prompt
+from common.settings import get_settings
+from common.types import CondensedTranscriptChunk
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_CHUNKS = 4
+
+# with the spaces before it, so that a citation that is dropped leaves no gap behind
+citation_pattern = re.compile(r"([ \t]*)\[(\d+)(?:-(\d+))?\]")
+
+
+def estimate_transcript_tokens(transcript: list[DialogueEntry]) -> int:
+    return estimate_tokens([{"content": transcript_as_speaker_and_utterance(transcript)}])
+
+
+def chunk_transcript(
+    transcript: list[DialogueEntry], max_tokens: int, overlap_tokens: int
+) -> list[tuple[int, int, int]]:
+    """Split a transcript into chunks of about max_tokens, each starting with about overlap_tokens of the chunk before.
+
+    Returns:
+        (start, own_start, end) index ranges for each chunk, where the items from start to own_start are the overlap,
+        included only as context, and the items from own_start up to end belong to this chunk.
+    """
+    item_tokens = [estimate_transcript_tokens([entry]) for entry in transcript]
+    chunks = []
+    own_start = 0
+    while own_start < len(transcript):
+        start = own_start
+        overlap = 0
+        while start > 0 and overlap + item_tokens[start - 1] <= overlap_tokens:
+            start -= 1
+            overlap += item_tokens[start]
+        end = own_start
+        size = overlap
+        # always take at least one item, so a single very long utterance can't stall the split
+        while end < len(transcript) and (end == own_start or size + item_tokens[end] <= max_tokens):
+            size += item_tokens[end]
+            end += 1
+        chunks.append((start, own_start, end))
+        own_start = end
+    return chunks
+
+
+async def condense_chunk(
+    transcript: list[DialogueEntry], start: int, own_start: int, end: int
+) -> list[tuple[int, str]]:
+    """Condense one chunk into points, each tagged with the index in the full transcript it comes from."""
+    indexed_chunk = "\n".join(f"[{i}] {transcript[i]['speaker']}: {transcript[i]['text']}" for i in range(start, end))
+    chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+    condensed = await chatbot.structured_chat(
+        get_condense_transcript_chunk_prompt(indexed_chunk), response_format=CondensedTranscriptChunk
+    )
+    # points from the overlap belong to the chunk before, which saw those items with their full context
+    return [(point.source_index, point.text) for point in condensed.points if own_start <= point.source_index < end]
+
+
+async def condense_long_transcript(transcript: list[DialogueEntry]) -> tuple[list[DialogueEntry], list[int]] | None:
+    """Condense a transcript too long to generate minutes from in a single pass.
+
+    The transcript is split into overlapping chunks that are condensed concurrently (map), then the points are
+    reassembled in order as a shorter transcript that the existing templates run on unchanged (reduce).
+
+    Returns:
+        None if the transcript fits in a single pass. Otherwise the condensed transcript, and for each of its items the
+        index of the original item it came from, for `remap_citations`.
+    """
+    tokens = estimate_transcript_tokens(transcript)
+    if tokens <= settings.MAX_SINGLE_PASS_TRANSCRIPT_TOKENS:
+        return None
+
+    chunks = chunk_transcript(transcript, settings.TRANSCRIPT_CHUNK_TOKENS, settings.TRANSCRIPT_CHUNK_OVERLAP_TOKENS)
+    logger.info("Transcript of about %d tokens is too long for one pass, condensing %d chunks", tokens, len(chunks))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHUNKS)
+
+    async def condense(start: int, own_start: int, end: int) -> list[tuple[int, str]]:
+        async with semaphore:
+            return await condense_chunk(transcript, start, own_start, end)
+
+    with llm_stage("condense"):
+        condensed_chunks = await asyncio.gather(*(condense(*chunk) for chunk in chunks))
+    points = sorted((point for chunk in condensed_chunks for point in chunk), key=lambda point: point[0])
+    condensed_transcript = [
+        DialogueEntry(
+            speaker=transcript[index]["speaker"],
+            text=text,
+            start_time=transcript[index]["start_time"],
+            end_time=transcript[index]["end_time"],
+        )
+        for index, text in points
+    ]
+    return condensed_transcript, [index for index, _ in points]
+
+
+def remap_citations(text: str, source_indexes: list[int]) -> str:
+    """Point citations of a condensed transcript's items back at the original items they came from.
+
+    A citation that starts outside the condensed transcript can't be mapped and is dropped, and a range that ends
+    outside it is cut short at its last item.
+    """
+
+    def replace(match: re.Match) -> str:
+        whitespace, start, end = match.group(1), int(match.group(2)), int(match.group(3) or match.group(2))
+        if start >= len(source_indexes):
+            return ""
+        start, end = source_indexes[start], source_indexes[min(end, len(source_indexes) - 1)]
+        return f"{whitespace}[{start}]" if start == end else f"{whitespace}[{start}-{end}]"
+
+    return citation_pattern.sub(replace, text)
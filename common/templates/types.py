@@ -1,11 +1,13 @@
+import asyncio
 from typing import Protocol
 
 from common.database.postgres_models import DialogueEntry, Minute
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.transcript_context import PromptPrefix, TranscriptContext
 from common.prompts import get_section_for_agenda_prompt, string_to_system_message
 from common.settings import get_settings
 from common.templates.citations import add_citations_to_minute
-from common.types import AgendaUsage, MinuteAndHallucinations
+from common.types import AgendaUsage
 
 settings = get_settings()
 
@@ -14,7 +16,7 @@ class Template(Protocol):
     """Protocol for defining a template.
 
     This class describes the structure and required properties for templates,
-    as well as the necessary method for generating `MinuteAndHallucinations`.
+    as well as the necessary method for generating minutes.
     Templates are categorized with specific metadata such as name, description,
     and category.
 
@@ -36,17 +38,16 @@ class Template(Protocol):
     async def generate(
         cls,
         minute: Minute,
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         """
-        Asynchronously generates a Minute and any potential Hallucinations.
+        Asynchronously generates the minutes for a Minute.
 
         Args:
             minute (Minute): A `Minute` instance containing information for which
                 data is to be generated.
 
         Returns:
-            MinuteAndHallucinations: An object containing the processed Minute data
-                and the generated hallucination-related information.
+            str: The generated minutes.
         """
         ...
 
@@ -55,8 +56,8 @@ class SimpleTemplate(Template, Protocol):
     """Template class for generating prompts and processing results for AI-driven dialogue.
 
     This class defines methods for creating prompts from dialogue entries and optional
-    agendas, as well as handling the generation of structured outputs (like minutes)
-    and identifying hallucinations in AI outputs. The class is particularly useful for
+    agendas, as well as handling the generation of structured outputs (like minutes).
+    The class is particularly useful for
     workflows involving AI-generated summaries or structured text construction.
 
     Attributes:
@@ -92,15 +93,14 @@ class SimpleTemplate(Template, Protocol):
     async def generate(
         cls,
         minute: Minute,
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         chatbot = create_default_chatbot(FastOrBestLLM.BEST)
         minutes = await chatbot.chat(cls.prompt(minute.transcription.dialogue_entries, minute.agenda))
-        hallucinations = await chatbot.hallucination_check()
         if cls.citations_required:
             minutes = await add_citations_to_minute(
                 transcript=minute.transcription.dialogue_entries, initial_draft=minutes
             )
-        return minutes, hallucinations
+        return minutes
 
 
 class SectionTemplate(Template, Protocol):
@@ -111,7 +111,7 @@ class SectionTemplate(Template, Protocol):
     entries and agendas, processing them via a chatbot system, and
     optionally incorporating citations. It provides methods for generating
     prompts, creating sections, and generating a final structured draft
-    with additional features like hallucination check and citation
+    with additional features like citation
     inclusion. It is useful for elucidating more detail on the specified sections than the standard SimpleTemplate.
 
     Attributes:
@@ -163,29 +163,16 @@ class SectionTemplate(Template, Protocol):
     async def generate(
         cls,
         minute: Minute,
-    ) -> MinuteAndHallucinations:
+    ) -> str:
         transcript = minute.transcription.dialogue_entries
         sections = await cls.sections(transcript, minute.agenda)
-        # Generate content for each section
-        final_sections = []
-        all_hallucinations = []
-        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
-        for i, section in enumerate(sections):
-            if i == 0:
-                # use system message exactly once
-                section_contents = await chatbot.chat(
-                    [
-                        string_to_system_message(cls.system_prompt(transcript)),
-                        get_section_for_agenda_prompt(section),
-                    ]
-                )
-                final_sections.append(section_contents)
-                all_hallucinations = await chatbot.hallucination_check()
+        async with TranscriptContext(transcript) as context:
+            # the system prompt holds the transcript, so it is sent as a prefix the provider can cache between sections
+            prefix = context.prefix([string_to_system_message(cls.system_prompt(transcript))])
+            if settings.PARALLEL_SECTION_GENERATION:
+                final_sections = await cls.generate_sections_in_parallel(prefix, sections)
             else:
-                section_contents = await chatbot.chat([get_section_for_agenda_prompt(section)])
-                final_sections.append(section_contents)
-                hallucinations = await chatbot.hallucination_check()
-                all_hallucinations.extend(hallucinations)
+                final_sections = await cls.generate_sections_in_order(prefix, sections)
 
         initial_draft = "\n".join(final_sections)
         if cls.citations_required:
@@ -193,4 +180,27 @@ class SectionTemplate(Template, Protocol):
         else:
             final_minutes = initial_draft
 
-        return final_minutes, all_hallucinations
+        return final_minutes
+
+    @classmethod
+    async def generate_sections_in_order(cls, prefix: PromptPrefix, sections: list[str]) -> list[str]:
+        """Generate each section in one conversation, so every section is written knowing the ones before it."""
+        final_sections = []
+        chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+        for section in sections:
+            section_contents = await chatbot.chat([get_section_for_agenda_prompt(section)], prefix=prefix)
+            final_sections.append(section_contents)
+        return final_sections
+
+    @classmethod
+    async def generate_sections_in_parallel(cls, prefix: PromptPrefix, sections: list[str]) -> list[str]:
+        """Generate up to MAX_CONCURRENT_SECTIONS sections at once, each in its own conversation."""
+        semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_SECTIONS)
+
+        async def generate_section(section: str) -> str:
+            async with semaphore:
+                chatbot = create_default_chatbot(FastOrBestLLM.BEST)
+                return await chatbot.chat([get_section_for_agenda_prompt(section)], prefix=prefix)
+
+        # gather returns results in the order given, so the sections stay in agenda order
+        return list(await asyncio.gather(*(generate_section(section) for section in sections)))
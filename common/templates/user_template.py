@@ -1,10 +1,19 @@
+import asyncio
+import itertools
+from collections.abc import Sequence
+from typing import Any
+
 import markdownify
+from pydantic import BaseModel, Field, create_model
 
-from common.database.postgres_models import TemplateType, Transcription, UserTemplate
+from common.database.postgres_models import TemplateQuestion, TemplateType, Transcription, UserTemplate
 from common.format_transcript import transcript_as_speaker_and_utterance
 from common.llm.client import FastOrBestLLM, create_default_chatbot
+from common.llm.transcript_context import PromptPrefix, TranscriptContext
 from common.prompts import get_transcript_messages
-from common.types import LLMHallucination
+from common.settings import get_settings
+
+settings = get_settings()
 
 document_prompt = """<task>
 You are an expert meeting minutes writer with extensive experience across various sectors. \
@@ -38,7 +47,7 @@ Do not add additonal sections if they are not specified.
 
 form_prompt = """
 You are helping to fill out a form based on the provided transcript of a meeting. \
-Answer the current question based only on information found in the document.
+Answer each question based only on information found in the document.
 
 <transcript>
 {transcript}
@@ -47,32 +56,57 @@ Answer the current question based only on information found in the document.
 <style_guide>
 {style_guide}
 </style_guide>
+"""
 
-<previously_answered_questions>
-{previous_questions}
-</previously_answered_questions>
-
-<current_question>
-{current_question}
-</current_question>
+form_questions_prompt = """Answer each of these questions, putting each answer in the field with the same number.
 
-{question_description}
+<questions>
+{questions}
+</questions>
 """
 
 form_system_prompt = """Instructions:
 - Answer based solely on information in the transcript
 - Follow any specific instructions provided in the question description and style guide
 - If the document doesn't contain relevant information, respond with "Information not found in transcript"
-- Ensure your answer is consistent with previously answered questions
-- Do not repeat information already provided in previous answers unless directly relevant to this question
+- Ensure your answers are consistent with each other
+- Do not repeat information already provided in another answer unless directly relevant to the question
 - You provide only the direct answer to the question. \
 Do not include conversational phrases like "Sure!", "Here's the answer:", "Based on the document...", \
 or any other preamble. Simply provide the requested information."""
 
 
-async def generate_user_template(
-    template: UserTemplate, transcription: Transcription
-) -> tuple[str, list[LLMHallucination]]:
+def format_form_question(number: int, question: TemplateQuestion) -> str:
+    question_description = (
+        f"<question_description>{question.description.strip()}</question_description>"
+        if question.description.strip()
+        else ""
+    )
+    return f'<question number="{number}">\n{question.title}\n{question_description}\n</question>'
+
+
+def form_answers_model(questions: Sequence[TemplateQuestion]) -> type[BaseModel]:
+    """A response schema with one numbered answer field per question, described by the question it answers."""
+    fields: dict[str, Any] = {
+        f"answer_{number}": (str, Field(description=question.title))
+        for number, question in enumerate(questions, start=1)
+    }
+    return create_model("FormAnswers", **fields)
+
+
+async def answer_form_questions(prefix: PromptPrefix, questions: Sequence[TemplateQuestion]) -> list[str]:
+    """Answer a batch of questions in one structured call."""
+    chatbot = create_default_chatbot(FastOrBestLLM.FAST)
+    questions_text = "\n".join(format_form_question(number, question) for number, question in enumerate(questions, 1))
+    answers = await chatbot.structured_chat(
+        [{"role": "user", "content": form_questions_prompt.format(questions=questions_text)}],
+        response_format=form_answers_model(questions),
+        prefix=prefix,
+    )
+    return [getattr(answers, f"answer_{number}") for number in range(1, len(questions) + 1)]
+
+
+async def generate_user_template(template: UserTemplate, transcription: Transcription) -> str:
     if template.type == TemplateType.DOCUMENT:
         markdown_template = markdownify.markdownify(template.content, heading_style=markdownify.ATX)
 
@@ -87,42 +121,29 @@ async def generate_user_template(
             get_transcript_messages(transcription.dialogue_entries or []),
         ]
         chatbot = create_default_chatbot(FastOrBestLLM.BEST)
-        response = await chatbot.chat(messages)
-        hallucinations = await chatbot.hallucination_check()
-        return response, hallucinations
+        return await chatbot.chat(messages)
     else:
-        qa_pairs: list[tuple[str, str]] = []
-        for question in template.questions:
-            chatbot = create_default_chatbot(FastOrBestLLM.FAST)
-            if len(qa_pairs) > 0:
-                previous_questions = "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
-            else:
-                previous_questions = "This is the first question."
-
-            if question.description.strip():
-                question_description = f"<question_description>{question.description.strip()}</question_description>"
-            else:
-                question_description = ""
-
-            messages = [
-                {
-                    "role": "user",
-                    "content": form_system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": form_prompt.format(
-                        transcript=transcript_as_speaker_and_utterance(transcription.dialogue_entries or []),
-                        style_guide=template.content,
-                        previous_questions=previous_questions,
-                        current_question=question.title,
-                        question_description=question_description,
-                    ),
-                },
-            ]
-            resp = await chatbot.chat(messages)
-            qa_pairs.append((question.title, resp))
-
-        minute = "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
-
-        return minute, []
+        transcript = transcription.dialogue_entries or []
+        # neighbouring questions are usually about the same topic, so each batch is answered together for consistency,
+        # while the batches themselves are answered at the same time over the same cached transcript
+        batches = list(itertools.batched(template.questions, settings.FORM_QUESTIONS_PER_BATCH))
+        async with TranscriptContext(transcript) as context:
+            prefix = context.prefix(
+                [
+                    {"role": "user", "content": form_system_prompt},
+                    {
+                        "role": "user",
+                        "content": form_prompt.format(
+                            transcript=transcript_as_speaker_and_utterance(transcript), style_guide=template.content
+                        ),
+                    },
+                ]
+            )
+            answers = await asyncio.gather(*(answer_form_questions(prefix, batch) for batch in batches))
+
+        qa_pairs = zip(
+            (question.title for question in template.questions),
+            itertools.chain.from_iterable(answers),
+            strict=True,
+        )
+        return "\n\n".join(f"## {q}\n{a}" for (q, a) in qa_pairs)
@@ -1,5 +1,5 @@
 import uuid
-from datetime import datetime
+from datetime import UTC, datetime
 from enum import IntEnum, StrEnum, auto
 
 from pydantic import BaseModel, Field
@@ -159,6 +159,24 @@ class SpeakerPredictionOutput(BaseModel):
     predictions: list[SpeakerPrediction]
 
 
+class SentenceCitations(BaseModel):
+    sentence_id: int = Field(description="The id of the sentence in the meeting summary")
+    transcript_indexes: list[int] = Field(description="Indexes of the transcript items that support the sentence")
+
+
+class CitationMap(BaseModel):
+    citations: list[SentenceCitations]
+
+
+class CondensedPoint(BaseModel):
+    source_index: int = Field(description="The index of the transcript item this point comes from")
+    text: str = Field(description="The point, keeping any names, figures, decisions and actions")
+
+
+class CondensedTranscriptChunk(BaseModel):
+    points: list[CondensedPoint]
+
+
 class MinutesResponse(BaseModel):
     minutes: str
 
@@ -173,6 +191,7 @@ class TaskType(IntEnum):
     MINUTE = 2
     EDIT = 3
     INTERACTIVE = 4
+    HALLUCINATION_CHECK = 5
 
 
 class EditMessageData(BaseModel):
@@ -186,21 +205,36 @@ class TranscriptionJobMessageData(BaseModel):
         default="synchronous",
     )
     transcript: list[DialogueEntry] | None = Field(description="Transcript of the transcription", default=None)
+    audio_duration_seconds: float | None = Field(
+        description="Duration of the audio being transcribed, used to schedule status checks for asynchronous jobs",
+        default=None,
+    )
+    poll_count: int = Field(
+        description="Number of times an asynchronous job has been checked and found pending", default=0
+    )
 
 
 class WorkerMessage(BaseModel):
     id: uuid.UUID
     type: TaskType
     data: EditMessageData | TranscriptionJobMessageData | None = Field(default=None)
+    enqueued_at: datetime | None = Field(
+        description="When the message became available to workers, used to measure how long it waited on the queue",
+        default_factory=lambda: datetime.now(UTC),
+    )
 
 
 class LLMHallucination(BaseModel):
     hallucination_type: HallucinationType = Field(description="Type of hallucination")
     hallucination_text: str | None = Field(description="Text of hallucination", default=None)
     hallucination_reason: str | None = Field(description="Reason for hallucination", default=None)
+    section: str | None = Field(
+        description="Heading of the section of the minutes the hallucination is in", default=None
+    )
 
 
-MinuteAndHallucinations = tuple[str, list[LLMHallucination] | None]
+class HallucinationCheck(BaseModel):
+    hallucinations: list[LLMHallucination]
 
 
 class MeetingType(StrEnum):
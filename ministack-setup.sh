@@ -77,6 +77,30 @@ $AWS sqs set-queue-attributes \
     \"RedrivePolicy\": \"{\\\"deadLetterTargetArn\\\":\\\"$LLM_DEADLETTER_ARN\\\",\\\"maxReceiveCount\\\":\\\"4\\\"}\"
 }"
 
+##############################
+## INTERACTIVE QUEUE (optional)
+##############################
+
+if [ -n "${INTERACTIVE_QUEUE_NAME:-}" ]; then
+  INTERACTIVE_QUEUE_URL=$($AWS sqs create-queue --queue-name "$INTERACTIVE_QUEUE_NAME" --query QueueUrl --output text)
+  INTERACTIVE_DEADLETTER_QUEUE_URL=$($AWS sqs create-queue --queue-name "$INTERACTIVE_DEADLETTER_QUEUE_NAME" --query QueueUrl --output text)
+
+  echo "Interactive queue URL: $INTERACTIVE_QUEUE_URL"
+  echo "Purging $INTERACTIVE_QUEUE_URL"
+  $AWS sqs purge-queue --queue-url "$INTERACTIVE_QUEUE_URL"
+
+  INTERACTIVE_DEADLETTER_ARN=$($AWS sqs get-queue-attributes \
+    --queue-url "$INTERACTIVE_DEADLETTER_QUEUE_URL" \
+    --attribute-names QueueArn \
+    --query 'Attributes.QueueArn' --output text)
+
+  $AWS sqs set-queue-attributes \
+  --queue-url "$INTERACTIVE_QUEUE_URL" \
+  --attributes "{
+      \"RedrivePolicy\": \"{\\\"deadLetterTargetArn\\\":\\\"$INTERACTIVE_DEADLETTER_ARN\\\",\\\"maxReceiveCount\\\":\\\"4\\\"}\"
+  }"
+fi
+
 ##############################
 ## DATA BUCKET
 ##############################
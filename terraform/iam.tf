@@ -58,12 +58,15 @@ data "aws_iam_policy_document" "ecs_exec_custom_policy" {
       "sqs:SendMessage",
       "sqs:DeleteMessage",
       "sqs:ChangeMessageVisibility",
+      "sqs:GetQueueAttributes",
     ]
     resources = [
       aws_sqs_queue.transcription_queue.arn,
       aws_sqs_queue.transcription_queue_deadletter.arn,
       aws_sqs_queue.llm_queue.arn,
-      aws_sqs_queue.llm_queue_deadletter.arn
+      aws_sqs_queue.llm_queue_deadletter.arn,
+      aws_sqs_queue.interactive_queue.arn,
+      aws_sqs_queue.interactive_queue_deadletter.arn
     ]
   }
 }
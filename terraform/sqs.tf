@@ -41,3 +41,25 @@ resource "aws_sqs_queue_redrive_allow_policy" "llm_queue_redrive_allow_policy" {
     sourceQueueArns   = [aws_sqs_queue.llm_queue.arn]
   })
 }
+
+resource "aws_sqs_queue" "interactive_queue" {
+  name = "${local.name}-interactive-queue"
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.interactive_queue_deadletter.arn
+    maxReceiveCount     = 4
+  })
+}
+
+resource "aws_sqs_queue" "interactive_queue_deadletter" {
+  name = "${local.name}-interactive-queue-deadletter"
+}
+
+resource "aws_sqs_queue_redrive_allow_policy" "interactive_queue_redrive_allow_policy" {
+  queue_url = aws_sqs_queue.interactive_queue_deadletter.id
+
+  redrive_allow_policy = jsonencode({
+    redrivePermission = "byQueue",
+    sourceQueueArns   = [aws_sqs_queue.interactive_queue.arn]
+  })
+}
@@ -0,0 +1,58 @@
+import inspect
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from pydantic import BaseModel
+
+from common.llm.transcript_context import PromptPrefix
+
+Respond = Callable[[list[dict[str, str]], type[BaseModel] | None], Any]
+
+
+class FakeChatBot:
+    """Stands in for a ChatBot, answering each request with `respond(messages, response_format)`.
+
+    `respond` may be async. Requests are recorded, along with the most that were ever being answered at once.
+    """
+
+    def __init__(self, respond: Respond) -> None:
+        self.respond = respond
+        self.requests: list[tuple[list[dict[str, str]], type[BaseModel] | None]] = []
+        self.running = 0
+        self.max_running = 0
+
+    @property
+    def prompts(self) -> list[str]:
+        return [messages[-1]["content"] for messages, _ in self.requests]
+
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        prefix: PromptPrefix | None = None,  # noqa: ARG002
+    ) -> str:
+        return await self._answer(messages, None)
+
+    async def structured_chat(
+        self,
+        messages: list[dict[str, str]],
+        response_format: type[BaseModel],
+        prefix: PromptPrefix | None = None,  # noqa: ARG002
+    ) -> Any:
+        return await self._answer(messages, response_format)
+
+    async def _answer(self, messages: list[dict[str, str]], response_format: type[BaseModel] | None) -> Any:
+        self.requests.append((messages, response_format))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            response = self.respond(messages, response_format)
+            return await response if inspect.isawaitable(response) else response
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def fake_chatbot() -> Callable[[Respond], FakeChatBot]:
+    """Makes a fake ChatBot that answers with the given function, to patch in for `create_default_chatbot`."""
+    return FakeChatBot
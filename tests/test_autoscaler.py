@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from worker import autoscaler
+from worker.autoscaler import SCALE_DOWN_DELAY_SECONDS, ActorGroup, desired_actor_count
+
+
+def test_desired_actor_count_covers_waiting_and_in_flight_messages():
+    assert desired_actor_count(queue_depth=25, in_flight=10, slots_per_actor=10, min_actors=1, max_actors=8) == 4
+
+
+def test_desired_actor_count_stays_within_bounds():
+    assert desired_actor_count(queue_depth=0, in_flight=0, slots_per_actor=10, min_actors=1, max_actors=8) == 1
+    assert desired_actor_count(queue_depth=500, in_flight=10, slots_per_actor=10, min_actors=1, max_actors=8) == 8
+
+
+class FakeRemoteMethod:
+    """Stands in for an actor method, returning a future the test resolves in place of an ObjectRef."""
+
+    def __init__(self, result: object = None, resolved: bool = True) -> None:
+        self.result = result
+        self.resolved = resolved
+        self.futures: list[asyncio.Future] = []
+
+    def remote(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        if self.resolved:
+            future.set_result(self.result)
+        self.futures.append(future)
+        return future
+
+
+class FakeActor:
+    def __init__(self, in_flight: dict[str, int] | None = None) -> None:
+        self.process = FakeRemoteMethod(resolved=False)
+        self.retire = FakeRemoteMethod()
+        self.stop = FakeRemoteMethod()
+        self.in_flight = FakeRemoteMethod(result=in_flight or {})
+
+
+class FakeQueueService:
+    def __init__(self, depth: int = 0) -> None:
+        self.depth = depth
+
+    async def approximate_message_count(self) -> int:
+        return self.depth
+
+
+def make_group(queue_service: FakeQueueService, min_actors: int = 1, max_actors: int = 4) -> ActorGroup:
+    return ActorGroup("test", FakeActor, {"test": (queue_service, 10)}, min_actors, max_actors)
+
+
+@pytest.mark.asyncio
+async def test_failed_process_calls_are_restarted_on_the_same_actor():
+    group = make_group(FakeQueueService(), min_actors=2)
+    group.start()
+    failed_actor = group.actors[0]
+
+    failed_actor.process.futures[0].set_exception(RuntimeError("worker died"))
+    await asyncio.sleep(0)
+    group.check_actors()
+
+    assert len(failed_actor.process.futures) == 2
+    assert len(group.actors[1].process.futures) == 1
+    assert not group.futures[0].done()
+
+
+@pytest.mark.asyncio
+async def test_retired_actors_are_killed_only_once_they_have_finished(mocker):
+    kill = mocker.patch.object(autoscaler.ray, "kill")
+    group = make_group(FakeQueueService(), min_actors=2)
+    group.start()
+    retired_actor = group.actors[-1]
+
+    group.retire_actor()
+    group.check_actors()
+
+    assert len(retired_actor.retire.futures) == 1
+    assert group.actors == [group.actors[0]]
+    kill.assert_not_called()
+
+    retired_actor.process.futures[0].set_result(None)
+    await asyncio.sleep(0)
+    group.check_actors()
+
+    kill.assert_called_once_with(retired_actor)
+    assert not group.retiring
+    # a retired actor that finishes is not restarted
+    assert len(retired_actor.process.futures) == 1
+
+
+@pytest.mark.asyncio
+async def test_autoscale_adds_actors_for_waiting_and_in_flight_messages():
+    queue_service = FakeQueueService(depth=25)
+    group = make_group(queue_service)
+    group.start()
+
+    await group.autoscale()
+
+    assert len(group.actors) == 3
+    assert all(len(actor.process.futures) == 1 for actor in group.actors)
+
+
+@pytest.mark.asyncio
+async def test_autoscale_retires_one_actor_at_a_time_once_load_has_stayed_low(mocker):
+    mocker.patch.object(autoscaler.ray, "kill")
+    queue_service = FakeQueueService(depth=35)
+    group = make_group(queue_service)
+    group.start()
+    await group.autoscale()
+    assert len(group.actors) == 4
+
+    queue_service.depth = 0
+    await group.autoscale()
+    # load only just dropped, so every actor is kept
+    assert len(group.actors) == 4
+
+    group.last_busy -= SCALE_DOWN_DELAY_SECONDS
+    await group.autoscale()
+    await group.autoscale()
+    # the delay starts again after each retirement
+    assert len(group.actors) == 3
+    assert len(group.retiring) == 1
+
+
+@pytest.mark.asyncio
+async def test_each_lane_is_compared_with_its_own_queue_and_slots():
+    busy_actor = FakeActor(in_flight={"llm": 2, "interactive": 2})
+    group = ActorGroup(
+        "llm",
+        lambda: busy_actor,
+        {"llm": (FakeQueueService(depth=0), 10), "interactive": (FakeQueueService(depth=7), 2)},
+        min_actors=1,
+        max_actors=8,
+    )
+    group.start()
+
+    await group.autoscale()
+
+    # the interactive backlog needs (7 + 2) / 2 actors, however quiet the llm queue is
+    assert len(group.actors) == 5
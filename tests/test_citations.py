@@ -0,0 +1,61 @@
+from collections.abc import Callable
+
+import pytest
+from pydantic import BaseModel
+
+from common.database.postgres_models import DialogueEntry
+from common.templates import citations
+from common.types import CitationMap, SentenceCitations
+
+draft = """### Budget
+The budget was cut by half. Alice objected strongly!
+- Bob to revise the forecast
+
+### Attendees
+Alice, Bob"""
+
+
+def cite(mapping: dict[int, list[int]]) -> Callable[[list[dict[str, str]], type[BaseModel]], CitationMap]:
+    """Maps sentences to transcript items as given, whatever the sentences are."""
+    citation_map = CitationMap(
+        citations=[
+            SentenceCitations(sentence_id=sentence_id, transcript_indexes=indexes)
+            for sentence_id, indexes in mapping.items()
+        ]
+    )
+    return lambda _messages, _response_format: citation_map
+
+
+def test_sentences_leave_out_headings():
+    lines = draft.split("\n")
+
+    sentences = [lines[line_number][start:end] for line_number, start, end in citations.split_sentences(draft)]
+
+    assert sentences == [
+        "The budget was cut by half.",
+        "Alice objected strongly!",
+        "- Bob to revise the forecast",
+        "Alice, Bob",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_citations_are_inserted_without_changing_the_draft(mocker, fake_chatbot):
+    transcript = [DialogueEntry(speaker="Alice", text=f"item {i}", start_time=i, end_time=i + 1) for i in range(10)]
+    # sentence 1 cites an index outside the transcript, and sentence 9 does not exist
+    chatbot = fake_chatbot(cite({0: [3, 1, 2], 1: [4, 40], 2: [8], 9: [5]}))
+    mocker.patch.object(citations, "create_default_chatbot", return_value=chatbot)
+
+    cited = await citations.add_citations_to_minute(transcript, draft)
+
+    [prompt] = chatbot.prompts
+    assert "[0] The budget was cut by half." in prompt
+    assert "Budget\n" not in prompt.split("<meeting_summary>")[1]
+    assert cited == (
+        "### Budget\n"
+        "The budget was cut by half [1-3]. Alice objected strongly [4]!\n"
+        "- Bob to revise the forecast [8]\n"
+        "\n"
+        "### Attendees\n"
+        "Alice, Bob"
+    )
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+from common.llm.adapters import FailoverModelAdapter
+from common.llm.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from common.llm.transcript_context import PromptPrefix
+
+
+class ProviderError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(f"error {code}")
+        self.code = code
+
+
+class FakeAdapter:
+    """Answers with its own name, or fails with `error` while it is set."""
+
+    def __init__(self, name: str, error: Exception | None = None) -> None:
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:  # noqa: ARG002
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+
+class FakeRateLimiter:
+    """Counts what it is told, without ever making a request wait."""
+
+    def __init__(self) -> None:
+        self.acquired = 0
+        self.rate_limited = 0
+        self.successes = 0
+
+    async def acquire(self, tokens: int) -> None:  # noqa: ARG002
+        self.acquired += 1
+
+    def record_rate_limited(self) -> None:
+        self.rate_limited += 1
+
+    def record_success(self) -> None:
+        self.successes += 1
+
+
+def make_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(name, min_requests=2, failure_rate=0.5, open_seconds=0.05)
+
+
+@pytest.mark.asyncio
+async def test_requests_fail_over_and_skip_a_failing_model_until_it_recovers():
+    primary = FakeAdapter("primary", error=ProviderError(503))
+    secondary = FakeAdapter("secondary")
+    primary_breaker = make_breaker("primary")
+    adapter = FailoverModelAdapter([(primary, primary_breaker, None), (secondary, make_breaker("secondary"), None)])
+
+    assert [await adapter.chat([]) for _ in range(3)] == ["secondary"] * 3
+    # the breaker opened after two failures, so the third request went straight to the secondary
+    assert primary.calls == 2
+    assert primary_breaker.state == CircuitState.OPEN
+
+    primary.error = None
+    await asyncio.sleep(0.06)
+    # the first request after the open period is a probe, which closes the breaker when it succeeds
+    assert await adapter.chat([]) == "primary"
+    assert primary_breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_a_failed_probe_reopens_the_breaker():
+    breaker = make_breaker("primary")
+    breaker.record_failure()
+    breaker.record_failure()
+    await asyncio.sleep(0.06)
+
+    assert breaker.allow_request()
+    # only one probe is let through at a time
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_errors_are_raised_without_failing_over():
+    secondary = FakeAdapter("secondary")
+    primary_breaker = make_breaker("primary")
+    adapter = FailoverModelAdapter(
+        [
+            (FakeAdapter("primary", error=ProviderError(429)), primary_breaker, None),
+            (secondary, make_breaker("secondary"), None),
+        ]
+    )
+
+    with pytest.raises(ProviderError):
+        await adapter.chat([])
+    assert secondary.calls == 0
+    assert not primary_breaker.outcomes
+
+
+@pytest.mark.asyncio
+async def test_requests_are_not_sent_while_every_breaker_is_open():
+    primary = FakeAdapter("primary")
+    breaker = make_breaker("primary")
+    breaker.record_failure()
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenError):
+        await FailoverModelAdapter([(primary, breaker, None)]).chat([])
+    assert primary.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_each_model_is_rate_limited_by_its_own_limiter():
+    primary_limiter = FakeRateLimiter()
+    secondary_limiter = FakeRateLimiter()
+    secondary = FakeAdapter("secondary")
+    adapter = FailoverModelAdapter(
+        [
+            (FakeAdapter("primary", error=ProviderError(503)), make_breaker("primary"), primary_limiter),
+            (secondary, make_breaker("secondary"), secondary_limiter),
+        ]
+    )
+
+    assert await adapter.chat([]) == "secondary"
+    assert (primary_limiter.acquired, primary_limiter.successes) == (1, 0)
+    assert (secondary_limiter.acquired, secondary_limiter.successes) == (1, 1)
+
+    secondary.error = ProviderError(429)
+    with pytest.raises(ProviderError):
+        await adapter.chat([])
+    # only the fallback that was rate limited backs off
+    assert secondary_limiter.rate_limited == 1
+    assert primary_limiter.rate_limited == 0
+
+
+@pytest.mark.asyncio
+async def test_a_rate_limited_probe_lets_the_next_probe_through():
+    primary = FakeAdapter("primary", error=ProviderError(429))
+    breaker = make_breaker("primary")
+    breaker.record_failure()
+    breaker.record_failure()
+    await asyncio.sleep(0.06)
+    adapter = FailoverModelAdapter(
+        [(primary, breaker, None), (FakeAdapter("secondary"), make_breaker("secondary"), None)]
+    )
+
+    with pytest.raises(ProviderError):
+        await adapter.chat([])
+    primary.error = None
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert await adapter.chat([]) == "primary"
+    assert breaker.state == CircuitState.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_probe_lets_the_next_probe_through():
+    breaker = make_breaker("primary")
+    breaker.record_failure()
+    breaker.record_failure()
+    await asyncio.sleep(0.06)
+
+    class HangingAdapter(FakeAdapter):
+        async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:  # noqa: ARG002
+            await asyncio.sleep(10)
+            return self.name
+
+    request = asyncio.create_task(FailoverModelAdapter([(HangingAdapter("primary"), breaker, None)]).chat([]))
+    await asyncio.sleep(0.01)
+    request.cancel()
+    await asyncio.gather(request, return_exceptions=True)
+
+    assert breaker.allow_request()
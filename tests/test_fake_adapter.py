@@ -0,0 +1,100 @@
+import time
+
+import pytest
+
+from common.llm import client
+from common.llm.adapters import FakeModelAdapter
+from common.llm.rate_limiter import is_rate_limit_error
+from common.templates.default.cabinet import MeetingSections
+from common.types import HallucinationCheck, LLMHallucination, SpeakerPredictionOutput
+
+MESSAGES = [{"role": "user", "content": "Write the minutes of this meeting."}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "response_format", [SpeakerPredictionOutput, MeetingSections, HallucinationCheck, list[LLMHallucination]]
+)
+async def test_structured_responses_match_the_response_format(response_format):
+    adapter = FakeModelAdapter("load-test")
+
+    first = await adapter.structured_chat(MESSAGES, response_format)
+    second = await adapter.structured_chat(MESSAGES, response_format)
+
+    assert first == second
+    if isinstance(first, list):
+        assert all(isinstance(item, LLMHallucination) for item in first)
+    else:
+        assert isinstance(first, response_format)
+
+
+@pytest.mark.asyncio
+async def test_the_same_request_gets_the_same_response():
+    adapter = FakeModelAdapter("load-test", completion_tokens=50)
+
+    response = await adapter.chat(MESSAGES)
+
+    assert response.startswith("## ")
+    assert await FakeModelAdapter("load-test", completion_tokens=50, seed=1).chat(MESSAGES) == response
+    assert await adapter.chat([{"role": "user", "content": "Something else."}]) != response
+
+
+@pytest.mark.asyncio
+async def test_injected_errors_look_like_provider_errors():
+    rate_limited = FakeModelAdapter("load-test", rate_limit_rate=1.0)
+    timed_out = FakeModelAdapter("load-test", timeout_rate=1.0)
+
+    with pytest.raises(Exception) as error:  # noqa: PT011
+        await rate_limited.chat(MESSAGES)
+    assert is_rate_limit_error(error.value)
+    with pytest.raises(TimeoutError):
+        await timed_out.chat(MESSAGES)
+
+
+@pytest.mark.asyncio
+async def test_faults_are_reproducible_with_a_seed():
+    async def outcomes(adapter: FakeModelAdapter) -> list[bool]:
+        results = []
+        for _ in range(20):
+            try:
+                await adapter.chat(MESSAGES)
+                results.append(True)
+            except Exception:  # noqa: BLE001
+                results.append(False)
+        return results
+
+    first = await outcomes(FakeModelAdapter("load-test", rate_limit_rate=0.5, seed=7))
+    second = await outcomes(FakeModelAdapter("load-test", rate_limit_rate=0.5, seed=7))
+
+    assert first == second
+    assert any(first)
+    assert not all(first)
+
+
+@pytest.mark.asyncio
+async def test_latency_includes_generating_the_response():
+    adapter = FakeModelAdapter("load-test", latency_seconds=0.05, completion_tokens=20, tokens_per_second=1000)
+
+    start = time.monotonic()
+    await adapter.chat(MESSAGES)
+
+    assert time.monotonic() - start >= 0.05
+
+
+@pytest.mark.parametrize("distribution", ["fixed", "exponential", "lognormal"])
+def test_latencies_are_drawn_around_the_configured_mean(distribution):
+    adapter = FakeModelAdapter("load-test", latency_seconds=2.0, latency_distribution=distribution, seed=0)
+
+    latencies = [adapter.sample_latency() for _ in range(5000)]
+
+    assert sum(latencies) / len(latencies) == pytest.approx(2.0, rel=0.1)
+    assert (min(latencies) == max(latencies)) == (distribution == "fixed")
+
+
+def test_fake_provider_is_configured_from_settings(mocker):
+    mocker.patch.object(client.settings, "FAKE_LLM_LATENCY_SECONDS", 1.5)
+
+    adapter = client.create_adapter("fake", "load-test", temperature=0.0)
+
+    assert isinstance(adapter, FakeModelAdapter)
+    assert adapter.latency_seconds == 1.5
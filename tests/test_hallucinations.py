@@ -0,0 +1,84 @@
+from collections.abc import Callable
+
+import pytest
+from pydantic import BaseModel
+
+from common.database.postgres_models import DialogueEntry, HallucinationType
+from common.templates import hallucinations
+from common.types import HallucinationCheck, LLMHallucination
+
+minutes = """# Meeting
+
+Opening remarks.
+
+## Budget
+
+The budget was cut by half [2].
+
+## Actions
+
+ACTION 1: Alice to write the report
+"""
+
+
+def report(found: list[LLMHallucination]) -> Callable[[list[dict[str, str]], type[BaseModel]], HallucinationCheck]:
+    """Reports the same hallucinations for any minutes."""
+    return lambda _messages, _response_format: HallucinationCheck(hallucinations=found)
+
+
+def make_hallucination(text: str, section: str | None = None) -> LLMHallucination:
+    return LLMHallucination(
+        hallucination_type=HallucinationType.FACTUAL_FABRICATION,
+        hallucination_text=text,
+        hallucination_reason="not in the transcript",
+        section=section,
+    )
+
+
+def test_sections_given_by_the_model_are_matched_to_headings():
+    hallucination = make_hallucination("Alice to write the report", section="## actions")
+
+    assert hallucinations.anchor_to_section(hallucination, minutes).section == "Actions"
+
+
+def test_unknown_sections_are_found_from_the_hallucination_text():
+    hallucination = make_hallucination("The budget was cut by half", section="Finances")
+
+    assert hallucinations.anchor_to_section(hallucination, minutes).section == "Budget"
+
+
+def test_hallucinations_that_cannot_be_placed_have_no_section():
+    hallucination = make_hallucination("Bob resigned", section="Staffing")
+
+    assert hallucinations.anchor_to_section(hallucination, minutes).section is None
+
+
+@pytest.mark.asyncio
+async def test_minutes_are_checked_in_a_single_call(mocker, fake_chatbot):
+    chatbot = fake_chatbot(report([make_hallucination("The budget was cut by half")]))
+    mocker.patch.object(hallucinations, "create_default_chatbot", return_value=chatbot)
+    html_content = "<h2>Budget</h2><p>The budget was cut by half [2].</p><h2>Actions</h2><p>None</p>"
+    transcript = [DialogueEntry(speaker="Alice", text="The budget is unchanged.", start_time=0, end_time=1)]
+
+    found = await hallucinations.check_minutes_for_hallucinations(html_content, transcript)
+
+    assert len(chatbot.prompts) == 1
+    assert [hallucination.section for hallucination in found] == ["Budget"]
+
+
+@pytest.mark.asyncio
+async def test_long_transcripts_are_condensed_and_keep_their_original_numbering(mocker, fake_chatbot):
+    chatbot = fake_chatbot(report([]))
+    mocker.patch.object(hallucinations, "create_default_chatbot", return_value=chatbot)
+    transcript = [DialogueEntry(speaker="Alice", text=f"Item {i}.", start_time=i, end_time=i + 1) for i in range(10)]
+    condensed = [DialogueEntry(speaker="Bob", text="The budget is unchanged.", start_time=7, end_time=8)]
+
+    async def condense_long_transcript(_transcript: list[DialogueEntry]) -> tuple[list[DialogueEntry], list[int]]:
+        return condensed, [7]
+
+    mocker.patch.object(hallucinations, "condense_long_transcript", condense_long_transcript)
+
+    await hallucinations.check_minutes_for_hallucinations("<p>The budget is unchanged [7].</p>", transcript)
+
+    assert "[7] Bob: The budget is unchanged." in chatbot.prompts[0]
+    assert "Item 0." not in chatbot.prompts[0]
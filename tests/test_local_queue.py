@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+
+import pytest
+
+from common.services.queue_services.local import MAX_RECEIVE_COUNT, AsyncLocalQueueService, LocalQueueService
+from common.types import TaskType, WorkerMessage
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+
+@pytest.fixture
+def queue(db_path):
+    return LocalQueueService("test-queue", "test-queue-deadletter", polling_interval=0, db_path=db_path)
+
+
+@pytest.fixture
+def deadletter_queue(db_path):
+    return LocalQueueService("test-queue-deadletter", "unused", polling_interval=0, db_path=db_path)
+
+
+def make_message() -> WorkerMessage:
+    return WorkerMessage(id=uuid.uuid4(), type=TaskType.MINUTE)
+
+
+def test_completed_messages_are_not_redelivered(queue):
+    message = make_message()
+    queue.publish_message(message)
+
+    [(received, receipt_handle)] = queue.receive_message()
+    assert received == message
+    assert queue.receive_message() == []
+
+    queue.complete_message(receipt_handle)
+    queue.abandon_message(receipt_handle)
+    assert queue.receive_message() == []
+
+
+def test_consumers_never_receive_the_same_message(queue, db_path):
+    other_consumer = LocalQueueService("test-queue", "test-queue-deadletter", polling_interval=0, db_path=db_path)
+    queue.publish_messages([make_message() for _ in range(3)])
+
+    first = queue.receive_message(max_messages=2)
+    second = other_consumer.receive_message(max_messages=2)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert {message.id for message, _ in first}.isdisjoint(message.id for message, _ in second)
+
+
+def test_delayed_messages_are_hidden_until_due(queue):
+    queue.publish_message(make_message(), delay_seconds=60)
+    assert queue.receive_message() == []
+
+
+def test_messages_are_deadlettered_after_max_receive_count(queue, deadletter_queue):
+    message = make_message()
+    queue.publish_message(message)
+
+    for _ in range(MAX_RECEIVE_COUNT):
+        [(_, receipt_handle)] = queue.receive_message()
+        queue.abandon_message(receipt_handle)
+
+    assert queue.receive_message() == []
+    [(deadlettered, _)] = deadletter_queue.receive_message()
+    assert deadlettered == message
+
+
+@pytest.mark.asyncio
+async def test_async_receive_waits_for_published_messages(db_path):
+    queue = AsyncLocalQueueService("test-queue", "test-queue-deadletter", polling_interval=5, db_path=db_path)
+    message = make_message()
+
+    receive = asyncio.create_task(queue.receive_message())
+    await asyncio.sleep(0.3)
+    await queue.publish_message(message)
+
+    [(received, receipt_handle)] = await asyncio.wait_for(receive, 2)
+    assert received == message
+    await queue.complete_messages([receipt_handle])
@@ -0,0 +1,65 @@
+from itertools import pairwise
+
+import pytest
+from pydantic import BaseModel
+
+from common.database.postgres_models import DialogueEntry
+from common.templates import map_reduce
+from common.types import CondensedPoint, CondensedTranscriptChunk
+
+
+def make_transcript(count: int) -> list[DialogueEntry]:
+    return [
+        DialogueEntry(speaker=f"Speaker {i % 2}", text=f"utterance {i:03d} " * 10, start_time=i, end_time=i + 1)
+        for i in range(count)
+    ]
+
+
+def condense_every_item(messages: list[dict[str, str]], _response_format: type[BaseModel]) -> CondensedTranscriptChunk:
+    """Condenses every transcript item in the chunk into one point."""
+    lines = messages[-1]["content"].splitlines()[1:-1]
+    indexes = [int(line[1 : line.index("]")]) for line in lines]
+    return CondensedTranscriptChunk(points=[CondensedPoint(source_index=i, text=f"point {i}") for i in indexes])
+
+
+def test_chunks_cover_the_transcript_once_with_overlapping_context():
+    transcript = make_transcript(40)
+    item_tokens = map_reduce.estimate_transcript_tokens(transcript[:1])
+
+    chunks = map_reduce.chunk_transcript(transcript, max_tokens=item_tokens * 10, overlap_tokens=item_tokens * 2)
+
+    assert [own_start for _, own_start, _ in chunks] == [0, 10, 18, 26, 34]
+    assert [start for start, _, _ in chunks] == [0, 8, 16, 24, 32]
+    assert all(end == next_own_start for (_, _, end), (_, next_own_start, _) in pairwise(chunks))
+    assert chunks[-1][2] == 40
+
+
+@pytest.mark.asyncio
+async def test_short_transcripts_are_not_condensed(mocker):
+    mocker.patch.object(map_reduce.settings, "MAX_SINGLE_PASS_TRANSCRIPT_TOKENS", 10_000)
+
+    assert await map_reduce.condense_long_transcript(make_transcript(5)) is None
+
+
+@pytest.mark.asyncio
+async def test_overlapping_items_are_condensed_once_and_in_order(mocker, fake_chatbot):
+    transcript = make_transcript(40)
+    item_tokens = map_reduce.estimate_transcript_tokens(transcript[:1])
+    mocker.patch.object(map_reduce, "create_default_chatbot", return_value=fake_chatbot(condense_every_item))
+    mocker.patch.object(map_reduce.settings, "MAX_SINGLE_PASS_TRANSCRIPT_TOKENS", item_tokens * 20)
+    mocker.patch.object(map_reduce.settings, "TRANSCRIPT_CHUNK_TOKENS", item_tokens * 10)
+    mocker.patch.object(map_reduce.settings, "TRANSCRIPT_CHUNK_OVERLAP_TOKENS", item_tokens * 2)
+
+    condensed_transcript, source_indexes = await map_reduce.condense_long_transcript(transcript)
+
+    assert source_indexes == list(range(40))
+    assert [entry["text"] for entry in condensed_transcript] == [f"point {i}" for i in range(40)]
+    assert condensed_transcript[7]["start_time"] == transcript[7]["start_time"]
+
+
+def test_citations_are_remapped_to_the_original_transcript():
+    text = "The budget was agreed [1] after a long debate [0-2]. Unknown [9]. Cut short [1-9]."
+
+    assert map_reduce.remap_citations(text, [3, 17, 42]) == (
+        "The budget was agreed [17] after a long debate [3-42]. Unknown. Cut short [17-42]."
+    )
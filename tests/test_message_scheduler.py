@@ -0,0 +1,292 @@
+import asyncio
+import uuid
+from typing import Any
+
+import pytest
+
+from common.types import TaskType, WorkerMessage
+from worker import message_scheduler
+from worker.lease_manager import MessageLeaseManager
+from worker.message_scheduler import MessageScheduler
+from worker.request_batcher import PublishBatcher, SettlementBatcher
+
+
+class FakeQueueService:
+    """In-memory queue that records how many messages each receive asked for."""
+
+    name = "fake"
+
+    def __init__(self, messages: list[WorkerMessage]):
+        self.messages = list(messages)
+        self.requested: list[int] = []
+        self.extended: list[Any] = []
+        self.abandoned: list[Any] = []
+        self.completed: list[list[Any]] = []
+        self.published: list[list[WorkerMessage]] = []
+        self.delayed: list[tuple[WorkerMessage, int]] = []
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        self.requested.append(max_messages)
+        batch, self.messages = self.messages[:max_messages], self.messages[max_messages:]
+        if not batch:
+            await asyncio.sleep(0.01)
+        return [(message, message.id) for message in batch]
+
+    async def extend_messages_visibility(self, receipt_handles: list[Any], visibility_timeout: int) -> None:  # noqa: ARG002
+        self.extended.append(receipt_handles)
+
+    async def complete_messages(self, receipt_handles: list[Any]) -> None:
+        self.completed.append(receipt_handles)
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0) -> None:
+        self.delayed.append((message, delay_seconds))
+
+    async def publish_messages(self, messages: list[WorkerMessage]) -> None:
+        self.published.append(messages)
+
+    async def abandon_message(self, receipt_handle: Any) -> None:
+        self.abandoned.append(receipt_handle)
+
+
+def make_messages(count: int) -> list[WorkerMessage]:
+    return [WorkerMessage(id=uuid.uuid4(), type=TaskType.MINUTE) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_scheduler_never_exceeds_max_in_flight():
+    queue = FakeQueueService(make_messages(12))
+    handled = []
+    running = 0
+    max_running = 0
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        handled.append(message.id)
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=3)
+    while len(handled) < 12:
+        await scheduler.step(max_wait_seconds=1)
+    await scheduler.drain()
+
+    assert max_running == 3
+    assert all(requested <= 3 for requested in queue.requested)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_refills_only_the_freed_slots():
+    queue = FakeQueueService(make_messages(4))
+    release_fast = asyncio.Event()
+    slow_message = queue.messages[0]
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        if message.id == slow_message.id:
+            await asyncio.sleep(10)
+        else:
+            await release_fast.wait()
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=2)
+    await scheduler.step(max_wait_seconds=1)
+    assert len(scheduler.in_flight) == 2
+
+    release_fast.set()
+    await scheduler.step(max_wait_seconds=1)
+    # the slow message still holds its slot, so only one new message is requested
+    await scheduler.step(max_wait_seconds=1)
+    assert queue.requested == [2, 1]
+    for task in scheduler.in_flight:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_in_flight_messages():
+    queue = FakeQueueService(make_messages(2))
+    handled = []
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        await asyncio.sleep(0.01)
+        handled.append(message.id)
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=5)
+    await scheduler.step(max_wait_seconds=1)
+    await scheduler.drain()
+
+    assert len(handled) == 2
+    assert not scheduler.in_flight
+
+
+@pytest.mark.asyncio
+async def test_leases_are_renewed_until_the_handler_finishes():
+    queue = FakeQueueService(make_messages(1))
+    message_id = queue.messages[0].id
+
+    async def handler(_message: WorkerMessage, _receipt_handle: Any) -> None:
+        await asyncio.sleep(0.1)
+
+    lease_manager = MessageLeaseManager(queue, visibility_timeout=30, renew_interval=0.02)
+    scheduler = MessageScheduler(queue, handler, max_in_flight=1, lease_manager=lease_manager)
+    await scheduler.step(max_wait_seconds=1)
+    await scheduler.drain()
+
+    assert len(queue.extended) >= 2
+    assert all(extended == [message_id] for extended in queue.extended)
+    assert not lease_manager.held
+    assert not queue.abandoned
+
+
+@pytest.mark.asyncio
+async def test_cancelled_messages_are_abandoned():
+    queue = FakeQueueService(make_messages(1))
+    message_id = queue.messages[0].id
+
+    async def handler(_message: WorkerMessage, _receipt_handle: Any) -> None:
+        await asyncio.sleep(10)
+
+    lease_manager = MessageLeaseManager(queue, visibility_timeout=30)
+    scheduler = MessageScheduler(queue, handler, max_in_flight=1, lease_manager=lease_manager)
+    await scheduler.step(max_wait_seconds=1)
+    await asyncio.sleep(0)
+    for task in scheduler.in_flight:
+        task.cancel()
+    await asyncio.gather(*scheduler.in_flight, return_exceptions=True)
+
+    assert queue.abandoned == [message_id]
+    assert not lease_manager.held
+
+
+@pytest.mark.asyncio
+async def test_settlements_are_coalesced_into_batches():
+    queue = FakeQueueService([])
+    settlements = SettlementBatcher(queue, window_seconds=0.01, max_batch_size=3)
+
+    await asyncio.gather(*(settlements.complete_message(receipt_handle) for receipt_handle in range(5)))
+
+    assert queue.completed == [[0, 1, 2], [3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_publishes_are_coalesced_into_batches_unless_delayed():
+    queue = FakeQueueService([])
+    publishes = PublishBatcher(queue, window_seconds=0.01, max_batch_size=3)
+    messages = make_messages(4)
+
+    await asyncio.gather(
+        *(publishes.publish_message(message) for message in messages[:3]),
+        publishes.publish_message(messages[3], delay_seconds=30),
+    )
+
+    assert queue.published == [messages[:3]]
+    assert queue.delayed == [(messages[3], 30)]
+
+
+class IdleQueueService(FakeQueueService):
+    """A queue with nothing on it, whose receive long polls for far longer than any test runs."""
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        self.requested.append(max_messages)
+        await asyncio.sleep(60)
+        return []
+
+
+@pytest.mark.asyncio
+async def test_stop_event_cancels_a_waiting_receive():
+    queue = IdleQueueService([])
+    stop_event = asyncio.Event()
+
+    async def handler(_message: WorkerMessage, _receipt_handle: Any) -> None:
+        pass
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=1, stop_event=stop_event)
+    step = asyncio.create_task(scheduler.step(max_wait_seconds=60))
+    await asyncio.sleep(0.01)
+    stop_event.set()
+
+    await asyncio.wait_for(step, 1)
+    await asyncio.wait_for(scheduler.drain(), 1)
+    assert queue.requested == [1]
+
+
+@pytest.mark.asyncio
+async def test_drain_abandons_messages_still_running_at_the_deadline():
+    queue = FakeQueueService(make_messages(2))
+    fast_message, slow_message = queue.messages
+    stop_event = asyncio.Event()
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        if message.id == slow_message.id:
+            await asyncio.sleep(10)
+
+    lease_manager = MessageLeaseManager(queue, visibility_timeout=30)
+    scheduler = MessageScheduler(queue, handler, max_in_flight=2, stop_event=stop_event, lease_manager=lease_manager)
+    await scheduler.step(max_wait_seconds=1)
+    stop_event.set()
+    await asyncio.wait_for(scheduler.drain(deadline_seconds=0.05), 1)
+
+    assert queue.abandoned == [slow_message.id]
+    assert fast_message.id not in queue.abandoned
+    assert not scheduler.in_flight
+
+
+class SlowQueueService(FakeQueueService):
+    """A queue whose receive takes a little while to return its messages."""
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        await asyncio.sleep(0.05)
+        return await super().receive_message(max_messages)
+
+
+@pytest.mark.asyncio
+async def test_messages_received_while_stopping_are_abandoned_unstarted():
+    queue = SlowQueueService(make_messages(1))
+    message_id = queue.messages[0].id
+    stop_event = asyncio.Event()
+    handled = []
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        handled.append(message.id)
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=1, stop_event=stop_event)
+    stop_event.set()
+    await scheduler.step(max_wait_seconds=1)
+    # the receive returns after the worker was stopped, so its message is never dispatched
+    await asyncio.sleep(0.1)
+    await scheduler.drain()
+
+    assert queue.abandoned == [message_id]
+    assert not handled
+
+
+class FlakyQueueService(FakeQueueService):
+    """A queue whose first receive fails."""
+
+    def __init__(self, messages: list[WorkerMessage]):
+        super().__init__(messages)
+        self.failures = 1
+
+    async def receive_message(self, max_messages: int = 10) -> list[tuple[WorkerMessage, Any]]:
+        if self.failures:
+            self.failures -= 1
+            msg = "queue unavailable"
+            raise ConnectionError(msg)
+        return await super().receive_message(max_messages)
+
+
+@pytest.mark.asyncio
+async def test_a_failed_receive_is_retried_without_escaping_the_step(mocker):
+    mocker.patch.object(message_scheduler, "RECEIVE_RETRY_SECONDS", 0.01)
+    queue = FlakyQueueService(make_messages(2))
+    handled = []
+
+    async def handler(message: WorkerMessage, _receipt_handle: Any) -> None:
+        handled.append(message.id)
+
+    scheduler = MessageScheduler(queue, handler, max_in_flight=2)
+    for _ in range(5):
+        await scheduler.step(max_wait_seconds=1)
+    await scheduler.drain()
+
+    assert len(handled) == 2
+    assert not scheduler.in_flight
@@ -0,0 +1,196 @@
+"""Integration tests for the Postgres queue services.
+
+Each test runs against a throwaway database migrated to head, so the claim index and the notify trigger are the ones
+the migrations create.
+
+Requires a running Postgres instance reachable via the POSTGRES_* settings (e.g. `docker-compose up postgres`). The
+connecting user needs CREATEDB.
+"""
+
+import asyncio
+import time
+import uuid
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session
+
+import common.database.postgres_database as pgdb
+from alembic import command
+from alembic.config import Config
+from common.services.queue_services import postgres
+from common.services.queue_services.postgres import (
+    MAX_RECEIVE_COUNT,
+    POLL_STEP_SECONDS,
+    AsyncPostgresQueueService,
+    PostgresQueueService,
+)
+from common.settings import get_settings
+from common.types import TaskType, WorkerMessage
+
+settings = get_settings()
+
+QUEUE_NAME = "test-queue"
+DEADLETTER_QUEUE_NAME = "test-queue-deadletter"
+
+
+def _url(db_name: str, driver: str = "psycopg2") -> str:
+    return (
+        f"postgresql+{driver}://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+        f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{db_name}"
+    )
+
+
+@pytest.fixture
+def queue_db(monkeypatch):
+    """Create a throwaway DB at head, point the queue services at it, and drop it afterwards."""
+    maintenance_engine = sa.create_engine(_url("postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with maintenance_engine.connect() as conn:
+            conn.execute(sa.text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("Postgres is not reachable; this test requires docker-compose Postgres running.")
+
+    test_db_name = f"minute_queue_test_{uuid.uuid4().hex[:10]}"
+    with maintenance_engine.connect() as conn:
+        conn.execute(sa.text(f'CREATE DATABASE "{test_db_name}"'))
+
+    test_engine = sa.create_engine(_url(test_db_name))
+    monkeypatch.setattr(pgdb, "engine", test_engine)
+    monkeypatch.setattr(postgres, "engine", test_engine)
+    monkeypatch.setattr(postgres, "async_engine", create_async_engine(_url(test_db_name, "asyncpg")))
+    monkeypatch.setattr(postgres, "ASYNC_DATABASE_URL", _url(test_db_name, "asyncpg"))
+    command.upgrade(Config("alembic.ini"), "head")
+
+    try:
+        yield test_engine
+    finally:
+        test_engine.dispose()
+        with maintenance_engine.connect() as conn:
+            conn.execute(
+                sa.text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE datname = :name AND pid <> pg_backend_pid()"
+                ),
+                {"name": test_db_name},
+            )
+            conn.execute(sa.text(f'DROP DATABASE IF EXISTS "{test_db_name}"'))
+        maintenance_engine.dispose()
+
+
+@pytest.fixture
+def queue(queue_db) -> PostgresQueueService:  # noqa: ARG001
+    return PostgresQueueService(QUEUE_NAME, DEADLETTER_QUEUE_NAME, polling_interval=0)
+
+
+def make_message(task_type: TaskType) -> WorkerMessage:
+    return WorkerMessage(id=uuid.uuid4(), type=task_type)
+
+
+def test_background_checks_are_received_after_work_users_are_waiting_on(queue):
+    task_types = [
+        TaskType.HALLUCINATION_CHECK,
+        TaskType.MINUTE,
+        TaskType.INTERACTIVE,
+        TaskType.TRANSCRIPTION,
+        TaskType.EDIT,
+    ]
+    queue.publish_messages([make_message(task_type) for task_type in task_types])
+
+    received = queue.receive_message(max_messages=10)
+
+    assert [message.type for message, _ in received] == [
+        TaskType.INTERACTIVE,
+        TaskType.EDIT,
+        TaskType.MINUTE,
+        TaskType.TRANSCRIPTION,
+        TaskType.HALLUCINATION_CHECK,
+    ]
+
+
+def test_concurrent_receives_skip_messages_already_being_claimed(queue, queue_db):
+    queue.publish_messages([make_message(TaskType.MINUTE) for _ in range(4)])
+
+    with queue_db.connect() as connection:
+        # the first claim's rows stay locked until its transaction ends
+        claimed = connection.execute(queue.statements.claim(2)).all()
+        received = queue.receive_message(max_messages=10)
+        connection.rollback()
+
+    assert len(claimed) == 2
+    assert len(received) == 2
+    assert {uuid.UUID(row.message["id"]) for row in claimed}.isdisjoint(message.id for message, _ in received)
+
+
+def test_received_messages_are_hidden_until_completed_or_abandoned(queue):
+    message = make_message(TaskType.MINUTE)
+    queue.publish_message(message)
+
+    [(received, receipt_handle)] = queue.receive_message()
+    assert received.id == message.id
+    assert queue.receive_message() == []
+
+    queue.abandon_message(receipt_handle)
+    [(_, receipt_handle)] = queue.receive_message()
+    queue.complete_message(receipt_handle)
+    queue.abandon_message(receipt_handle)
+    assert queue.receive_message() == []
+
+
+def test_delayed_messages_are_not_received_early(queue):
+    queue.publish_message(make_message(TaskType.MINUTE), delay_seconds=60)
+
+    assert queue.receive_message() == []
+
+
+def test_messages_are_dead_lettered_after_the_maximum_receive_count(queue):
+    message = make_message(TaskType.MINUTE)
+    queue.publish_message(message)
+
+    for _ in range(MAX_RECEIVE_COUNT):
+        [(_, receipt_handle)] = queue.receive_message()
+        queue.abandon_message(receipt_handle)
+
+    assert queue.receive_message() == []
+    deadletter_queue = PostgresQueueService(DEADLETTER_QUEUE_NAME, DEADLETTER_QUEUE_NAME, polling_interval=0)
+    [(dead_lettered, _)] = deadletter_queue.receive_message()
+    assert dead_lettered.id == message.id
+
+
+def test_messages_added_to_a_session_are_published_only_on_commit(queue, queue_db):
+    rolled_back = make_message(TaskType.MINUTE)
+    committed = make_message(TaskType.EDIT)
+
+    with Session(queue_db) as session:
+        queue.add_to_session(session, rolled_back)
+        session.rollback()
+        assert queue.receive_message() == []
+
+        queue.add_to_session(session, committed)
+        session.commit()
+
+    assert [message.id for message, _ in queue.receive_message()] == [committed.id]
+
+
+@pytest.mark.asyncio
+async def test_idle_async_receives_wake_as_soon_as_a_message_is_published(queue):
+    async_queue = AsyncPostgresQueueService(QUEUE_NAME, DEADLETTER_QUEUE_NAME, polling_interval=30)
+    message = make_message(TaskType.INTERACTIVE)
+    try:
+        receive = asyncio.create_task(async_queue.receive_message())
+        await asyncio.sleep(0.5)
+        started_at = time.monotonic()
+        await asyncio.to_thread(queue.publish_message, message)
+
+        [(received, receipt_handle)] = await asyncio.wait_for(receive, POLL_STEP_SECONDS * 2)
+        assert received.id == message.id
+        # woken by the notification rather than the next poll
+        assert time.monotonic() - started_at < POLL_STEP_SECONDS
+
+        await async_queue.complete_messages([receipt_handle])
+        assert await async_queue.approximate_message_count() == 0
+    finally:
+        await async_queue.close()
+        await postgres.async_engine.dispose()
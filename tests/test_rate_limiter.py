@@ -0,0 +1,67 @@
+import pytest
+import ray
+
+from common.llm import rate_limiter
+from common.llm.rate_limiter import RATE_LIMITER_ACTOR_NAME, RateLimiter, TokenBucket, get_shared_buckets
+
+
+def test_requests_within_the_limit_are_sent_straight_away():
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=None)
+
+    assert all(bucket.reserve(tokens=1000) == 0 for _ in range(60))
+
+
+def test_requests_over_the_limit_wait_for_the_bucket_to_refill():
+    bucket = TokenBucket(requests_per_minute=None, tokens_per_minute=600)
+
+    assert bucket.reserve(tokens=600) == 0
+    # 600 tokens per minute refills at 10 a second
+    assert bucket.reserve(tokens=60) == pytest.approx(6, abs=0.1)
+
+
+def test_rate_limit_errors_halve_the_rate_once_per_cooldown():
+    bucket = TokenBucket(requests_per_minute=None, tokens_per_minute=600)
+    bucket.reserve(tokens=600)
+
+    bucket.record_rate_limited()
+    bucket.record_rate_limited()
+
+    assert bucket.rate_fraction == 0.5
+    assert bucket.reserve(tokens=60) == pytest.approx(12, abs=0.1)
+
+
+def test_successes_recover_the_rate_up_to_the_configured_limit():
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=None)
+    bucket.record_rate_limited()
+
+    for _ in range(100):
+        bucket.record_success()
+
+    assert bucket.rate_fraction == 1.0
+
+
+@pytest.fixture
+def local_ray():
+    ray.init(num_cpus=1, include_dashboard=False, namespace="test_rate_limiter")
+    get_shared_buckets.cache_clear()
+    yield
+    get_shared_buckets.cache_clear()
+    ray.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("local_ray")
+async def test_requests_still_go_through_after_the_limiter_actor_is_killed(mocker):
+    local_buckets = mocker.spy(rate_limiter.get_local_buckets(), "reserve")
+    limiter = RateLimiter("gemini/model", requests_per_minute=600, tokens_per_minute=None)
+    await limiter.acquire(tokens=100)
+    killed = ray.get_actor(RATE_LIMITER_ACTOR_NAME)
+
+    ray.kill(killed)
+    await limiter.acquire(tokens=100)
+    limiter.record_success()
+    await limiter.acquire(tokens=100)
+
+    assert local_buckets.call_count == 1
+    # the next request after the failure is limited by a newly created shared actor
+    assert ray.get_actor(RATE_LIMITER_ACTOR_NAME) != killed
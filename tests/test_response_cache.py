@@ -0,0 +1,39 @@
+import uuid
+
+from pydantic import BaseModel
+
+from common.llm.response_cache import LruCache, make_cache_key
+
+
+class Answer(BaseModel):
+    text: str
+
+
+def test_cache_keys_are_scoped_to_the_user_model_and_schema():
+    user_id = uuid.uuid4()
+    messages = [{"role": "user", "content": "Summarise the meeting"}]
+    key = make_cache_key("gemini/flash/1.0", user_id, messages, Answer)
+
+    assert key == make_cache_key("gemini/flash/1.0", user_id, list(messages), Answer)
+    assert key != make_cache_key("gemini/flash/1.0", uuid.uuid4(), messages, Answer)
+    assert key != make_cache_key("gemini/pro/1.0", user_id, messages, Answer)
+    assert key != make_cache_key("gemini/flash/1.0", user_id, messages, None)
+
+
+def test_lru_cache_evicts_the_least_recently_used_entry():
+    lru = LruCache(max_entries=2, ttl_seconds=60)
+    lru.set("a", "1")
+    lru.set("b", "2")
+    lru.get("a")
+    lru.set("c", "3")
+
+    assert lru.get("a") == "1"
+    assert lru.get("b") is None
+    assert lru.get("c") == "3"
+
+
+def test_lru_cache_entries_expire():
+    lru = LruCache(max_entries=2, ttl_seconds=-1)
+    lru.set("a", "1")
+
+    assert lru.get("a") is None
@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from common.llm.transcript_context import PromptPrefix
+from common.templates import types
+from common.templates.default.cabinet import Cabinet
+
+
+async def answer_with_section(messages: list[dict[str, str]], _response_format: None) -> str:
+    """Answers with the section's own name, after a delay that is longest for the first section."""
+    section = messages[-1]["content"].rsplit(": ", 1)[-1]
+    await asyncio.sleep(0.05 if section == "item 0" else 0.01)
+    return section
+
+
+@pytest.mark.asyncio
+async def test_parallel_sections_are_bounded_and_kept_in_agenda_order(mocker, fake_chatbot):
+    chatbot = fake_chatbot(answer_with_section)
+    mocker.patch.object(types, "create_default_chatbot", return_value=chatbot)
+    mocker.patch.object(types.settings, "MAX_CONCURRENT_SECTIONS", 3)
+    sections = [f"item {i}" for i in range(8)]
+
+    final_sections = await Cabinet.generate_sections_in_parallel(PromptPrefix([]), sections)
+
+    assert final_sections == sections
+    assert chatbot.max_running == 3
@@ -0,0 +1,132 @@
+import uuid
+
+import pytest
+from tenacity import wait_none
+
+from common.database.postgres_models import LlmCall
+from common.llm import telemetry
+from common.llm.adapters import FailoverModelAdapter
+from common.llm.circuit_breaker import CircuitBreaker
+from common.llm.client import ChatBot
+from common.llm.transcript_context import PromptPrefix
+
+
+class FakeAdapter:
+    """Answers every request, reporting usage the way the real adapters do."""
+
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:  # noqa: ARG002
+        telemetry.record_usage("gemini/fake-model", prompt_tokens=1000, completion_tokens=200, cached_tokens=800)
+        return "response"
+
+
+class FailingAdapter:
+    """Times out on the first `failures` requests, then answers."""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+
+    async def chat(self, messages: list[dict[str, str]], prefix: PromptPrefix | None = None) -> str:  # noqa: ARG002
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError
+        return "response"
+
+
+@pytest.mark.asyncio
+async def test_calls_are_attributed_to_the_job_and_stage_they_were_made_for(mocker):
+    saved: list[LlmCall] = []
+
+    async def save_llm_calls(calls: list[LlmCall]) -> None:
+        saved.extend(calls)
+
+    mocker.patch.object(telemetry, "save_llm_calls", save_llm_calls)
+    mocker.patch.object(telemetry.settings, "LLM_PRICES_PER_MILLION_TOKENS", {"fake-model": (0.5, 2.0)})
+    chatbot = ChatBot(FakeAdapter(), model="gemini/fake-model")
+    job_id = uuid.uuid4()
+
+    async with telemetry.llm_job_scope("minute", job_id, "General"):
+        await chatbot.chat([{"role": "user", "content": "hello"}])
+        with telemetry.llm_stage("citations"):
+            await chatbot.chat([{"role": "user", "content": "cite"}])
+        assert saved == []
+
+    assert [(call.job_id, call.template_name, call.stage) for call in saved] == [
+        (job_id, "General", None),
+        (job_id, "General", "citations"),
+    ]
+    call = saved[0]
+    assert (call.model, call.prompt_tokens, call.completion_tokens, call.cached_tokens) == (
+        "gemini/fake-model",
+        1000,
+        200,
+        800,
+    )
+    assert call.cost == pytest.approx(0.0009)
+    assert call.latency_seconds >= 0
+    assert not call.cache_hit
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_and_cache_hits_are_recorded(mocker):
+    saved: list[LlmCall] = []
+
+    async def save_llm_calls(calls: list[LlmCall]) -> None:
+        saved.extend(calls)
+
+    mocker.patch.object(telemetry, "save_llm_calls", save_llm_calls)
+
+    async with telemetry.llm_job_scope("interactive", uuid.uuid4()):
+        with pytest.raises(TimeoutError), telemetry.record_llm_call("gemini/fake-model"):
+            raise TimeoutError
+        telemetry.record_llm_cache_hit("gemini/fake-model")
+
+    assert [(call.error, call.cache_hit) for call in saved] == [("TimeoutError", False), (None, True)]
+    assert saved[0].cost is None
+
+
+@pytest.mark.asyncio
+async def test_retries_are_recorded_with_their_attempt_number(mocker):
+    saved: list[LlmCall] = []
+
+    async def save_llm_calls(calls: list[LlmCall]) -> None:
+        saved.extend(calls)
+
+    mocker.patch.object(telemetry, "save_llm_calls", save_llm_calls)
+    mocker.patch.object(ChatBot.chat.retry, "wait", wait_none())
+    chatbot = ChatBot(FailingAdapter(failures=2), model="gemini/fake-model")
+
+    async with telemetry.llm_job_scope("minute", uuid.uuid4()):
+        await chatbot.chat([{"role": "user", "content": "hello"}])
+        await chatbot.chat([{"role": "user", "content": "again"}])
+
+    assert [(call.attempt, call.error) for call in saved] == [
+        (1, "TimeoutError"),
+        (2, "TimeoutError"),
+        (3, None),
+        (1, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_each_model_a_request_fails_over_between_is_recorded(mocker):
+    saved: list[LlmCall] = []
+
+    async def save_llm_calls(calls: list[LlmCall]) -> None:
+        saved.extend(calls)
+
+    mocker.patch.object(telemetry, "save_llm_calls", save_llm_calls)
+    adapter = FailoverModelAdapter(
+        [
+            (FailingAdapter(failures=1), CircuitBreaker("gemini/primary"), None),
+            (FailingAdapter(failures=0), CircuitBreaker("openai/secondary"), None),
+        ]
+    )
+    chatbot = ChatBot(adapter, model="gemini/primary")
+
+    async with telemetry.llm_job_scope("minute", uuid.uuid4()):
+        await chatbot.chat([{"role": "user", "content": "hello"}])
+
+    assert [(call.model, call.attempt, call.error) for call in saved] == [
+        ("gemini/primary", 1, "TimeoutError"),
+        ("openai/secondary", 1, None),
+    ]
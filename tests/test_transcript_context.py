@@ -0,0 +1,30 @@
+import pytest
+
+from common.llm.transcript_context import TranscriptContext
+
+TRANSCRIPT = [{"speaker": "Speaker 1", "text": "Hello", "start_time": 0.0, "end_time": 1.0}]
+
+
+@pytest.mark.asyncio
+async def test_prefixes_are_shared_within_a_context():
+    context = TranscriptContext(TRANSCRIPT)
+    messages = [{"role": "system", "content": "The transcript is: Hello"}]
+
+    assert context.prefix(messages) is context.prefix(list(messages))
+    assert context.prefix(messages) is not context.prefix([{"role": "system", "content": "Something else"}])
+
+
+@pytest.mark.asyncio
+async def test_cached_prefixes_are_deleted_when_the_context_exits():
+    deleted = []
+
+    async def delete(name: str) -> None:
+        deleted.append(name)
+
+    async with TranscriptContext(TRANSCRIPT) as context:
+        prefix = context.prefix([{"role": "system", "content": "The transcript is: Hello"}])
+        prefix.cached_content["gemini-model"] = "cachedContents/1"
+        prefix.cleanups.append(lambda: delete("cachedContents/1"))
+
+    assert deleted == ["cachedContents/1"]
+    assert not prefix.cached_content
@@ -6,8 +6,10 @@ import pytest
 
 from common.database.postgres_models import Recording, Transcription
 from common.services.exceptions import TranscriptionFailedError
+from common.services.queue_services.base import MAX_DELAY_SECONDS
 from common.services.storage_services import StorageService
 from common.services.transcription_services.adapter import AdapterType, TranscriptionAdapter
+from common.services.transcription_services.polling import MIN_POLL_DELAY_SECONDS, get_poll_delay_seconds
 from common.services.transcription_services.transcription_manager import TranscriptionServiceManager
 from common.types import TranscriptionJobMessageData
 
@@ -280,6 +282,8 @@ class TestTranscriptionServiceManager:
                 assert result.transcript is not None
                 mock_start.assert_called_once_with(audio_file_path_or_recording=mock_recording)
                 mock_check_transcription.assert_called_once()
+                checked_job = mock_check_transcription.call_args.args[1]
+                assert checked_job.audio_duration_seconds == mock_duration
 
     @pytest.mark.asyncio
     async def test_perform_transcription_steps_unknown_adapter_type(
@@ -305,3 +309,13 @@ class TestTranscriptionServiceManager:
 
             with pytest.raises(RuntimeError, match="adapter not recognised"):
                 await manager.perform_transcription_steps(mock_transcription)
+
+
+def test_poll_delay_grows_with_duration_and_poll_count():
+    short_job = TranscriptionJobMessageData(transcription_service="test", audio_duration_seconds=60)
+    long_job = TranscriptionJobMessageData(transcription_service="test", audio_duration_seconds=3600)
+
+    assert get_poll_delay_seconds(short_job) == MIN_POLL_DELAY_SECONDS
+    assert get_poll_delay_seconds(long_job) > get_poll_delay_seconds(short_job)
+    assert get_poll_delay_seconds(long_job.model_copy(update={"poll_count": 1})) == 2 * get_poll_delay_seconds(long_job)
+    assert get_poll_delay_seconds(long_job.model_copy(update={"poll_count": 100})) == MAX_DELAY_SECONDS
@@ -0,0 +1,28 @@
+from datetime import UTC, datetime
+
+import pytest
+from pydantic import BaseModel
+
+from common.database.postgres_models import TemplateQuestion, TemplateType, Transcription, UserTemplate
+from common.templates import user_template
+
+
+def answer_with_descriptions(_messages: list[dict[str, str]], response_format: type[BaseModel]) -> BaseModel:
+    return response_format(
+        **{name: f"answer to {field.description}" for name, field in response_format.model_fields.items()}
+    )
+
+
+@pytest.mark.asyncio
+async def test_form_questions_are_answered_in_batches_and_kept_in_order(mocker, fake_chatbot):
+    chatbot = fake_chatbot(answer_with_descriptions)
+    mocker.patch.object(user_template, "create_default_chatbot", return_value=chatbot)
+    mocker.patch.object(user_template.settings, "FORM_QUESTIONS_PER_BATCH", 2)
+    questions = [TemplateQuestion(position=i, title=f"Question {i}", description="") for i in range(5)]
+    template = UserTemplate(name="Form", content="", type=TemplateType.FORM, questions=questions)
+    transcription = Transcription(dialogue_entries=[], created_datetime=datetime.now(UTC))
+
+    minute = await user_template.generate_user_template(template, transcription)
+
+    assert minute == "\n\n".join(f"## Question {i}\nanswer to Question {i}" for i in range(5))
+    assert [len(response_format.model_fields) for _, response_format in chatbot.requests] == [2, 2, 1]
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from typing import Any
+
+import ray
+
+from common.services.queue_services.base import AsyncQueueService
+
+logger = logging.getLogger(__name__)
+
+# workers are added as soon as they are needed, but only retired one at a time after load has stayed low this long,
+# so a queue that empties between bursts does not repeatedly start and stop workers
+SCALE_DOWN_DELAY_SECONDS = 300
+
+# a queue an actor group receives from, and the slots each actor has for it
+GroupLane = tuple[AsyncQueueService, int]
+
+
+def desired_actor_count(
+    queue_depth: int, in_flight: int, slots_per_actor: int, min_actors: int, max_actors: int
+) -> int:
+    """The number of actors needed to give every waiting and in flight message a slot, within the given bounds."""
+    needed = math.ceil((queue_depth + in_flight) / max(slots_per_actor, 1))
+    return min(max(needed, min_actors), max_actors)
+
+
+class ActorGroup:
+    """Identical worker actors scaled between min_actors and max_actors by the depth of the queues they receive from.
+
+    Each of the group's lanes is a queue with its own slots on every actor, which its actors report the messages in
+    flight on by lane name. The group is sized for whichever lane needs the most actors.
+
+    Each actor runs its `process` method until it is stopped. A call that fails is restarted on the same actor, which
+    Ray itself restarts if the process died. Retired actors are asked to stop receiving, finish the messages they hold
+    and are only killed once their `process` call has returned.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        create_actor: Callable[[], Any],
+        lanes: dict[str, GroupLane],
+        min_actors: int,
+        max_actors: int,
+    ) -> None:
+        self.name = name
+        self.create_actor = create_actor
+        self.lanes = lanes
+        self.min_actors = min(min_actors, max_actors)
+        self.max_actors = max_actors
+        self.actors: list[Any] = []
+        self.futures: list[asyncio.Future] = []
+        self.retiring: dict[asyncio.Future, Any] = {}
+        self.last_busy = time.monotonic()
+
+    @property
+    def all_futures(self) -> list[asyncio.Future]:
+        return [*self.futures, *self.retiring]
+
+    def start(self) -> None:
+        for _ in range(self.min_actors):
+            self.add_actor()
+
+    def add_actor(self) -> None:
+        actor = self.create_actor()
+        self.actors.append(actor)
+        # note, currently a bug in python 3.12/ray that means we need to wrap the ObjectRefs in asyncio.ensure_future
+        self.futures.append(asyncio.ensure_future(actor.process.remote()))
+
+    def retire_actor(self) -> None:
+        actor, future = self.actors.pop(), self.futures.pop()
+        actor.retire.remote()
+        self.retiring[future] = actor
+
+    def stop(self) -> None:
+        for actor in self.actors:
+            actor.stop.remote()
+
+    def check_actors(self) -> None:
+        for idx, future in enumerate(self.futures):
+            if not future.done():
+                continue
+            # Manually restart failed jobs
+            try:
+                # exc_info=False as this comes from another process
+                logger.error("Task has finished unexpectedly: error %s", future, exc_info=False)
+                self.futures[idx] = asyncio.ensure_future(self.actors[idx].process.remote())
+            except Exception as e:  # noqa: BLE001
+                logger.error("Failed to restart worker %s", e)
+
+        for future in [future for future in self.retiring if future.done()]:
+            ray.kill(self.retiring.pop(future))
+            logger.info("Retired a %s worker, %d remaining", self.name, len(self.actors))
+
+    async def autoscale(self) -> None:
+        try:
+            queue_depths = await asyncio.gather(
+                *(queue_service.approximate_message_count() for queue_service, _ in self.lanes.values())
+            )
+            actor_loads = await asyncio.gather(*(actor.in_flight.remote() for actor in self.actors))
+        except Exception:
+            logger.exception("Failed to sample the load on %s workers", self.name)
+            return
+
+        loads = {
+            lane: (queue_depth, sum(actor_load.get(lane, 0) for actor_load in actor_loads))
+            for lane, queue_depth in zip(self.lanes, queue_depths, strict=True)
+        }
+        desired = max(
+            desired_actor_count(queue_depth, in_flight, self.lanes[lane][1], self.min_actors, self.max_actors)
+            for lane, (queue_depth, in_flight) in loads.items()
+        )
+        if desired > len(self.actors):
+            logger.info(
+                "%s messages waiting and in flight, scaling %s workers from %d to %d",
+                ", ".join(f"{lane}: {queue_depth} and {in_flight}" for lane, (queue_depth, in_flight) in loads.items()),
+                self.name,
+                len(self.actors),
+                desired,
+            )
+            for _ in range(desired - len(self.actors)):
+                self.add_actor()
+        if desired >= len(self.actors):
+            self.last_busy = time.monotonic()
+        elif time.monotonic() - self.last_busy >= SCALE_DOWN_DELAY_SECONDS:
+            logger.info("%s queue is quiet, retiring one of %d workers", self.name, len(self.actors))
+            self.retire_actor()
+            self.last_busy = time.monotonic()
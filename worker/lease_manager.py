@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from common.services.queue_services.base import AsyncQueueService
+
+logger = logging.getLogger(__name__)
+
+
+class MessageLeaseManager:
+    """Keeps received messages hidden from other workers for as long as they are being processed.
+
+    Messages are received with a short visibility timeout, so a message held by a worker that has crashed is retried
+    promptly. While any message is held, a single renewal loop extends the visibility of every held message every
+    `renew_interval` seconds in one batch, so a long minute generation is never redelivered to a second worker part way
+    through. If processing is cancelled the message is abandoned straight away rather than waiting for its visibility
+    to lapse.
+    """
+
+    def __init__(
+        self, queue_service: AsyncQueueService, visibility_timeout: int, renew_interval: float | None = None
+    ) -> None:
+        self.queue_service = queue_service
+        self.visibility_timeout = visibility_timeout
+        # renew well before the lease runs out, so a single slow or failed renewal does not lose the message
+        self.renew_interval = renew_interval or visibility_timeout / 3
+        # keyed by id, as Service Bus receipt handles are message objects
+        self.held: dict[int, Any] = {}
+        self._renewal: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def hold(self, receipt_handle: Any) -> AsyncIterator[None]:
+        self.held[id(receipt_handle)] = receipt_handle
+        if self._renewal is None or self._renewal.done():
+            self._renewal = asyncio.create_task(self._renew())
+        try:
+            yield
+        except asyncio.CancelledError:
+            self._release(receipt_handle)
+            await self._abandon(receipt_handle)
+            raise
+        finally:
+            self._release(receipt_handle)
+
+    def _release(self, receipt_handle: Any) -> None:
+        self.held.pop(id(receipt_handle), None)
+        if not self.held and self._renewal is not None:
+            self._renewal.cancel()
+            self._renewal = None
+
+    async def _renew(self) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval)
+            receipt_handles = list(self.held.values())
+            try:
+                await self.queue_service.extend_messages_visibility(receipt_handles, self.visibility_timeout)
+            except Exception:
+                logger.exception("Failed to extend message visibility")
+
+    async def _abandon(self, receipt_handle: Any) -> None:
+        try:
+            await self.queue_service.abandon_message(receipt_handle)
+        except Exception:
+            logger.exception("Failed to abandon cancelled message")
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from common.services.queue_services.base import AsyncQueueService
+from common.types import WorkerMessage
+from worker.lease_manager import MessageLeaseManager
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[WorkerMessage, Any], Awaitable[None]]
+
+# SQS returns at most 10 messages per receive call
+MAX_RECEIVE_BATCH_SIZE = 10
+# a receive that fails is retried after this long, doubling with every failure in a row up to the maximum
+RECEIVE_RETRY_SECONDS = 1
+MAX_RECEIVE_RETRY_SECONDS = 60
+
+
+class MessageScheduler:
+    """Keeps a bounded number of queue messages in flight at once.
+
+    Rather than receiving a batch and waiting for every message in it to finish before polling again, a receive is
+    issued whenever there are free slots, asking for exactly as many messages as there are free slots. A slow message
+    therefore only ever occupies its own slot.
+
+    The scheduler is driven by calling `step` in a loop, which lets the owning actor check its stop condition and
+    write its heartbeat between rounds, then `drain` once the loop has exited.
+
+    If a lease manager is given, every message is held by it for as long as its handler is running.
+
+    If a stop event is given, setting it wakes a waiting `step` straight away, and `drain` then cancels a receive that
+    is still long polling rather than waiting out the polling interval.
+
+    A receive that fails is logged and retried after a backoff, so an error from the queue never escapes `step`.
+    """
+
+    def __init__(
+        self,
+        queue_service: AsyncQueueService,
+        handler: MessageHandler,
+        max_in_flight: int,
+        max_batch_size: int = MAX_RECEIVE_BATCH_SIZE,
+        stop_event: asyncio.Event | None = None,
+        lease_manager: MessageLeaseManager | None = None,
+    ) -> None:
+        self.queue_service = queue_service
+        self.handler = handler
+        self.max_in_flight = max_in_flight
+        self.max_batch_size = max_batch_size
+        self.stop_event = stop_event
+        self.lease_manager = lease_manager
+        self.in_flight: set[asyncio.Task] = set()
+        self._receive_task: asyncio.Task | None = None
+        self._stop_task: asyncio.Task | None = None
+        self._receive_failures = 0
+
+    @property
+    def free_slots(self) -> int:
+        return max(self.max_in_flight - len(self.in_flight), 0)
+
+    async def step(self, max_wait_seconds: float | None = None) -> None:
+        """Top up any free slots, then wait until a receive returns or an in-flight message finishes.
+
+        Args:
+            max_wait_seconds: the maximum number of seconds to wait before returning, so the caller can run its own
+                housekeeping while long-running messages are in flight.
+        """
+        if self._receive_task is None and self.free_slots > 0:
+            self._receive_task = asyncio.create_task(self._receive(min(self.free_slots, self.max_batch_size)))
+
+        waiting = set(self.in_flight)
+        if self._receive_task is not None:
+            waiting.add(self._receive_task)
+        if self.stop_event is not None:
+            if self._stop_task is None:
+                self._stop_task = asyncio.create_task(self.stop_event.wait())
+            waiting.add(self._stop_task)
+
+        done, _ = await asyncio.wait(waiting, timeout=max_wait_seconds, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task is self._receive_task:
+                self._receive_task = None
+                self._dispatch(task.result())
+            elif task is not self._stop_task:
+                self._finish(task)
+
+    async def drain(self, deadline_seconds: float | None = None) -> None:
+        """Stop receiving and wait for every message that has already been received to finish.
+
+        If the scheduler has a stop event, messages returned by the last receive are abandoned rather than started, so
+        another worker can pick them up straight away instead of them staying hidden until their lease lapses.
+
+        Args:
+            deadline_seconds: if given, messages still in flight after this many seconds are cancelled, which abandons
+                them if there is a lease manager. Used to finish within the grace period the container is given to stop.
+        """
+        if self._stop_task is not None:
+            self._stop_task.cancel()
+            self._stop_task = None
+        if self._receive_task is not None:
+            receive_task, self._receive_task = self._receive_task, None
+            if self.stop_event is None:
+                self._dispatch(await receive_task)
+            else:
+                # a message the queue was part way through delivering becomes visible again once its lease lapses
+                receive_task.cancel()
+                (received,) = await asyncio.gather(receive_task, return_exceptions=True)
+                if isinstance(received, list):
+                    await self._abandon(received)
+
+        if not self.in_flight:
+            return
+        done, pending = await asyncio.wait(self.in_flight, timeout=deadline_seconds)
+        for task in done:
+            self._finish(task)
+        if pending:
+            logger.warning("Cancelling %d messages still in flight after %s seconds", len(pending), deadline_seconds)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.in_flight.difference_update(pending)
+
+    async def _receive(self, max_messages: int) -> list[tuple[WorkerMessage, Any]]:
+        try:
+            messages = await self.queue_service.receive_message(max_messages=max_messages)
+        except Exception:
+            delay = min(RECEIVE_RETRY_SECONDS * 2**self._receive_failures, MAX_RECEIVE_RETRY_SECONDS)
+            self._receive_failures += 1
+            logger.exception("Failed to receive messages, retrying in %s seconds", delay)
+            # waited out inside the receive task, so messages already in flight are still finished meanwhile
+            await asyncio.sleep(delay)
+            return []
+        self._receive_failures = 0
+        return messages
+
+    def _dispatch(self, messages: list[tuple[WorkerMessage, Any]]) -> None:
+        for message, receipt_handle in messages:
+            self.in_flight.add(asyncio.create_task(self._handle(message, receipt_handle)))
+
+    async def _abandon(self, messages: list[tuple[WorkerMessage, Any]]) -> None:
+        for _message, receipt_handle in messages:
+            try:
+                await self.queue_service.abandon_message(receipt_handle)
+            except Exception:
+                logger.exception("Failed to abandon unstarted message")
+
+    async def _handle(self, message: WorkerMessage, receipt_handle: Any) -> None:
+        if self.lease_manager is None:
+            await self.handler(message, receipt_handle)
+            return
+        async with self.lease_manager.hold(receipt_handle):
+            await self.handler(message, receipt_handle)
+
+    def _finish(self, task: asyncio.Task) -> None:
+        self.in_flight.discard(task)
+        try:
+            task.result()
+        except Exception:
+            logger.exception("Unhandled error in message handler")
@@ -0,0 +1,31 @@
+import logging
+from datetime import UTC, datetime
+from functools import cache
+
+from ray.util.metrics import Histogram
+
+from common.types import WorkerMessage
+
+logger = logging.getLogger(__name__)
+
+QUEUE_WAIT_BOUNDARIES_SECONDS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600]
+
+
+@cache
+def get_queue_wait_histogram() -> Histogram:
+    # created on first use, as Ray metrics can only be created inside a Ray worker process
+    return Histogram(
+        "minute_queue_wait_seconds",
+        description="Time from a message being published to a worker starting on it",
+        boundaries=QUEUE_WAIT_BOUNDARIES_SECONDS,
+        tag_keys=("lane", "task_type"),
+    )
+
+
+def record_queue_wait(lane: str, message: WorkerMessage) -> None:
+    """Record how long a message waited before it was picked up, exported via Ray's Prometheus metrics endpoint."""
+    if message.enqueued_at is None:
+        return
+    wait_seconds = max((datetime.now(UTC) - message.enqueued_at).total_seconds(), 0.0)
+    logger.info("%s message %s waited %.2fs on the %s lane", message.type.name, message.id, wait_seconds, lane)
+    get_queue_wait_histogram().observe(wait_seconds, tags={"lane": lane, "task_type": message.type.name})
@@ -1,120 +1,211 @@
 import asyncio
+import functools
 import logging
+from datetime import UTC, datetime, timedelta
 from typing import Any
+from uuid import UUID
 
 import ray
 
-from common.services.exceptions import InteractionFailedError, TranscriptionFailedError
+from common.services.exceptions import (
+    HallucinationCheckFailedError,
+    InteractionFailedError,
+    TranscriptionFailedError,
+)
 from common.services.minute_handler_service import MinuteGenerationFailedError, MinuteHandlerService
-from common.services.queue_services.base import QueueService
+from common.services.queue_services.base import AsyncQueueService
 from common.services.transcription_handler_service import TranscriptionHandlerService
+from common.services.transcription_services.polling import get_poll_delay_seconds
 from common.settings import get_settings
 from common.types import TaskType, WorkerMessage
 from worker.healthcheck import HEARTBEAT_DIR, ensure_heartbeat_dir
+from worker.lease_manager import MessageLeaseManager
+from worker.message_scheduler import MessageScheduler
+from worker.queue_metrics import record_queue_wait
+from worker.request_batcher import PublishBatcher, SettlementBatcher
 
 logger = logging.getLogger(__name__)
 ray_logger = logging.getLogger("ray")
 ray_logger.setLevel(logging.WARNING)
 settings = get_settings()
 
+# the longest a worker waits on its queue before writing a heartbeat, even if every slot is still busy
+SCHEDULER_STEP_TIMEOUT = 60
 
-@ray.remote
-class HasBeenStopped:
-    def __init__(self):
-        self.stopped = False
 
-    def get(self):
-        return self.stopped
+class ReceiveService:
+    """Behaviour shared by the worker actors: heartbeats, reporting load and stopping or retiring cleanly."""
 
-    def set(self):
-        self.stopped = True
+    def __init__(self) -> None:
+        # set by the worker service broadcasting `stop`, so the receive loop never has to ask whether it should stop
+        self.stop_event = asyncio.Event()
+        self.retired = False
+        self.schedulers: dict[str, MessageScheduler] = {}
+        actor_id = ray.get_runtime_context().get_actor_id()
+        ensure_heartbeat_dir()
+        self.heartbeat_path = HEARTBEAT_DIR / f"worker_{actor_id}.heartbeat"
+        self.heartbeat_path.touch()
+
+    def stop(self) -> None:
+        """Stop receiving new messages, cancelling any receive still waiting on the queue.
+
+        `process` returns once the messages already received have finished.
+        """
+        self.stop_event.set()
+
+    def retire(self) -> None:
+        """Stop as above, then remove the heartbeat as this worker is about to be killed."""
+        self.retired = True
+        self.stop()
+
+    def in_flight(self) -> dict[str, int]:
+        """The number of messages in flight on each lane, for the autoscaler to compare with that lane's queue."""
+        return {lane: len(scheduler.in_flight) for lane, scheduler in self.schedulers.items()}
+
+    async def run_scheduler(self, lane: str, scheduler: MessageScheduler) -> None:
+        self.schedulers[lane] = scheduler
+        try:
+            while not self.stop_event.is_set():
+                await scheduler.step(max_wait_seconds=SCHEDULER_STEP_TIMEOUT)
+                self.heartbeat_path.touch()
+        finally:
+            # also run if the loop fails, so a scheduler never outlives its `process` call and keeps counting as load
+            try:
+                # a retiring worker is under no time pressure, so it lets long generations finish
+                await scheduler.drain(deadline_seconds=None if self.retired else settings.WORKER_DRAIN_SECONDS)
+            finally:
+                del self.schedulers[lane]
+        if self.retired:
+            # a retired worker is killed once drained, so it must not be reported as a stale worker
+            self.heartbeat_path.unlink(missing_ok=True)
 
 
 # restart indefinitely, try each task only once
 @ray.remote(max_restarts=-1, max_task_retries=0)
-class RayTranscriptionService:
+class RayTranscriptionService(ReceiveService):
     def __init__(
-        self, transcription_queue_service: QueueService, llm_queue_service: QueueService, stopped: HasBeenStopped
+        self,
+        transcription_queue_service: AsyncQueueService,
+        llm_queue_service: AsyncQueueService,
     ) -> None:
-        self.stopped = stopped
+        super().__init__()
         self.transcription_queue_service = transcription_queue_service
         self.llm_queue_service = llm_queue_service
-        actor_id = ray.get_runtime_context().get_actor_id()
-        ensure_heartbeat_dir()
-        self.heartbeat_path = HEARTBEAT_DIR / f"worker_{actor_id}.heartbeat"
-        self.heartbeat_path.touch()
+        self.settlements = SettlementBatcher(transcription_queue_service)
+        self.transcription_publishes = PublishBatcher(transcription_queue_service)
+        self.llm_publishes = PublishBatcher(llm_queue_service)
         logger.info("Ray Transcription receive service initialised")
 
     async def process(self) -> None:
-        while not await self.stopped.get.remote():
-            logger.info("Receiving transcription messages")
-            messages = self.transcription_queue_service.receive_message(max_messages=1)
-            for message, receipt_handle in messages:
-                try:
-                    logger.info("Received minute id for transcription: %s", message.id)
-                    transcription_job = await TranscriptionHandlerService.process_transcription(
-                        message.id, message.data
-                    )
-                except TranscriptionFailedError:
-                    logger.exception("Transcription failed for minute id: %s", message.id)
-                else:
-                    # sync jobs should have the transcript available immediately, async jobs may need to go on the queue
-                    if transcription_job.transcript:
-                        logger.info("Transcription complete for minute id %s complete", message.id)
-                        # create a default minute with the general template after every transcription
-                        minute_version = await MinuteHandlerService.get_only_minute_version_for_minute_id(message.id)
-                        self.llm_queue_service.publish_message(
-                            WorkerMessage(id=minute_version.id, type=TaskType.MINUTE)
-                        )
-                    else:
-                        logger.info("Async transcription job not ready yet. Re-queueing minute id: %s", message.id)
-                        self.transcription_queue_service.publish_message(
-                            WorkerMessage(id=message.id, type=TaskType.TRANSCRIPTION, data=transcription_job)
-                        )
-                # Delete the message to prevent repeated processing
-                self.transcription_queue_service.complete_message(receipt_handle)
-            self.heartbeat_path.touch()
+        logger.info("Receiving transcription messages")
+        await self.run_scheduler(
+            "transcription",
+            MessageScheduler(
+                self.transcription_queue_service,
+                self.process_transcription_message,
+                max_in_flight=settings.MAX_TRANSCRIPTION_TASKS_PER_PROCESS,
+                stop_event=self.stop_event,
+                lease_manager=MessageLeaseManager(self.transcription_queue_service, settings.QUEUE_VISIBILITY_TIMEOUT),
+            ),
+        )
 
+    async def process_transcription_message(self, message: WorkerMessage, receipt_handle: Any) -> None:
+        record_queue_wait("transcription", message)
+        try:
+            logger.info("Received minute id for transcription: %s", message.id)
+            transcription_job = await TranscriptionHandlerService.process_transcription(message.id, message.data)
+        except TranscriptionFailedError:
+            logger.exception("Transcription failed for minute id: %s", message.id)
+        else:
+            # sync jobs should have the transcript available immediately, async jobs may need to go on the queue
+            if transcription_job.transcript:
+                logger.info("Transcription complete for minute id %s complete", message.id)
+                # create a default minute with the general template after every transcription
+                minute_version = await MinuteHandlerService.get_only_minute_version_for_minute_id(message.id)
+                await self.llm_publishes.publish_message(WorkerMessage(id=minute_version.id, type=TaskType.MINUTE))
+            else:
+                # schedule the next check rather than waiting on the job here, so the slot is free for other messages
+                delay_seconds = get_poll_delay_seconds(transcription_job)
+                logger.info(
+                    "Async transcription job not ready yet. Checking minute id %s again in %s seconds",
+                    message.id,
+                    delay_seconds,
+                )
+                await self.transcription_publishes.publish_message(
+                    WorkerMessage(
+                        id=message.id,
+                        type=TaskType.TRANSCRIPTION,
+                        data=transcription_job.model_copy(update={"poll_count": transcription_job.poll_count + 1}),
+                        enqueued_at=datetime.now(UTC) + timedelta(seconds=delay_seconds),
+                    ),
+                    delay_seconds=delay_seconds,
+                )
+        # Delete the message to prevent repeated processing
+        await self.settlements.complete_message(receipt_handle)
 
-@ray.remote(max_restarts=-1, max_task_retries=0)
-class RayLlmService:
-    def __init__(self, queue_service: QueueService, stopped: HasBeenStopped) -> None:
-        self.stopped = stopped
+
+class Lane:
+    """A queue an LLM worker receives from, with its own share of the worker's slots.
+
+    Lanes are polled independently, so a message on one lane never waits for a slot held by another.
+    """
+
+    def __init__(self, name: str, queue_service: AsyncQueueService, max_in_flight: int) -> None:
+        self.name = name
         self.queue_service = queue_service
-        actor_id = ray.get_runtime_context().get_actor_id()
-        ensure_heartbeat_dir()
-        self.heartbeat_path = HEARTBEAT_DIR / f"worker_{actor_id}.heartbeat"
-        self.heartbeat_path.touch()
+        self.max_in_flight = max_in_flight
+        self.settlements = SettlementBatcher(queue_service)
+        self.publishes = PublishBatcher(queue_service)
+
+
+@ray.remote(max_restarts=-1, max_task_retries=0)
+class RayLlmService(ReceiveService):
+    def __init__(
+        self,
+        queue_service: AsyncQueueService,
+        interactive_queue_service: AsyncQueueService | None = None,
+    ) -> None:
+        super().__init__()
+        self.lanes = [Lane("llm", queue_service, settings.MAX_LLM_TASKS_PER_PROCESS)]
+        if interactive_queue_service is not None:
+            # reserved slots, so chat messages are picked up even while every llm slot is generating minutes
+            self.lanes.append(
+                Lane("interactive", interactive_queue_service, settings.MAX_INTERACTIVE_TASKS_PER_PROCESS)
+            )
         logger.info("Ray LLM receive service initialised")
 
     async def process(self) -> None:
         logger.info("receiving LLM messages from Ray queue")
-        while not await self.stopped.get.remote():
-            logger.info("Receiving LLM messages")
-            messages = self.queue_service.receive_message(max_messages=10)
-            tasks: list[asyncio.Task] = []
-            for message, receipt_handle in messages:
-                match message.type:
-                    case TaskType.MINUTE:
-                        tasks.append(asyncio.create_task(self.process_minute_task(message, receipt_handle)))
-                    case TaskType.EDIT:
-                        tasks.append(asyncio.create_task(self.process_edit_task(message, receipt_handle)))
-                    case TaskType.INTERACTIVE:
-                        tasks.append(asyncio.create_task(self.process_interactive_task(message, receipt_handle)))
-                    case _:
-                        logger.warning("Unknown task type: %s", message.type)
-                        self.queue_service.deadletter_message(message, receipt_handle)
-            if len(tasks) > 0:
-                done, pending = await asyncio.wait(tasks)
-                for task in done:
-                    try:
-                        task.result()
-                    except Exception:
-                        logger.exception("Unhandled error in LLM actor")
-
-            self.heartbeat_path.touch()
-
-    async def process_minute_task(self, message: WorkerMessage, receipt_handle: Any) -> None:
+        await asyncio.gather(*(self.process_lane(lane) for lane in self.lanes))
+
+    async def process_lane(self, lane: Lane) -> None:
+        await self.run_scheduler(
+            lane.name,
+            MessageScheduler(
+                lane.queue_service,
+                functools.partial(self.process_message, lane),
+                max_in_flight=lane.max_in_flight,
+                stop_event=self.stop_event,
+                lease_manager=MessageLeaseManager(lane.queue_service, settings.QUEUE_VISIBILITY_TIMEOUT),
+            ),
+        )
+
+    async def process_message(self, lane: Lane, message: WorkerMessage, receipt_handle: Any) -> None:
+        record_queue_wait(lane.name, message)
+        match message.type:
+            case TaskType.MINUTE:
+                await self.process_minute_task(lane, message, receipt_handle)
+            case TaskType.EDIT:
+                await self.process_edit_task(lane, message, receipt_handle)
+            case TaskType.INTERACTIVE:
+                await self.process_interactive_task(lane, message, receipt_handle)
+            case TaskType.HALLUCINATION_CHECK:
+                await self.process_hallucination_check_task(lane, message, receipt_handle)
+            case _:
+                logger.warning("Unknown task type: %s", message.type)
+                await lane.queue_service.deadletter_message(message, receipt_handle)
+
+    async def process_minute_task(self, lane: Lane, message: WorkerMessage, receipt_handle: Any) -> None:
         try:
             logger.info("Received minute generation message for MinuteVersion id %s", message.id)
 
@@ -124,12 +215,13 @@ class RayLlmService:
         except MinuteGenerationFailedError:
             logger.exception("Minute generation for MinuteVersion id %s failed", message.id)
             # For handled errors we complete the message, unhandled errors are not caught
-            self.queue_service.complete_message(receipt_handle)
+            await lane.settlements.complete_message(receipt_handle)
         else:
+            await self.schedule_hallucination_check(lane, message.id)
             # If no error then complete the message
-            self.queue_service.complete_message(receipt_handle)
+            await lane.settlements.complete_message(receipt_handle)
 
-    async def process_edit_task(self, message: WorkerMessage, receipt_handle: Any) -> None:
+    async def process_edit_task(self, lane: Lane, message: WorkerMessage, receipt_handle: Any) -> None:
         try:
             logger.info("Received minute edit message for minute id %s", message.id)
             await MinuteHandlerService.process_minute_edit_message(
@@ -139,17 +231,39 @@ class RayLlmService:
             logger.info("Minute edit complete for MinuteVersion id %s", message.id)
         except MinuteGenerationFailedError:
             logger.exception("Minute edit for MinuteVersion id %s failed", message.id)
-            self.queue_service.complete_message(receipt_handle=receipt_handle)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
+        else:
+            await self.schedule_hallucination_check(lane, message.id)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
+
+    async def schedule_hallucination_check(self, lane: Lane, minute_version_id: UUID) -> None:
+        # checked as a separate message once the minutes are already completed, so the user never waits for the check
+        if not settings.HALLUCINATION_CHECK:
+            return
+        try:
+            await lane.publishes.publish_message(WorkerMessage(id=minute_version_id, type=TaskType.HALLUCINATION_CHECK))
+        except Exception:
+            # the minutes are completed either way, and must not be generated again just because the check is missing
+            logger.exception("Failed to schedule hallucination check for MinuteVersion id %s", minute_version_id)
+
+    async def process_hallucination_check_task(self, lane: Lane, message: WorkerMessage, receipt_handle: Any) -> None:
+        try:
+            logger.info("Received hallucination check message for MinuteVersion id %s", message.id)
+            await MinuteHandlerService.process_hallucination_check_message(message.id)
+            logger.info("Hallucination check complete for MinuteVersion id %s", message.id)
+        except HallucinationCheckFailedError:
+            logger.exception("Hallucination check for MinuteVersion id %s failed", message.id)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
         else:
-            self.queue_service.complete_message(receipt_handle=receipt_handle)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
 
-    async def process_interactive_task(self, message: WorkerMessage, receipt_handle: Any) -> None:
+    async def process_interactive_task(self, lane: Lane, message: WorkerMessage, receipt_handle: Any) -> None:
         try:
             logger.info("Received interactive mode message for chat id %s", message.id)
             await TranscriptionHandlerService.process_interactive_message(message.id)
             logger.info("Interaction complete for chat id %s", message.id)
         except InteractionFailedError:
             logger.exception("Interaction for chat id %s failed", message.id)
-            self.queue_service.complete_message(receipt_handle=receipt_handle)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
         else:
-            self.queue_service.complete_message(receipt_handle=receipt_handle)
+            await lane.settlements.complete_message(receipt_handle=receipt_handle)
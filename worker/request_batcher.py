@@ -0,0 +1,108 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from common.services.queue_services.base import AsyncQueueService
+from common.types import WorkerMessage
+
+# long enough to catch handlers finishing together, short enough not to noticeably delay settlement
+DEFAULT_BATCH_WINDOW_SECONDS = 0.05
+# the most entries SQS accepts in one batch request
+MAX_BATCH_SIZE = 10
+
+
+class RequestBatcher:
+    """Coalesces queue requests from concurrent handlers into batch requests.
+
+    Items are collected for up to `window_seconds` after the first one arrives, or until `max_batch_size` are waiting,
+    then sent with a single `send_batch` call. `add` returns once its batch has been sent, raising the error the batch
+    request raised if it failed, so callers can rely on the request having been made, as with an unbatched request.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[list[Any]], Awaitable[None]],
+        window_seconds: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        self.send_batch = send_batch
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._flush_task: asyncio.Task | None = None
+        # flushes started early because the batch filled up, referenced here so they are not garbage collected
+        self._flushing: set[asyncio.Task] = set()
+
+    async def add(self, item: Any) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush_now()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        await future
+
+    def _flush_now(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._flush(batch))
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window_seconds)
+        self._flush_task = None
+        batch, self._pending = self._pending, []
+        await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        try:
+            await self.send_batch([item for item, _ in batch])
+        except Exception as e:  # noqa: BLE001
+            # raised from each caller's request, just as an unbatched failure would be
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+class SettlementBatcher(RequestBatcher):
+    """Sends message completions to a queue in `complete_messages` batches."""
+
+    def __init__(
+        self,
+        queue_service: AsyncQueueService,
+        window_seconds: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        super().__init__(queue_service.complete_messages, window_seconds, max_batch_size)
+
+    async def complete_message(self, receipt_handle: Any) -> None:
+        await self.add(receipt_handle)
+
+
+class PublishBatcher(RequestBatcher):
+    """Sends messages to a queue in `publish_messages` batches.
+
+    A batch is published without a delay, so delayed messages are published on their own straight away.
+    """
+
+    def __init__(
+        self,
+        queue_service: AsyncQueueService,
+        window_seconds: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        super().__init__(queue_service.publish_messages, window_seconds, max_batch_size)
+        self.queue_service = queue_service
+
+    async def publish_message(self, message: WorkerMessage, delay_seconds: int = 0) -> None:
+        if delay_seconds:
+            await self.queue_service.publish_message(message, delay_seconds=delay_seconds)
+            return
+        await self.add(message)
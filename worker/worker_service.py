@@ -1,13 +1,15 @@
 import asyncio
 import logging
+import time
 
 import ray
 
 from common.logger import setup_logger
-from common.services.queue_services import get_queue_service
-from common.services.queue_services.base import QueueService
+from common.services.queue_services import get_async_queue_service
+from common.services.queue_services.base import AsyncQueueService
 from common.settings import get_settings
-from worker.ray_recieve_service import HasBeenStopped, RayLlmService, RayTranscriptionService
+from worker.autoscaler import ActorGroup, GroupLane
+from worker.ray_recieve_service import RayLlmService, RayTranscriptionService
 from worker.signal_handler import SignalHandler
 
 logger = logging.getLogger(__name__)
@@ -15,56 +17,74 @@ settings = get_settings()
 
 
 class WorkerService:
-    def __init__(self, transcription_queue_service: QueueService, llm_queue_service: QueueService):
+    def __init__(
+        self,
+        transcription_queue_service: AsyncQueueService,
+        llm_queue_service: AsyncQueueService,
+        interactive_queue_service: AsyncQueueService | None = None,
+    ):
         self.transcription_queue_service = transcription_queue_service
         self.llm_queue_service = llm_queue_service
-        self.actors = []
-        self.calls = []
+        self.interactive_queue_service = interactive_queue_service
         self.signal_handler = SignalHandler()
-        self.stopped = HasBeenStopped.remote()
-        for _ in range(settings.MAX_TRANSCRIPTION_PROCESSES):
-            transcription_worker = RayTranscriptionService.remote(
-                self.transcription_queue_service, self.llm_queue_service, self.stopped
-            )
-            transcription_worker_call = transcription_worker.process.remote()
-            self.actors.append(transcription_worker)
-            self.calls.append(transcription_worker_call)
+        self.actor_groups = [
+            ActorGroup(
+                "transcription",
+                lambda: RayTranscriptionService.remote(self.transcription_queue_service, self.llm_queue_service),
+                {"transcription": (self.transcription_queue_service, settings.MAX_TRANSCRIPTION_TASKS_PER_PROCESS)},
+                min_actors=settings.MIN_TRANSCRIPTION_PROCESSES,
+                max_actors=settings.MAX_TRANSCRIPTION_PROCESSES,
+            ),
+            ActorGroup(
+                "llm",
+                lambda: RayLlmService.remote(self.llm_queue_service, self.interactive_queue_service),
+                self.llm_lanes(),
+                min_actors=settings.MIN_LLM_PROCESSES,
+                max_actors=settings.MAX_LLM_PROCESSES,
+            ),
+        ]
 
-        for _ in range(settings.MAX_LLM_PROCESSES):
-            llm_worker = RayLlmService.remote(self.llm_queue_service, self.stopped)
-            llm_worker_call = llm_worker.process.remote()
-            self.actors.append(llm_worker)
-            self.calls.append(llm_worker_call)
+    def llm_lanes(self) -> dict[str, GroupLane]:
+        """The queues the LLM workers receive from, named as RayLlmService names its lanes."""
+        lanes = {"llm": (self.llm_queue_service, settings.MAX_LLM_TASKS_PER_PROCESS)}
+        if self.interactive_queue_service is not None:
+            lanes["interactive"] = (self.interactive_queue_service, settings.MAX_INTERACTIVE_TASKS_PER_PROCESS)
+        return lanes
+
+    @property
+    def futures(self) -> list[asyncio.Future]:
+        return [future for group in self.actor_groups for future in group.all_futures]
 
     async def run(self) -> None:
-        # note, currently a bug in python 3.12/ray that means we need to wrap the ObjectRefs in asyncio.ensure_future
-        futures = [asyncio.ensure_future(call) for call in self.calls]
+        for group in self.actor_groups:
+            group.start()
+
+        last_autoscaled = time.monotonic()
         while not self.signal_handler.signal_received:
-            await self._check_and_restart_tasks(futures)
+            await self._wait_for_futures()
+            for group in self.actor_groups:
+                group.check_actors()
+            if time.monotonic() - last_autoscaled >= settings.AUTOSCALE_INTERVAL_SECONDS:
+                for group in self.actor_groups:
+                    await group.autoscale()
+                last_autoscaled = time.monotonic()
 
-        logger.info("Signal recieved. Setting stopped to True")
-        await self.stopped.set.remote()
+        logger.info("Signal recieved. Stopping workers")
+        for group in self.actor_groups:
+            group.stop()
 
         while True:
-            done, pending = await asyncio.wait(futures, timeout=1)
+            done, pending = await asyncio.wait(self.futures, timeout=1)
             if not pending:
                 logger.info("No remaining jobs. Stopping.")
                 break
             logger.info("Waiting for %d jobs", len(pending))
 
-    async def _check_and_restart_tasks(self, futures):
-        failed, pending = await asyncio.wait(futures, timeout=1)
-        for task in failed:
-            # Manually restart failed jobs
-            try:
-                # exc_info=False as this comes from another process
-                logger.error("Task has finished unexpectedly: error %s", task, exc_info=False)
-                idx = futures.index(task)
-                self.calls[idx] = self.actors[idx].process.remote()
-                futures[idx] = asyncio.ensure_future(self.calls[idx])
-
-            except Exception as e:  # noqa: BLE001
-                logger.error("Failed to restart worker %s", e)
+    async def _wait_for_futures(self) -> None:
+        if futures := self.futures:
+            await asyncio.wait(futures, timeout=1)
+        else:
+            await asyncio.sleep(1)
 
 
 def create_worker_service() -> WorkerService:
@@ -78,21 +98,35 @@ def create_worker_service() -> WorkerService:
         settings.BEST_LLM_PROVIDER,
         settings.BEST_LLM_MODEL_NAME,
     )
-    transcription_sqs_service = get_queue_service(
+    transcription_sqs_service = get_async_queue_service(
         settings.QUEUE_SERVICE_NAME, settings.TRANSCRIPTION_QUEUE_NAME, settings.TRANSCRIPTION_DEADLETTER_QUEUE_NAME
     )
-    llm_sqs_service = get_queue_service(
+    llm_sqs_service = get_async_queue_service(
         settings.QUEUE_SERVICE_NAME, settings.LLM_QUEUE_NAME, settings.LLM_DEADLETTER_QUEUE_NAME
     )
+    interactive_sqs_service = (
+        get_async_queue_service(
+            settings.QUEUE_SERVICE_NAME,
+            settings.INTERACTIVE_QUEUE_NAME,
+            # matches the backend, which publishes chat messages with this dead letter queue too
+            settings.INTERACTIVE_DEADLETTER_QUEUE_NAME or settings.LLM_DEADLETTER_QUEUE_NAME,
+        )
+        if settings.INTERACTIVE_QUEUE_NAME
+        else None
+    )
     # max concurrent ray processes
-    # +4 as we need 2 for the ray Queues, 1 for the HasBeenStopped Actor, plus one 'spare'
+    # +3 as we need 2 for the ray Queues, plus one 'spare'
     # we init ray here so we can handle its init in testing
     ray.init(
         log_to_driver=True,
-        num_cpus=(settings.MAX_TRANSCRIPTION_PROCESSES + settings.MAX_LLM_PROCESSES + 4),
+        num_cpus=(settings.MAX_TRANSCRIPTION_PROCESSES + settings.MAX_LLM_PROCESSES + 3),
         configure_logging=True,
         dashboard_host=settings.RAY_DASHBOARD_HOST,
         dashboard_port=8265,
         runtime_env={"worker_process_setup_hook": setup_logger},
     )
-    return WorkerService(transcription_queue_service=transcription_sqs_service, llm_queue_service=llm_sqs_service)
+    return WorkerService(
+        transcription_queue_service=transcription_sqs_service,
+        llm_queue_service=llm_sqs_service,
+        interactive_queue_service=interactive_sqs_service,
+    )